@@ -0,0 +1,90 @@
+"""
+Parse cost per reply of every registered reply codec and snapshot field parser, on
+replies of the software emulator, written as JSON to compare runs, e.g.
+
+    python -m benchmarks.codec --repeat 20000 -o parse.json
+
+Each cost is the fastest of `--rounds` rounds of `--repeat` parses, so it is the
+cost of the parser itself rather than of whatever else runs on the machine.
+"""
+
+import argparse
+import json
+import sys
+import timeit
+from typing import Any, Callable, Dict
+
+from big_sky_yag import BigSkyYag
+from big_sky_yag.codec import CODECS
+from big_sky_yag.emulator import YagEmulator
+from big_sky_yag.snapshot import FIELDS
+
+
+def measure(func: Callable[[], Any], repeat: int, rounds: int) -> float:
+    """
+    Fastest duration of a call of `func` in ns.
+    """
+    return min(timeit.repeat(func, number=repeat, repeat=rounds)) / repeat * 1e9
+
+
+def rejected(decode: Callable[[str], Any], reply: str) -> Callable[[], None]:
+    def call():
+        try:
+            decode(reply)
+        except ValueError:
+            pass
+
+    return call
+
+
+def run(repeat: int, rounds: int) -> Dict[str, Any]:
+    yag = BigSkyYag(instrument=YagEmulator(baud_rate=None, turnaround=0))
+    yag.pump = True
+    registered = list(CODECS)
+    replies = dict((command, yag.query(command)) for command in registered)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for i, command in enumerate(registered):
+        codec = CODECS[command]
+        reply = replies[command]
+        # the reply to another command, as after the stream got out of step
+        other = replies[registered[i - 1]]
+        results[f"decode.{command}"] = {
+            "reply": reply,
+            "ns": measure(lambda: codec.decode(reply), repeat, rounds),
+            "reject_ns": measure(rejected(codec.decode, other), repeat, rounds),
+        }
+
+    total = 0.0
+    for name, (commands, parse) in FIELDS.items():
+        field_replies = [replies[command] for command in commands]
+        ns = measure(lambda: parse(*field_replies), repeat, rounds)
+        results[f"field.{name}"] = {"replies": field_replies, "ns": ns}
+        total += ns
+    # parsing every reply of a full refresh
+    results["snapshot"] = {"ns": total}
+
+    return {
+        "config": {"repeat": repeat, "rounds": rounds},
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--repeat", type=int, default=10000, help="parses per round")
+    parser.add_argument("--rounds", type=int, default=5, help="rounds per benchmark")
+    parser.add_argument("-o", "--output", help="JSON file, stdout if omitted")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args.repeat, args.rounds), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
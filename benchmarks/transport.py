@@ -0,0 +1,108 @@
+"""
+Round-trip latency and throughput of the BigSkyYag driver against the software
+emulator, written as JSON to compare runs, e.g.
+
+    python -m benchmarks.transport --baud-rate 9600 --turnaround 0.005 -o run.json
+
+With `--baud-rate 0 --turnaround 0` replies arrive instantly, so the results are the
+framing, parsing and scheduling overhead of the driver alone.
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Any, Callable, Dict
+
+from big_sky_yag import BigSkyYag
+from big_sky_yag.attributes import FloatProperty, IntProperty, Property
+from big_sky_yag.emulator import YagEmulator
+from big_sky_yag.metrics import LatencyStats
+from big_sky_yag.snapshot import FIELDS
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    Call `func` `repeat` times and summarize the duration of the calls.
+    """
+    stats = LatencyStats(window=repeat)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        t = time.perf_counter()
+        func()
+        stats.record(time.perf_counter() - t)
+    total = time.perf_counter() - start
+    return {
+        "n": repeat,
+        "mean_ms": total / repeat * 1e3,
+        "p50_ms": stats.percentile(50) * 1e3,
+        "p90_ms": stats.percentile(90) * 1e3,
+        "p99_ms": stats.percentile(99) * 1e3,
+        "max_ms": stats.percentile(100) * 1e3,
+        "ops_per_s": repeat / total,
+    }
+
+
+def setpoint(prop: Any) -> Any:
+    # middle of the allowed range
+    lower, upper = prop._lower_upper
+    if isinstance(prop, FloatProperty):
+        return round((lower + upper) / 2, prop._decimals)
+    return int((lower + upper) // 2)
+
+
+def run(baud_rate: int, turnaround: float, repeat: int) -> Dict[str, Any]:
+    yag = BigSkyYag(
+        instrument=YagEmulator(baud_rate=baud_rate or None, turnaround=turnaround)
+    )
+    yag.pump = True
+    results: Dict[str, Dict[str, float]] = {}
+
+    results["query"] = measure(lambda: yag.query("V"), repeat)
+    results["write"] = measure(lambda: yag.write("W150"), repeat)
+
+    for prefix, component in (("yag", yag), ("flashlamp", yag.flashlamp), ("qswitch", yag.qswitch)):
+        for name, prop in vars(type(component)).items():
+            if not isinstance(prop, Property):
+                continue
+            results[f"get.{prefix}.{name}"] = measure(
+                lambda: getattr(component, name), repeat
+            )
+            if isinstance(prop, (IntProperty, FloatProperty)) and not prop._read_only:
+                value = setpoint(prop)
+                results[f"set.{prefix}.{name}"] = measure(
+                    lambda: component.set(name, value), repeat
+                )
+
+    # a full refresh of the GUI worker, one pipelined transaction
+    results["refresh.snapshot"] = measure(lambda: yag.snapshot(), repeat)
+    # the same fields read one query at a time
+    results["refresh.sequential"] = measure(
+        lambda: [yag.query(command) for commands, _ in FIELDS.values() for command in commands],
+        repeat,
+    )
+
+    return {
+        "config": {"baud_rate": baud_rate, "turnaround_s": turnaround, "repeat": repeat},
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--baud-rate", type=int, default=9600, help="0 for instant replies")
+    parser.add_argument("--turnaround", type=float, default=0.005, help="firmware turnaround in s")
+    parser.add_argument("--repeat", type=int, default=50, help="calls per benchmark")
+    parser.add_argument("-o", "--output", help="JSON file, stdout if omitted")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args.baud_rate, args.turnaround, args.repeat), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
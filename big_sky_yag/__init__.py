@@ -1,5 +1,7 @@
-from . import attributes, bit_handling, device, interlock
+from . import async_device, attributes, bit_handling, codec, device, framing, interlock, snapshot
+from .async_device import AsyncBigSkyYag
 from .device import BigSkyYag
+from .snapshot import LaserSnapshot
 from typing import List
 
-__all__: List[str] = [BigSkyYag]
\ No newline at end of file
+__all__: List[str] = [BigSkyYag, AsyncBigSkyYag, LaserSnapshot]
\ No newline at end of file
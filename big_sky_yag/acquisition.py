@@ -0,0 +1,230 @@
+import contextlib
+import math
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pyvisa
+
+from .attributes import Flashlamp
+from .device import BigSkyYag
+
+__all__ = ["CapacitorAcquisition", "CapacitorTrace", "VoltageStats"]
+
+# acquisition channel, parser of its replies
+CHANNELS = {
+    "VA": Flashlamp.voltage_capacitor_sampled.parse,
+    "VT": Flashlamp.voltage_capacitor_instant.parse,
+}
+
+
+class VoltageStats:
+    """
+    Running statistics of a capacitor voltage, updated per sample. A drop of more
+    than `droop_threshold` between two samples is counted as a flashlamp shot, with the
+    drop as its droop and the peak-to-peak voltage since the previous shot as ripple.
+    """
+
+    def __init__(self, droop_threshold: float = 5.0):
+        """
+        Args:
+            droop_threshold (float): voltage drop between samples counted as a shot in V
+        """
+        self.droop_threshold = droop_threshold
+        self.count = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.shots = 0
+        self._droop_sum = 0.0
+        self.droop_max = 0.0
+        self._ripple_sum = 0.0
+        self._previous: Optional[float] = None
+        self._interval_min = math.inf
+        self._interval_max = -math.inf
+
+    def add(self, voltage: float) -> None:
+        self.count += 1
+        delta = voltage - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (voltage - self._mean)
+        self.min = min(self.min, voltage)
+        self.max = max(self.max, voltage)
+
+        if (
+            self._previous is not None
+            and self._previous - voltage > self.droop_threshold
+        ):
+            droop = self._previous - voltage
+            self.shots += 1
+            self._droop_sum += droop
+            self.droop_max = max(self.droop_max, droop)
+            self._ripple_sum += self._interval_max - self._interval_min
+            self._interval_min = self._interval_max = voltage
+        else:
+            self._interval_min = min(self._interval_min, voltage)
+            self._interval_max = max(self._interval_max, voltage)
+        self._previous = voltage
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """
+        Number of samples, mean, standard deviation, minimum and maximum in V, number of
+        shots, mean ripple between shots (peak-to-peak of all samples without shots),
+        and mean and maximum droop per shot in V.
+        """
+        if self.count == 0:
+            return dict(
+                (name, None)
+                for name in (
+                    "count",
+                    "mean",
+                    "std",
+                    "min",
+                    "max",
+                    "shots",
+                    "ripple",
+                    "droop",
+                    "droop_max",
+                )
+            )
+        return {
+            "count": self.count,
+            "mean": self._mean,
+            "std": math.sqrt(self._m2 / self.count),
+            "min": self.min,
+            "max": self.max,
+            "shots": self.shots,
+            "ripple": (
+                self._ripple_sum / self.shots if self.shots else self.max - self.min
+            ),
+            "droop": self._droop_sum / self.shots if self.shots else None,
+            "droop_max": self.droop_max if self.shots else None,
+        }
+
+
+class CapacitorTrace:
+    """
+    Preallocated samples of each channel: `time` in time.monotonic() seconds and
+    `voltage` in V, NaN for replies that couldn't be parsed. Only the first
+    `count[channel]` samples are filled.
+    """
+
+    def __init__(
+        self, channels: Sequence[str], n_samples: int, droop_threshold: float = 5.0
+    ):
+        self.channels = tuple(channels)
+        self.time = dict((channel, np.zeros(n_samples)) for channel in channels)
+        self.voltage = dict(
+            (channel, np.full(n_samples, np.nan)) for channel in channels
+        )
+        self.count = dict((channel, 0) for channel in channels)
+        self.stats = dict(
+            (channel, VoltageStats(droop_threshold)) for channel in channels
+        )
+        # exception that ended the acquisition early
+        self.error: Optional[Exception] = None
+
+    def samples(self, channel: str) -> np.ndarray:
+        """
+        Filled samples of `channel` as an (n, 2) array of time and voltage.
+        """
+        n = self.count[channel]
+        return np.column_stack((self.time[channel][:n], self.voltage[channel][:n]))
+
+    def sample_rate(self, channel: str) -> float:
+        """
+        Mean samples per second of `channel`.
+        """
+        n = self.count[channel]
+        if n < 2:
+            return math.nan
+        times = self.time[channel]
+        return (n - 1) / (times[n - 1] - times[0])
+
+
+class CapacitorAcquisition:
+    """
+    Sample the flashlamp capacitor voltages back-to-back at the rate of the serial
+    link. Up to `max_pipeline` commands are in flight, and the next one is sent as
+    each reply arrives, so the line is never idle waiting for a round trip. Replies go
+    straight into a `CapacitorTrace`, bypassing the reply cache and the properties.
+    """
+
+    def __init__(
+        self,
+        yag: BigSkyYag,
+        channels: Sequence[str] = ("VA",),
+        max_pipeline: int = 8,
+        droop_threshold: float = 5.0,
+    ):
+        """
+        Args:
+            yag (BigSkyYag): connected laser, not a `ThreadedBigSkyYag`
+            channels (Sequence[str]): "VA" (sampled) and/or "VT" (instant), sampled in
+                                      turns
+            max_pipeline (int): commands sent before reading the first reply
+            droop_threshold (float): see `VoltageStats`
+
+        Raises:
+            ValueError: raise error for unknown channels
+        """
+        for channel in channels:
+            if channel not in CHANNELS:
+                raise ValueError(
+                    f"unknown channel {channel}, use one of {list(CHANNELS)}"
+                )
+        self.yag = yag
+        self.channels = tuple(channels)
+        self.max_pipeline = max_pipeline
+        self.droop_threshold = droop_threshold
+
+    def acquire(self, n_samples: int) -> CapacitorTrace:
+        """
+        Take `n_samples` samples of every channel. A read error ends the acquisition
+        early, the trace then holds the samples taken so far and the error.
+
+        Args:
+            n_samples (int): samples per channel
+
+        Returns:
+            CapacitorTrace: samples and statistics
+        """
+        trace = CapacitorTrace(self.channels, n_samples, self.droop_threshold)
+        channels = self.channels
+        parsers = [CHANNELS[channel] for channel in channels]
+        total = n_samples * len(channels)
+
+        # heads on a shared bus hold the line for the whole acquisition
+        bus = getattr(self.yag, "bus", None)
+        with bus.lock if bus is not None else contextlib.nullcontext():
+            self.yag._begin()
+            sent = min(total, self.max_pipeline)
+            for i in range(sent):
+                self.yag._send(channels[i % len(channels)])
+
+            for i in range(total):
+                try:
+                    reply = self.yag.read()
+                except (pyvisa.errors.VisaIOError, OSError) as err:
+                    # the replies in flight are discarded on the next send
+                    trace.error = err
+                    break
+                t = time.monotonic()
+                if sent < total:
+                    self.yag._send(channels[sent % len(channels)])
+                    sent += 1
+
+                k = i % len(channels)
+                channel = channels[k]
+                n = trace.count[channel]
+                trace.time[channel][n] = t
+                try:
+                    voltage = parsers[k](reply)
+                except ValueError:
+                    voltage = math.nan
+                else:
+                    trace.stats[channel].add(voltage)
+                trace.voltage[channel][n] = voltage
+                trace.count[channel] = n + 1
+        return trace
@@ -0,0 +1,404 @@
+import asyncio
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Generator,
+    Optional,
+    Sequence,
+    Union,
+)
+
+from .attributes import (
+    Flashlamp,
+    Property,
+    QSwitch,
+    encode_qswitch_mode,
+    encode_switch,
+    encode_trigger,
+    parse_flashlamp_interlock,
+    parse_laser_status,
+    parse_pump,
+    parse_qswitch_interlock,
+    parse_qswitch_mode,
+    parse_qswitch_status,
+    parse_serial_number,
+    parse_shutter_strict,
+    parse_trigger,
+)
+from .codec import matches
+from .device import BigSkyYag, address
+
+__all__ = ["AsyncBigSkyYag"]
+
+TERMINATOR = b"\r\n"
+
+
+class BoundAsyncAttribute:
+    """
+    An `AsyncAttribute` bound to a device component. Awaiting it reads the value,
+    `set` writes it.
+    """
+
+    __slots__ = ("_attribute", "_instance")
+
+    def __init__(self, attribute: "AsyncAttribute", instance):
+        self._attribute = attribute
+        self._instance = instance
+
+    def __await__(self) -> Generator[Any, None, Any]:
+        return self.get().__await__()
+
+    async def get(self) -> Any:
+        attribute = self._attribute
+        if len(attribute.queries) == 1:
+            return attribute.parse(await self._instance.query(attribute.queries[0]))
+        replies = await self._instance.query_many(attribute.queries)
+        return attribute.parse(*(_raise(replies[query]) for query in attribute.queries))
+
+    async def set(self, value: Any) -> Any:
+        """
+        Set the attribute and return the value confirmed by the device echo.
+        """
+        attribute = self._attribute
+        if attribute.encode is None:
+            raise ValueError(f"{attribute.queries} is a read-only attribute")
+        retval = await self._instance.write(attribute.encode(value))
+        if attribute.check is not None:
+            attribute.check(retval, value)
+        try:
+            return attribute.parse(retval)
+        except ValueError:
+            return await self.get()
+
+
+class AsyncAttribute:
+    """
+    Awaitable device attribute, read with `await obj.attr` and written with
+    `await obj.attr.set(value)`.
+    """
+
+    def __init__(
+        self,
+        queries: Sequence[str],
+        parse: Callable[..., Any],
+        encode: Optional[Callable[[Any], str]] = None,
+        check: Optional[Callable[[str, Any], None]] = None,
+    ):
+        """
+        Args:
+            queries (Sequence[str]): commands queried to read the attribute
+            parse (Callable[..., Any]): turns the replies to `queries` into the value
+            encode (Optional[Callable[[Any], str]]): builds the command setting a value,
+                                                     None for read-only attributes
+            check (Optional[Callable[[str, Any], None]]): checks the echo of a set command
+        """
+        self.queries = tuple(queries)
+        self.parse = parse
+        self.encode = encode
+        self.check = check
+
+    @classmethod
+    def from_property(cls, prop: Property) -> "AsyncAttribute":
+        return cls([prop.command], prop.parse, prop.encode, prop.check)
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        return BoundAsyncAttribute(self, instance)
+
+    def __set__(self, instance, value):
+        raise AttributeError("use `await <attribute>.set(value)` to set a value")
+
+
+def mirror_properties(cls: type) -> Callable[[type], type]:
+    """
+    Class decorator adding an `AsyncAttribute` for every `Property` defined on `cls`.
+    """
+
+    def decorate(async_cls: type) -> type:
+        for name, attr in vars(cls).items():
+            if isinstance(attr, Property):
+                setattr(async_cls, name, AsyncAttribute.from_property(attr))
+        return async_cls
+
+    return decorate
+
+
+async def confirm_echo(
+    parse: Callable[[str], Any], echo: str, query: Callable[[], Awaitable[str]]
+) -> Any:
+    """
+    Parse the echo of a set command, querying the value if the echo doesn't have the
+    format of the query reply, see `attributes.parse_echo`.
+    """
+    try:
+        return parse(echo)
+    except ValueError:
+        return parse(await query())
+
+
+def _raise(reply: Union[str, Exception]) -> str:
+    if isinstance(reply, Exception):
+        raise reply
+    return reply
+
+
+@mirror_properties(Flashlamp)
+class AsyncFlashlamp:
+    trigger = AsyncAttribute(["LPM"], parse_trigger, encode_trigger)
+    interlock = AsyncAttribute(["IF", "IF2"], parse_flashlamp_interlock)
+
+    def __init__(self, parent: "AsyncBigSkyYag"):
+        self.parent = parent
+
+    async def query(self, command: str) -> str:
+        return await self.parent.query(command)
+
+    async def query_many(self, queries: Sequence[str]) -> Dict[str, Union[str, Exception]]:
+        return await self.parent.query_many(queries)
+
+    async def write(self, command: str) -> str:
+        return await self.parent.write(command)
+
+    async def user_counter_reset(self) -> int:
+        """
+        Reset the user lamp shot counter.
+
+        Returns:
+            int: confirmed user lamp shot counter
+        """
+        echo = await self.write("UC0")
+        return await confirm_echo(
+            Flashlamp.user_counter.parse, echo, lambda: self.query("UC")
+        )
+
+    async def activate(self):
+        await self.write("A")
+
+    async def stop(self):
+        await self.write("S")
+
+    async def simmer(self):
+        await self.write("M")
+
+
+@mirror_properties(QSwitch)
+class AsyncQSwitch:
+    mode = AsyncAttribute(["QSM"], parse_qswitch_mode, encode_qswitch_mode)
+    status = AsyncAttribute(["QOF"], parse_qswitch_status)
+    interlock = AsyncAttribute(["IQ"], parse_qswitch_interlock)
+
+    def __init__(self, parent: "AsyncBigSkyYag"):
+        self.parent = parent
+
+    async def query(self, command: str) -> str:
+        return await self.parent.query(command)
+
+    async def query_many(self, queries: Sequence[str]) -> Dict[str, Union[str, Exception]]:
+        return await self.parent.query_many(queries)
+
+    async def write(self, command: str) -> str:
+        return await self.parent.write(command)
+
+    async def user_counter_reset(self) -> int:
+        """
+        Reset the user QSwitch shot counter.
+
+        Returns:
+            int: confirmed user QSwitch shot counter
+        """
+        echo = await self.write("UCQ0")
+        return await confirm_echo(
+            QSwitch.user_counter.parse, echo, lambda: self.query("UCQ")
+        )
+
+    async def on(self) -> bool:
+        """
+        Returns:
+            bool: confirmed qswitch status
+        """
+        echo = await self.write("QOF1")
+        return await confirm_echo(parse_qswitch_status, echo, lambda: self.query("QOF"))
+
+    async def off(self) -> bool:
+        """
+        Returns:
+            bool: confirmed qswitch status
+        """
+        echo = await self.write("QOF0")
+        return await confirm_echo(parse_qswitch_status, echo, lambda: self.query("QOF"))
+
+    async def start(self):
+        await self.write("PQ")
+
+    async def stop(self):
+        await self.write("SQ")
+
+    async def single(self):
+        await self.write("OQ")
+
+
+@mirror_properties(BigSkyYag)
+class AsyncBigSkyYag:
+    """
+    asyncio driver for the Big Sky YAG, talking to the device over a pair of asyncio
+    streams. Attributes are awaited, e.g. `await yag.flashlamp.voltage`, and set
+    with `await yag.flashlamp.voltage.set(900)`.
+    """
+
+    serial_number = AsyncAttribute(["SN"], parse_serial_number)
+    shutter = AsyncAttribute(["R"], parse_shutter_strict, lambda state: encode_switch("R", state))
+    pump = AsyncAttribute(["P"], parse_pump, lambda state: encode_switch("P", state))
+    laser_status = AsyncAttribute(["WOR"], parse_laser_status)
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        serial_number: Optional[int] = None,
+        timeout: float = 2.0,
+    ):
+        """
+        Args:
+            reader (asyncio.StreamReader): stream receiving the device replies
+            writer (asyncio.StreamWriter): stream sending commands to the device
+            serial_number (Optional[int]): serial number to address the device with
+            timeout (float): time to wait for a reply in seconds
+        """
+        self.reader = reader
+        self.writer = writer
+        self.timeout = timeout
+        self._serial_number = serial_number
+        self._lock = asyncio.Lock()
+        self._desynchronized = False
+        self.flashlamp = AsyncFlashlamp(self)
+        self.qswitch = AsyncQSwitch(self)
+
+    @classmethod
+    async def open(
+        cls,
+        port: str,
+        baud_rate: int = 9600,
+        serial_number: Optional[int] = None,
+        timeout: float = 2.0,
+    ) -> "AsyncBigSkyYag":
+        """
+        Open the serial port `port`, e.g. 'COM3' or '/dev/ttyUSB0', with pyserial-asyncio.
+        """
+        try:
+            import serial_asyncio
+        except ImportError as err:
+            raise ImportError(
+                "AsyncBigSkyYag.open requires the pyserial-asyncio package"
+            ) from err
+        reader, writer = await serial_asyncio.open_serial_connection(
+            url=port, baudrate=baud_rate
+        )
+        return cls(reader, writer, serial_number=serial_number, timeout=timeout)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+    async def _resynchronize(self):
+        # drop the late replies to commands that timed out
+        while True:
+            try:
+                data = await asyncio.wait_for(self.reader.read(4096), 0.05)
+            except asyncio.TimeoutError:
+                break
+            if not data:
+                break
+        self._desynchronized = False
+
+    async def _begin(self) -> None:
+        # frames left over from before the transaction, e.g. an unsolicited line, would
+        # be read as its replies, see `BigSkyYag._begin`
+        if self._desynchronized:
+            await self._resynchronize()
+        # StreamReader has no public count of the bytes received but not read
+        elif waiting := len(getattr(self.reader, "_buffer", b"")):
+            # returns at once, the bytes are already buffered
+            await self.reader.read(waiting)
+
+    async def _send(self, commands: Sequence[str]) -> None:
+        await self._begin()
+        self.writer.write(
+            b"".join(
+                f"{address(command, self._serial_number)}\r\n".encode()
+                for command in commands
+            )
+        )
+        await self.writer.drain()
+
+    async def read(self) -> str:
+        while True:
+            try:
+                frame = await asyncio.wait_for(
+                    self.reader.readuntil(TERMINATOR), self.timeout
+                )
+            except BaseException:
+                # the reply may still arrive, e.g. after a timeout or a cancellation
+                self._desynchronized = True
+                raise
+            if len(frame) > len(TERMINATOR):
+                return frame[: -len(TERMINATOR)].decode("ascii", "replace")
+
+    async def read_reply(self, command: str, max_stale: int = 4) -> str:
+        """
+        Read the reply to `command`, skipping up to `max_stale` frames that can't be its
+        reply, see `FrameReader.read_reply`.
+        """
+        frame = await self.read()
+        for _ in range(max_stale):
+            if matches(command, frame):
+                return frame
+            frame = await self.read()
+        if not matches(command, frame):
+            self._desynchronized = True
+        return frame
+
+    async def query(self, query: str) -> str:
+        async with self._lock:
+            try:
+                await self._send([query])
+                return await self.read_reply(query)
+            except BaseException:
+                # interrupted, e.g. cancelled, the reply is left in the stream
+                self._desynchronized = True
+                raise
+
+    async def query_many(
+        self, queries: Sequence[str]
+    ) -> Dict[str, Union[str, Exception]]:
+        """
+        Query several commands in one pipelined transaction, see `BigSkyYag.query_many`.
+        """
+        replies: Dict[str, Union[str, Exception]] = {}
+        # each command is sent once, even if it is listed several times
+        queries = list(dict.fromkeys(queries))
+        async with self._lock:
+            try:
+                await self._send(queries)
+                for i, query in enumerate(queries):
+                    try:
+                        replies[query] = await self.read_reply(query)
+                    except (asyncio.TimeoutError, asyncio.IncompleteReadError) as err:
+                        replies.update((_query, err) for _query in queries[i:])
+                        break
+            except BaseException:
+                # interrupted, e.g. cancelled, the replies are left in the stream
+                self._desynchronized = True
+                raise
+        return replies
+
+    async def write(self, command: str) -> str:
+        return await self.query(command)
+
+    async def save(self):
+        """
+        Save the current configuration.
+        """
+        await self.write("SAV1")
@@ -1,25 +1,43 @@
 from dataclasses import dataclass
 from enum import IntEnum
 import re
-from typing import Optional, Protocol, Tuple, Union
+from typing import Any, Callable, Optional, Protocol, Sequence, Tuple, Union
 
-from .bit_handling import Bits
+from .cache import ReplyCache
+from .codec import Codec, TemplateCodec, register
 from .interlock import (
-    FlashlampInterlock1,
-    FlashlampInterlock2,
+    WORD_BITS,
     FlashlampInterlockState,
-    QSwitchInterlock,
     QSwitchInterlockState,
+    flashlamp_interlock_state,
+    qswitch_interlock_state,
 )
 
 
 class Property:
+    # type of the value in the reply
+    _type: Callable[[str], Any] = str
+
     def __init__(
-        self, name: str, command: str, ret_string: Optional[str] = None, read_only=True
+        self,
+        name: str,
+        command: str,
+        ret_string: Optional[str] = None,
+        read_only=True,
+        coupled: Sequence[str] = (),
     ):
+        """
+        Args:
+            name (str): description of the property
+            command (str): command to query or set the property
+            ret_string (Optional[str]): reply template, the value is at the dashes
+            read_only (bool): True if the property can't be set
+            coupled (Sequence[str]): commands of properties changed by setting this one
+        """
         self._name = name
         self._command = command
         self._read_only = read_only
+        self._coupled = tuple(coupled)
         self._ret_string = ret_string
         if ret_string is not None:
             regex_found = list(re.finditer("-.*-", ret_string))
@@ -29,48 +47,105 @@ class Property:
                 self._span = None
         else:
             self._span = None
+        self._codec: Optional[Codec] = None
+        if self._span is not None and ret_string is not None:
+            self._codec = register(
+                TemplateCodec(command, ret_string, self._span, self._type)
+            )
+        # bound once, parse is called for every reply
+        self._decode = self._type if self._codec is None else self._codec.decode
+
+    @property
+    def command(self) -> str:
+        return self._command
+
+    def parse(self, reply: str) -> str:
+        """
+        Extract the value from a device reply to this property's command.
+
+        Args:
+            reply (str): device reply, without termination characters
+
+        Raises:
+            ValueError: raise error if the reply doesn't match the reply template
+
+        Returns:
+            str: value in the reply, converted to the type of the property
+        """
+        return self._decode(reply)
 
     def __get__(self, instance, owner) -> str:
-        retval = instance.query(f"{self._command}")
-        if self._span is not None:
-            retval = retval[self._span[0] : self._span[1]]
-        return retval
+        if instance is None:
+            return self  # type: ignore[return-value]
+        return self.parse(instance.query(f"{self._command}"))
+
+    def encode(self, value: Union[str, float, int]) -> str:
+        """
+        Build the command that sets this property to `value`.
+
+        Args:
+            value (Union[str, float, int]): value to set
+
+        Raises:
+            ValueError: raise error if the property is read-only
 
-    def __set__(self, instance, value: Union[str, float, int]) -> str:
+        Returns:
+            str: command string, without address prefix
+        """
         if self._read_only:
             raise ValueError(f"{self._name} is a read-only attribute")
-        else:
-            retval = instance.write(f"{self._command}{value}")
-            return retval
+        return f"{self._command}{value}"
+
+    def check(self, reply: str, value: Union[str, float, int]) -> None:
+        """
+        Check that the device echo `reply` confirms that `value` was set.
+        """
+        return
+
+    def write(self, instance, value: Union[str, float, int]) -> Any:
+        """
+        Set the property to `value` and return the value confirmed by the device echo.
+        """
+        retval = instance.write(
+            self.encode(value), invalidates=(self._command, *self._coupled)
+        )
+        self.check(retval, value)
+        # the echo has the same format as the reply to a query
+        instance.cache.put(self._command, retval)
+        return self.parse(retval)
+
+    def __set__(self, instance, value: Union[str, float, int]) -> None:
+        self.write(instance, value)
 
 
 class IntProperty(Property):
+    _type = int
+
     def __init__(self, *args, lower_upper: Optional[Tuple[int, int]] = None, **kwargs):
         super().__init__(*args, **kwargs)
         self._lower_upper = lower_upper
 
-    def __get__(self, instance, owner) -> int:  # type: ignore[override]
-        val = int(super().__get__(instance, owner))
-        return val
+    def parse(self, reply: str) -> int:  # type: ignore[override]
+        return self._decode(reply)
 
-    def __set__(self, instance, value: int) -> str:  # type: ignore[override]
+    def encode(self, value: int) -> str:  # type: ignore[override]
         assert isinstance(value, int), f"{value} is not of type int"
         if (ul := self._lower_upper) is not None:
             l, u = ul
             assert (value >= l) & (
                 value <= u
             ), f"value {value} outside of range {l} -> {u}"
-        retval = super().__set__(instance, value)
+        return super().encode(value)
+
+    def check(self, reply: str, value: int) -> None:  # type: ignore[override]
         # check if input value was set properly
-        if (span := self._span) is not None and self._ret_string is not None:
-            # ret_string = self._ret_string.replace(
-            #     self._ret_string[span[0] : span[1]], f"{value}"
-            # )
-            assert int(retval[span[0] : span[1]]) == value
-        return retval
+        if self._codec is not None:
+            assert self.parse(reply) == value
 
 
 class FloatProperty(Property):
+    _type = float
+
     def __init__(
         self,
         *args,
@@ -82,11 +157,10 @@ class FloatProperty(Property):
         self._decimals = decimals
         self._lower_upper = lower_upper
 
-    def __get__(self, instance, owner) -> float:  # type: ignore[override]
-        val = super().__get__(instance, owner)
-        return float(val)
+    def parse(self, reply: str) -> float:  # type: ignore[override]
+        return self._decode(reply)
 
-    def __set__(self, instance, value: float) -> str:  # type: ignore[override]
+    def encode(self, value: float) -> str:  # type: ignore[override]
         assert isinstance(value, float), f"{value} is not of type float"
         if (ul := self._lower_upper) is not None:
             l, u = ul
@@ -95,23 +169,21 @@ class FloatProperty(Property):
             ), f"value {value} outside of range {l} -> {u}"
         write_multiplier = 10**self._decimals
         _value = int(round(value * write_multiplier, 0))
-        retval = super().__set__(instance, _value)
-        # check if input value was set properly
-        if (span := self._span) is not None and self._ret_string is not None:
-            # ret_string = self._ret_string.replace(
-            #     self._ret_string[span[0] : span[1]], f"{round(value,self._decimals)}"
-            # )
+        return super().encode(_value)
 
-            # assert retval == ret_string
-            assert float(retval[span[0] : span[1]]) == value
-        return retval
+    def check(self, reply: str, value: float) -> None:  # type: ignore[override]
+        # check if input value was set properly
+        if self._codec is not None:
+            assert self.parse(reply) == value
 
 
 class BigSkyYag(Protocol):
+    cache: ReplyCache
+
     def query(self, query: str) -> str:
         ...
 
-    def write(self, command: str) -> str:
+    def write(self, command: str, invalidates: Optional[Sequence[str]] = None) -> str:
         ...
 
 
@@ -142,6 +214,239 @@ class LaserStatus:
     q_switch_synchronization: Trigger
 
 
+TRIGGER = register(
+    Codec("LPM", r"\s*LP synch\s*:\s*(\d)\s*", lambda v: Trigger(int(v)), table_size=16)
+)
+
+
+def parse_trigger(reply: str) -> Trigger:
+    """Parse the reply to the flashlamp trigger query `LPM`."""
+    return TRIGGER.decode(reply)
+
+
+def encode_trigger(trigger: str) -> str:
+    """
+    Build the command setting the flashlamp trigger, 'internal' or 'external'.
+
+    Raises:
+        ValueError: raise error if `trigger` is not `internal` or `external`
+    """
+    if trigger == "internal":
+        return "LPM0"
+    elif trigger == "external":
+        return "LPM1"
+    else:
+        raise ValueError(
+            f"flashlamp trigger should be either internal or external, not {trigger}"
+        )
+
+
+QSWITCH_MODE = register(
+    Codec(
+        "QSM", r"\s*QS mode\s*:\s*(\d)\s*", lambda v: QSwitchMode(int(v)), table_size=16
+    )
+)
+
+
+def parse_qswitch_mode(reply: str) -> QSwitchMode:
+    """Parse the reply to the q-switch mode query `QSM`."""
+    return QSWITCH_MODE.decode(reply)
+
+
+def encode_qswitch_mode(mode: str) -> str:
+    """
+    Build the command setting the q-switch mode, 'auto', 'burst' or 'external'.
+
+    Raises:
+        ValueError: raise error if `mode` is not `auto`, `burst` or `external`
+    """
+    if mode == "auto":
+        return "QSM0"
+    elif mode == "burst":
+        return "QSM1"
+    elif mode == "external":
+        return "QSM2"
+    else:
+        raise ValueError(
+            f"qswitch mode should be either auto, burst or external, not {mode}"
+        )
+
+
+QSWITCH_STATUS = register(
+    Codec("QOF", r"\s*QS at run\s*([01])\s*", lambda v: v == "1", table_size=16)
+)
+
+
+def parse_qswitch_status(reply: str) -> bool:
+    """Parse the reply to the q-switch status query `QOF`."""
+    return QSWITCH_STATUS.decode(reply)
+
+
+# interlock replies are the bits of the word, bit 0 first, in two groups of four;
+# replies with fewer or more bits, which used to be read as a shorter or longer word,
+# are rejected
+NIBBLES = dict(
+    ("".join(str(nibble >> i & 1) for i in range(WORD_BITS // 2)), nibble)
+    for nibble in range(1 << WORD_BITS // 2)
+)
+
+
+def interlock_codec(command: str) -> Codec:
+    return Codec(
+        command,
+        rf"\s*{command}\s*([01]{{4}})\s*([01]{{4}})\s*",
+        lambda low, high: NIBBLES[low] | NIBBLES[high] << WORD_BITS // 2,
+        table_size=1 << WORD_BITS,
+    )
+
+
+FLASHLAMP_INTERLOCK1 = register(interlock_codec("IF"))
+FLASHLAMP_INTERLOCK2 = register(interlock_codec("IF2"))
+QSWITCH_INTERLOCK = register(interlock_codec("IQ"))
+
+
+def parse_echo(parse: Callable[[str], Any], echo: str, query: Callable[[], str]) -> Any:
+    """
+    Parse the echo of a set command, falling back to querying the value if the echo
+    doesn't have the format of the query reply.
+
+    Args:
+        parse (Callable[[str], Any]): parser of the query reply
+        echo (str): device echo of the set command
+        query (Callable[[], str]): queries the value
+
+    Returns:
+        Any: confirmed value
+    """
+    try:
+        return parse(echo)
+    except ValueError:
+        return parse(query())
+
+
+def set_confirmed(instance, name: str, value: Any) -> Any:
+    """
+    Set attribute `name` of a device component and return the value confirmed by the
+    device, parsed from the echo of the set command instead of reading it back.
+
+    Args:
+        instance: device component, e.g. `BigSkyYag`, `Flashlamp` or `QSwitch`
+        name (str): attribute name, e.g. 'voltage'
+        value (Any): value to set
+
+    Raises:
+        AttributeError: raise error if the attribute can't be set
+
+    Returns:
+        Any: confirmed value
+    """
+    attr = getattr(type(instance), name)
+    if isinstance(attr, Property):
+        return attr.write(instance, value)
+    elif isinstance(attr, property) and attr.fset is not None:
+        return attr.fset(instance, value)
+    else:
+        raise AttributeError(f"{name} can't be set")
+
+
+def parse_flashlamp_interlock(if1_reply: str, if2_reply: str) -> FlashlampInterlockState:
+    """Parse the replies to the flashlamp interlock queries `IF` and `IF2`."""
+    return flashlamp_interlock_state(
+        FLASHLAMP_INTERLOCK1.decode(if1_reply), FLASHLAMP_INTERLOCK2.decode(if2_reply)
+    )
+
+
+def parse_qswitch_interlock(reply: str) -> QSwitchInterlockState:
+    """Parse the reply to the q-switch interlock query `IQ`."""
+    return qswitch_interlock_state(QSWITCH_INTERLOCK.decode(reply))
+
+
+SERIAL_NUMBER = register(Codec("SN", r"\s*s/number\s*(.*?)\s*", str, table_size=16))
+SHUTTER = register(
+    Codec(
+        "R",
+        r"\s*shutter\s*(opened|closed)\s*",
+        lambda v: v == "opened",
+        table_size=16,
+    )
+)
+PUMP = register(Codec("P", r"\s*CG pump\s*(\d+)\s*", lambda v: int(v) != 0, table_size=16))
+
+
+def parse_serial_number(reply: str) -> str:
+    """Parse the reply to the serial number query `SN`."""
+    return SERIAL_NUMBER.decode(reply)
+
+
+def parse_shutter(reply: str) -> bool:
+    """Parse the reply to the shutter query `R`, True if open."""
+    try:
+        return SHUTTER.decode(reply)
+    except ValueError:
+        return False
+
+
+def encode_switch(command: str, state: bool) -> str:
+    """
+    Build the command switching the shutter (`R`) or pump (`P`) on (True) or off (False).
+
+    Raises:
+        TypeError: raise error if state is not boolean
+    """
+    if not isinstance(state, bool):
+        raise TypeError(f"state not boolean but {type(state)}")
+    return f"{command}{state:b}"
+
+
+def parse_shutter_strict(reply: str) -> bool:
+    """
+    Parse the reply to the shutter query `R`, raise ValueError if it is neither
+    opened nor closed.
+    """
+    return SHUTTER.decode(reply)
+
+
+def parse_pump(reply: str) -> bool:
+    """Parse the reply to the pump query `P`, True if on."""
+    return PUMP.decode(reply)
+
+
+def status_mode(status: int) -> Tuple[Status, Trigger]:
+    # flashlamp or q-switch field of the laser status, 4 and up for external trigger
+    return Status(status % 4), Trigger.INTERNAL if status <= 3 else Trigger.EXTERNAL
+
+
+STATUS_MODES = dict(
+    (str(status + offset), status_mode(status + offset))
+    for status in Status
+    for offset in (0, 4)
+)
+
+
+def decode_laser_status(
+    interlock: str, flashlamp: str, simmer: str, qswitch: str
+) -> LaserStatus:
+    flashlamp_mode = STATUS_MODES.get(flashlamp) or status_mode(int(flashlamp))
+    qswitch_mode = STATUS_MODES.get(qswitch) or status_mode(int(qswitch))
+    return LaserStatus(
+        int(interlock) == 0, *flashlamp_mode, int(simmer) != 0, *qswitch_mode
+    )
+
+
+LASER_STATUS = register(
+    Codec(
+        "WOR",
+        r"\s*W\s*(\d+)\s*F\s*(\d+)\s*S\s*(\d+)\s*Q\s*(\d+)\s*",
+        decode_laser_status,
+    )
+)
+
+
+def parse_laser_status(reply: str) -> LaserStatus:
+    """Parse the reply to the laser status query `WOR`."""
+    return LASER_STATUS.decode(reply)
+
+
 class Flashlamp:
 
     voltage = IntProperty(
@@ -150,6 +455,7 @@ class Flashlamp:
         ret_string="voltage  ---- V",
         lower_upper=(500, 1800),
         read_only=False,
+        coupled=("ENE",),
     )
     voltage_capacitor_sampled = IntProperty(
         name="capacitor voltage sampled", command="VA", ret_string="voltage ac----V"
@@ -164,6 +470,7 @@ class Flashlamp:
         lower_upper=(7, 23),
         decimals=1,
         read_only=False,
+        coupled=("V",),
     )
     capacitance = FloatProperty(
         name="capacitance",
@@ -172,6 +479,7 @@ class Flashlamp:
         lower_upper=(27.0, 33.0),
         decimals=1,
         read_only=False,
+        coupled=("V", "ENE"),
     )
     frequency = FloatProperty(
         name="frequency",
@@ -192,11 +500,21 @@ class Flashlamp:
         self.parent = parent
         return
 
+    @property
+    def cache(self) -> ReplyCache:
+        return self.parent.cache
+
     def query(self, command) -> str:
         return self.parent.query(command)
 
-    def write(self, command) -> str:
-        return self.parent.write(command)
+    def write(self, command, invalidates: Optional[Sequence[str]] = None) -> str:
+        return self.parent.write(command, invalidates)
+
+    def set(self, name: str, value: Any) -> Any:
+        """
+        Set attribute `name` and return the value confirmed by the device echo.
+        """
+        return set_confirmed(self, name, value)
 
     @property
     def trigger(self) -> Trigger:
@@ -206,12 +524,10 @@ class Flashlamp:
         Returns:
             Trigger: enum describing the flashlamp state
         """
-        mode = self.query("LPM")
-        mode = mode.strip("LP synch :").replace(" ", "")
-        return Trigger(int(mode))
+        return parse_trigger(self.query("LPM"))
 
     @trigger.setter
-    def trigger(self, trigger: str):
+    def trigger(self, trigger: str) -> Trigger:
         """
         Set the flashlamp trigger, either internal or external
 
@@ -220,33 +536,26 @@ class Flashlamp:
 
         Raises:
             ValueError: raise error if `trigger` is not `internal` or `external`
+
+        Returns:
+            Trigger: confirmed flashlamp trigger
         """
-        if trigger == "internal":
-            self.write("LPM0")
-        elif trigger == "external":
-            self.write("LPM1")
-        else:
-            raise ValueError(
-                f"flashlamp trigger should be either internal or external, not {trigger}"
-            )
+        echo = self.write(encode_trigger(trigger), invalidates=("LPM", "WOR"))
+        return parse_echo(parse_trigger, echo, lambda: self.query("LPM"))
 
     @property
     def interlock(self) -> FlashlampInterlockState:
-        interlock_str = self.query("IF")
-        interlock_str = "".join(interlock_str.split(" ")[1:])[::-1]
-        if1 = Bits(int(interlock_str, 2))
-        interlock_str = self.query("IF2")
-        interlock_str = "".join(interlock_str.split(" ")[1:])[::-1]
-        if2 = Bits(int(interlock_str, 2))
-        state = dict((i.name, bool(if1.get_bit(i))) for i in FlashlampInterlock1)
-        state.update(dict((i.name, bool(if2.get_bit(i))) for i in FlashlampInterlock2))
-        return FlashlampInterlockState(**state)
-
-    def user_counter_reset(self):
+        return parse_flashlamp_interlock(self.query("IF"), self.query("IF2"))
+
+    def user_counter_reset(self) -> int:
         """
         Reset the user lamp shot counter.
+
+        Returns:
+            int: confirmed user lamp shot counter
         """
-        self.write("UC0")
+        echo = self.write("UC0", invalidates=("UC",))
+        return parse_echo(Flashlamp.user_counter.parse, echo, lambda: self.query("UC"))
 
     def activate(self):
         self.write("A")
@@ -294,62 +603,64 @@ class QSwitch:
         self.parent = parent
         return
 
+    @property
+    def cache(self) -> ReplyCache:
+        return self.parent.cache
+
     def query(self, command) -> str:
         return self.parent.query(command)
 
-    def write(self, command) -> str:
-        return self.parent.write(command)
+    def write(self, command, invalidates: Optional[Sequence[str]] = None) -> str:
+        return self.parent.write(command, invalidates)
+
+    def set(self, name: str, value: Any) -> Any:
+        """
+        Set attribute `name` and return the value confirmed by the device echo.
+        """
+        return set_confirmed(self, name, value)
 
     @property
     def mode(self) -> QSwitchMode:
-        mode = self.query("QSM")
-        mode = mode.strip("QS mode :").replace(" ", "")
-        return QSwitchMode(int(mode))
+        return parse_qswitch_mode(self.query("QSM"))
 
     @mode.setter
-    def mode(self, mode: str):
-        if mode == "auto":
-            self.write("QSM0")
-        elif mode == "burst":
-            self.write("QSM1")
-        elif mode == "external":
-            self.write("QSM2")
-        else:
-            raise ValueError(
-                f"qswitch mode should be either auto, burst or external, not {mode}"
-            )
+    def mode(self, mode: str) -> QSwitchMode:
+        echo = self.write(encode_qswitch_mode(mode), invalidates=("QSM", "WOR"))
+        return parse_echo(parse_qswitch_mode, echo, lambda: self.query("QSM"))
 
     @property
     def status(self) -> bool:
-        status = self.query("QOF")
-        status = status.strip("QS at run").replace(" ", "")
-        if status == "1":
-            return True
-        elif status == "0":
-            return False 
-        else:
-            raise ValueError(f"Unrecognized qswitch status {status}")
-            # return bool(int(status)) # string '0' make it return True, while int 0 makes it False
+        return parse_qswitch_status(self.query("QOF"))
 
     @property
     def interlock(self) -> QSwitchInterlockState:
-        interlock_str = self.query("IQ")
-        interlock_str = "".join(interlock_str.split(" ")[1:])[::-1]
-        iq = Bits(int(interlock_str, 2))
-        state = dict((i.name, bool(iq.get_bit(i))) for i in QSwitchInterlock)
-        return QSwitchInterlockState(**state)
+        return parse_qswitch_interlock(self.query("IQ"))
 
-    def user_counter_reset(self):
+    def user_counter_reset(self) -> int:
         """
         Reset the user QSwitch shot counter.
+
+        Returns:
+            int: confirmed user QSwitch shot counter
         """
-        self.write("UCQ0")
+        echo = self.write("UCQ0", invalidates=("UCQ",))
+        return parse_echo(QSwitch.user_counter.parse, echo, lambda: self.query("UCQ"))
 
-    def on(self):
-        self.write("QOF1")
+    def on(self) -> bool:
+        """
+        Returns:
+            bool: confirmed qswitch status
+        """
+        echo = self.write("QOF1")
+        return parse_echo(parse_qswitch_status, echo, lambda: self.query("QOF"))
 
-    def off(self):
-        self.write("QOF0")
+    def off(self) -> bool:
+        """
+        Returns:
+            bool: confirmed qswitch status
+        """
+        echo = self.write("QOF0")
+        return parse_echo(parse_qswitch_status, echo, lambda: self.query("QOF"))
 
     def start(self):
         self.write("PQ")
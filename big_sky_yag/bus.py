@@ -0,0 +1,193 @@
+import threading
+from collections import deque
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from .device import REPLY_LENGTH, BigSkyYag
+from .framing import FrameReader
+from .transports import open_instrument
+
+if TYPE_CHECKING:
+    from .pool import SessionPool
+    from .snapshot import LaserSnapshot
+
+__all__ = ["Rs485Bus", "BusYag"]
+
+
+class FairLock:
+    """
+    Reentrant lock granted in the order it was requested, so a thread releasing and
+    re-acquiring it in a loop, e.g. while polling, doesn't starve the others.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._waiting: Deque[object] = deque()
+        self._owner: Optional[int] = None
+        self._count = 0
+
+    def acquire(self) -> None:
+        me = threading.get_ident()
+        with self._cond:
+            if self._owner == me:
+                self._count += 1
+                return
+            ticket = object()
+            self._waiting.append(ticket)
+            self._cond.wait_for(
+                lambda: self._owner is None and self._waiting[0] is ticket
+            )
+            self._waiting.popleft()
+            self._owner = me
+            self._count = 1
+
+    def release(self) -> None:
+        with self._cond:
+            self._count -= 1
+            if self._count == 0:
+                self._owner = None
+                self._cond.notify_all()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class BusYag(BigSkyYag):
+    """
+    Handle of one laser head on a `Rs485Bus`, addressed with its serial number. Every
+    query, `query_many` or write is one transaction that has the bus to itself.
+    """
+
+    def __init__(
+        self, bus: "Rs485Bus", serial_number: int, cache_max_age: Optional[float] = None
+    ):
+        """
+        Args:
+            bus (Rs485Bus): bus the head is connected to
+            serial_number (int): serial number of the head
+            cache_max_age (Optional[float]): see `BigSkyYag`
+        """
+        super().__init__(
+            instrument=bus.instrument,
+            serial_number=serial_number,
+            cache_max_age=cache_max_age,
+        )
+        self.bus = bus
+        # replies of all heads arrive on the same line
+        self._frames = bus.frames
+
+    def close(self, discard: bool = False) -> None:
+        # the port belongs to the bus
+        return
+
+    def query(self, query: str) -> str:
+        with self.bus.lock:
+            return super().query(query)
+
+    def query_many(self, queries: Sequence[str]) -> Dict[str, Union[str, Exception]]:
+        with self.bus.lock:
+            return super().query_many(queries)
+
+    def write(self, command: str, invalidates: Optional[Sequence[str]] = None) -> str:
+        with self.bus.lock:
+            return super().write(command, invalidates)
+
+
+class Rs485Bus:
+    """
+    Several laser heads on one serial line, each addressed with `$<serial number>`.
+    The bus owns the port and hands out a `BusYag` per head. Transactions are granted
+    in the order they are requested, so a command for one head goes out after the
+    transaction in flight instead of after the poll of all heads.
+    """
+
+    def __init__(
+        self,
+        resource_name: Optional[str] = None,
+        baud_rate: int = 9600,
+        instrument: Any = None,
+        pool: Optional["SessionPool"] = None,
+    ):
+        """
+        Args:
+            resource_name (Optional[str]): resource name of the port, see
+                                           `transports.open_instrument`
+            baud_rate (int): serial baud rate
+            instrument (Any): already opened port used instead of `resource_name`
+            pool (Optional[SessionPool]): lease the port from this pool
+
+        Raises:
+            ValueError: raise error if neither `resource_name` nor `instrument` is given
+        """
+        self._lease = None
+        if instrument is not None:
+            self.instrument = instrument
+        elif resource_name is not None and pool is not None:
+            self._lease = pool.acquire(resource_name, baud_rate=baud_rate)
+            self.instrument = self._lease.instrument
+        elif resource_name is not None:
+            self.instrument = open_instrument(resource_name, baud_rate=baud_rate)
+        else:
+            raise ValueError("either resource_name or instrument is required")
+        self.frames = FrameReader(self.instrument, max_frame_length=4 * REPLY_LENGTH)
+        self.lock = FairLock()
+        self.heads: Dict[int, BusYag] = {}
+
+    def head(self, serial_number: int, cache_max_age: Optional[float] = None) -> BusYag:
+        """
+        Handle of the head with `serial_number`, created on first use.
+        """
+        if serial_number not in self.heads:
+            self.heads[serial_number] = BusYag(self, serial_number, cache_max_age)
+        return self.heads[serial_number]
+
+    def poll(
+        self, fields: Dict[int, Iterable[str]], chunk_size: int = 4
+    ) -> Iterator[Tuple[int, "LaserSnapshot"]]:
+        """
+        Read the fields of several heads, taking turns: one pipelined transaction of at
+        most `chunk_size` fields per head at a time, so every head gets fresh values at
+        the same pace and commands queued meanwhile go out between transactions.
+
+        Args:
+            fields (Dict[int, Iterable[str]]): snapshot fields to read per serial number
+            chunk_size (int): fields read in one transaction
+
+        Yields:
+            Tuple[int, LaserSnapshot]: serial number and the fields read in one
+                                       transaction
+        """
+        pending = deque(
+            (serial_number, list(head_fields))
+            for serial_number, head_fields in fields.items()
+        )
+        while pending:
+            serial_number, head_fields = pending.popleft()
+            chunk, rest = head_fields[:chunk_size], head_fields[chunk_size:]
+            if rest:
+                pending.append((serial_number, rest))
+            if chunk:
+                yield serial_number, self.head(serial_number).snapshot(chunk)
+
+    def close(self, discard: bool = False) -> None:
+        """
+        Close the port, or give it back to the pool it was leased from.
+        """
+        if self._lease is not None:
+            self._lease.release(discard)
+        else:
+            self.instrument.close()
@@ -0,0 +1,63 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+__all__ = ["ReplyCache"]
+
+
+class ReplyCache:
+    """
+    Cache of device replies keyed by query command, each reply is served for at most
+    `max_age` seconds after it was received.
+    """
+
+    def __init__(self, max_age: Optional[float] = None):
+        """
+        Args:
+            max_age (Optional[float]): maximum age of a cached reply in seconds,
+                                       None or 0 disables the cache
+        """
+        self.max_age = max_age
+        self._replies: Dict[str, Tuple[float, str]] = {}
+        # number of invalidations, a reply read before one may be stale
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_age)
+
+    def get(self, command: str) -> Optional[str]:
+        """
+        Get the cached reply to `command`, None if there is none or it is too old.
+        """
+        if not self.max_age or (entry := self._replies.get(command)) is None:
+            return None
+        t, reply = entry
+        if time.monotonic() - t > self.max_age:
+            self._replies.pop(command, None)
+            return None
+        return reply
+
+    def put(self, command: str, reply: str, generation: Optional[int] = None) -> None:
+        """
+        Cache `reply` to `command`. With `generation`, the value of `generation` when
+        the query was sent, the reply is dropped if the cache was invalidated since,
+        e.g. by a write from another thread that was executed after the query.
+        """
+        if not self.max_age:
+            return
+        with self._lock:
+            if generation is None or generation == self.generation:
+                self._replies[command] = (time.monotonic(), reply)
+
+    def invalidate(self, *commands: str) -> None:
+        """
+        Drop the cached replies to `commands`, or all cached replies if none are given.
+        """
+        with self._lock:
+            self.generation += 1
+            if not commands:
+                self._replies.clear()
+            for command in commands:
+                self._replies.pop(command, None)
@@ -0,0 +1,147 @@
+import re
+from typing import Any, Callable, Dict, Pattern, Tuple
+
+__all__ = [
+    "Codec",
+    "TemplateCodec",
+    "CODECS",
+    "register",
+    "template_pattern",
+    "matches",
+]
+
+# value field of a reply template
+NUMBER = r"([-+]?(?:\d+\.?\d*|\.\d+))"
+
+
+class Codec:
+    """
+    Reply format of a query command, compiled once to a regular expression whose
+    groups are the value fields, and the conversion of the fields to a typed value.
+    Replies that don't match the format are rejected, e.g. the reply to another
+    command after the stream got out of step.
+
+    Replies with only a few possible values, like the shutter state, keep a table of
+    up to `table_size` replies already decoded, looked up before matching. Only
+    immutable values can be kept, the same object is returned for every lookup.
+    """
+
+    __slots__ = ("command", "pattern", "convert", "table_size", "_table", "_fullmatch")
+
+    def __init__(
+        self,
+        command: str,
+        pattern: str,
+        convert: Callable[..., Any],
+        table_size: int = 0,
+    ):
+        """
+        Args:
+            command (str): query command, e.g. "V"
+            pattern (str): regular expression matching the whole reply
+            convert (Callable[..., Any]): typed value from the groups of `pattern`
+            table_size (int): replies kept with their value, none if 0
+        """
+        self.command = command
+        self.pattern: Pattern[str] = re.compile(pattern)
+        self.convert = convert
+        self.table_size = table_size
+        self._table: Dict[str, Any] = {}
+        self._fullmatch = self.pattern.fullmatch
+
+    def decode(self, reply: str) -> Any:
+        """
+        Value of a reply, without termination characters.
+
+        Raises:
+            ValueError: raise error if the reply doesn't match the format
+        """
+        value = self._table.get(reply)
+        if value is not None:
+            return value
+        match = self._fullmatch(reply)
+        if match is None:
+            raise ValueError(
+                f"reply {reply!r} to {self.command} doesn't match"
+                f" {self.pattern.pattern!r}"
+            )
+        value = self.convert(*match.groups())
+        if len(self._table) < self.table_size:
+            self._table[reply] = value
+        return value
+
+    def matches(self, reply: str) -> bool:
+        """
+        Whether `reply` has the format of the replies to the command.
+        """
+        return reply in self._table or self._fullmatch(reply) is not None
+
+
+# codec per query command
+CODECS: Dict[str, Codec] = {}
+
+
+def register(codec: Codec) -> Codec:
+    """
+    Add `codec` to `CODECS` and return it.
+    """
+    CODECS[codec.command] = codec
+    return codec
+
+
+def matches(command: str, reply: str) -> bool:
+    """
+    Whether `reply` can be the reply to the query `command`. A reply to another
+    command means the stream of replies got out of step. Replies to commands without
+    a codec, e.g. set commands, always match.
+    """
+    codec = CODECS.get(command)
+    return codec is None or codec.matches(reply)
+
+
+def literal(text: str) -> str:
+    # runs of spaces pad fixed width fields, they match any amount of whitespace
+    parts = text.split()
+    if not parts:
+        return r"\s*"
+    return r"\s*" + r"\s*".join(re.escape(part) for part in parts) + r"\s*"
+
+
+def template_pattern(template: str, span: Tuple[int, int]) -> str:
+    """
+    Regular expression of a reply template like "voltage  ---- V", with the number at
+    `span`, the dashes.
+    """
+    return literal(template[: span[0]]) + NUMBER + literal(template[span[1] :])
+
+
+class TemplateCodec(Codec):
+    """
+    Codec of a fixed width reply template like "voltage  ---- V" with a single value at
+    `span`, the dashes. A reply with the text of the template around the value is
+    converted from the slice of the value, other replies are matched against the
+    pattern of the template, which allows any padding.
+    """
+
+    __slots__ = ("_start", "_end", "_prefix", "_suffix")
+
+    def __init__(
+        self,
+        command: str,
+        template: str,
+        span: Tuple[int, int],
+        convert: Callable[[str], Any],
+    ):
+        super().__init__(command, template_pattern(template, span), convert)
+        self._start, self._end = span
+        self._prefix = template[: span[0]]
+        self._suffix = template[span[1] :]
+
+    def decode(self, reply: str) -> Any:
+        if reply[: self._start] == self._prefix and reply[self._end :] == self._suffix:
+            try:
+                return self.convert(reply[self._start : self._end])
+            except ValueError:
+                # e.g. a value wider than its field, rejected below if it isn't
+                pass
+        return super().decode(reply)
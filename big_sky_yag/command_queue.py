@@ -0,0 +1,92 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+__all__ = ["CommandQueue"]
+
+
+class CommandQueue:
+    """
+    Thread-safe queue of (command, value) pairs for a worker thread.
+
+    Commands listed in `coalesce`, e.g. setpoints, are collapsed: putting one while
+    another of the same type is still pending replaces the pending value and moves it
+    to the end of the queue, so it is applied after the commands queued before it,
+    e.g. the coupled flashlamp voltage and energy. The time it was first queued is
+    kept. Urgent commands, e.g. stopping the laser, are served before all others.
+    """
+
+    def __init__(self, coalesce: Iterable[str] = ()):
+        """
+        Args:
+            coalesce (Iterable[str]): commands for which only the latest value is kept
+        """
+        self.coalesce = set(coalesce)
+        self._cond = threading.Condition()
+        self._urgent: Deque[List[Any]] = deque()
+        self._normal: Deque[List[Any]] = deque()
+        self._pending: Dict[str, List[Any]] = {}
+
+    def put(self, command: str, value: Any = None, urgent: bool = False) -> None:
+        """
+        Queue a command.
+
+        Args:
+            command (str): command type
+            value (Any): command value
+            urgent (bool): serve the command before all non-urgent ones
+        """
+        with self._cond:
+            if (entry := self._pending.get(command)) is not None:
+                (self._urgent if entry[2] else self._normal).remove(entry)
+                entry[1] = value
+                entry[2] = entry[2] or urgent
+                (self._urgent if entry[2] else self._normal).append(entry)
+                return
+
+            entry = [command, value, urgent, time.monotonic()]
+            if command in self.coalesce:
+                self._pending[command] = entry
+            (self._urgent if urgent else self._normal).append(entry)
+            self._cond.notify()
+
+    def _pop(self) -> List[Any]:
+        entry = (self._urgent or self._normal).popleft()
+        if self._pending.get(entry[0]) is entry:
+            del self._pending[entry[0]]
+        return entry
+
+    def get(
+        self, block: bool = True, timeout: Optional[float] = None
+    ) -> Tuple[str, Any, float]:
+        """
+        Take the next command, urgent ones first.
+
+        Args:
+            block (bool): wait for a command if the queue is empty
+            timeout (Optional[float]): maximum time to wait in seconds, forever if None
+
+        Raises:
+            queue.Empty: raise error if no command is available
+
+        Returns:
+            Tuple[str, Any, float]: command type, value, and time.monotonic() time the
+                                    command was first queued
+        """
+        with self._cond:
+            if block:
+                self._cond.wait_for(lambda: self._urgent or self._normal, timeout)
+            if not (self._urgent or self._normal):
+                raise queue.Empty
+            command, value, _, queued = self._pop()
+            return command, value, queued
+
+    def empty(self) -> bool:
+        with self._cond:
+            return not (self._urgent or self._normal)
+
+    def qsize(self) -> int:
+        with self._cond:
+            return len(self._urgent) + len(self._normal)
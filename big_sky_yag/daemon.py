@@ -0,0 +1,523 @@
+"""
+Headless service owning the connection to the laser. It polls the laser state into
+an in-memory cache and serves local clients over a TCP or Unix socket with a JSON
+lines protocol, e.g.
+
+    python -m big_sky_yag.daemon ASRL3::INSTR --listen tcp://127.0.0.1:5025
+
+Reads are answered from the cache; only writes and the scheduled polls go to the
+laser. Every request is one JSON object per line with an `op` and an optional `id`
+echoed in the response:
+
+    {"id": 1, "op": "get", "fields": ["flashlamp_voltage"]}
+    {"id": 2, "op": "set", "target": "flashlamp", "name": "voltage", "value": 900}
+    {"id": 3, "op": "call", "target": "qswitch", "method": "start"}
+    {"id": 4, "op": "write", "command": "WOR"}
+    {"id": 5, "op": "refresh", "fields": ["laser_status"]}
+
+Responses are {"id": ..., "result": ...} or {"id": ..., "error": "..."}.
+"""
+
+import argparse
+import configparser
+import dataclasses
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+from concurrent.futures import Future
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from .attributes import FloatProperty, IntProperty
+from .device import BigSkyYag
+from .scheduler import PollScheduler
+from .snapshot import FIELDS, LaserSnapshot
+
+if TYPE_CHECKING:
+    from .state_board import StateBoard
+
+__all__ = ["YagDaemon", "DaemonClient"]
+
+# methods clients may call, per component
+METHODS = {
+    "yag": ("save",),
+    "flashlamp": ("activate", "stop", "simmer", "user_counter_reset"),
+    "qswitch": ("on", "off", "start", "stop", "single", "user_counter_reset"),
+}
+
+
+def to_json(value: Any) -> Any:
+    """
+    Turn a parsed device value into JSON types, enums become their name and dataclasses
+    a dict.
+    """
+    if isinstance(value, Enum):
+        return value.name
+    if dataclasses.is_dataclass(value):
+        return dict((name, to_json(v)) for name, v in vars(value).items())
+    return value
+
+
+def coerce(owner: type, name: str, value: Any) -> Any:
+    """
+    `value` decoded from JSON in the type of attribute `name` of `owner`. JSON numbers
+    don't tell 15 from 15.0, so integers set to a float property become floats and
+    whole floats set to an integer property become integers.
+    """
+    prop = getattr(owner, name, None)
+    if isinstance(value, bool):
+        return value
+    if isinstance(prop, FloatProperty) and isinstance(value, int):
+        return float(value)
+    if (
+        isinstance(prop, IntProperty)
+        and isinstance(value, float)
+        and value.is_integer()
+    ):
+        return int(value)
+    return value
+
+
+def parse_address(address: str) -> Tuple[int, Any]:
+    """
+    Socket family and address of 'tcp://<host>:<port>' or 'unix://<path>'.
+
+    Raises:
+        ValueError: raise error if the address is malformed, or a Unix socket on a
+                    platform without them
+    """
+    if address.startswith("unix://"):
+        if not hasattr(socket, "AF_UNIX") or ThreadingUnixServer is None:
+            raise ValueError(
+                "Unix sockets are not supported on this platform, use "
+                f"tcp://<host>:<port> instead of {address}"
+            )
+        return socket.AF_UNIX, address[len("unix://") :]
+    elif address.startswith("tcp://"):
+        host, _, port = address[len("tcp://") :].rpartition(":")
+        return socket.AF_INET, (host, int(port))
+    raise ValueError(
+        f"address should be tcp://<host>:<port> or unix://<path>, not {address}"
+    )
+
+
+class YagDaemon:
+    """
+    Device loop of a laser, with a cache of the latest value of every polled field.
+    Client requests touching the laser are run on the device thread between poll
+    transactions.
+    """
+
+    def __init__(
+        self,
+        yag: BigSkyYag,
+        intervals: Dict[str, Optional[float]],
+        chunk_size: int = 4,
+        request_timeout: float = 10.0,
+        board: Optional["StateBoard"] = None,
+        retry_interval: float = 1.0,
+    ):
+        """
+        Args:
+            yag (BigSkyYag): connected laser
+            intervals (Dict[str, Optional[float]]): poll interval per snapshot field in
+                                                    seconds, None to poll it once
+            chunk_size (int): fields polled in one transaction
+            request_timeout (float): time a client request waits for the device thread
+            board (Optional[StateBoard]): also publish every poll to this state board
+            retry_interval (float): time until a field polled once is read again after
+                                    it failed, see `PollScheduler`
+        """
+        self.yag = yag
+        self.scheduler = PollScheduler(intervals, retry_interval)
+        self.chunk_size = chunk_size
+        self.request_timeout = request_timeout
+        self.board = board
+        self._jobs: (
+            "queue.Queue[Optional[Tuple[Callable[[BigSkyYag], Any], Future, bool]]]"
+        ) = queue.Queue()
+        # field -> (time.time() of the poll, value, error message)
+        self._state: Dict[str, Tuple[float, Any, Optional[str]]] = {}
+        self._state_lock = threading.Lock()
+        self._running = False
+        self._servers: List[socketserver.BaseServer] = []
+
+    def state(
+        self, fields: Optional[Iterable[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Latest polled value of `fields`, all polled fields if None, with the time it
+        was read and the error if reading it failed.
+        """
+        with self._state_lock:
+            names = list(self._state) if fields is None else list(fields)
+            result = {}
+            for name in names:
+                if name not in FIELDS:
+                    raise KeyError(f"unknown field {name}")
+                t, value, error = self._state.get(name, (None, None, "not polled yet"))
+                result[name] = {"value": value, "time": t, "error": error}
+            return result
+
+    def submit(
+        self, job: Callable[[BigSkyYag], Any], refresh: bool = True
+    ) -> "Future[Any]":
+        """
+        Run `job(yag)` on the device thread.
+
+        Args:
+            job (Callable[[BigSkyYag], Any]): function of the laser
+            refresh (bool): poll all fields after the job, because it may have changed
+                            any of them
+        """
+        future: "Future[Any]" = Future()
+        self._jobs.put((job, future, refresh))
+        return future
+
+    def _update(self, snapshot: LaserSnapshot) -> None:
+        with self._state_lock:
+            for name in snapshot.fields:
+                if name in snapshot.errors:
+                    self._state[name] = (
+                        snapshot.time,
+                        None,
+                        str(snapshot.errors[name]),
+                    )
+                else:
+                    self._state[name] = (
+                        snapshot.time,
+                        to_json(getattr(snapshot, name)),
+                        None,
+                    )
+        if self.board is not None:
+            self.board.publish(snapshot)
+
+    def _run_job(self, item: Tuple[Callable[[BigSkyYag], Any], Future, bool]) -> None:
+        job, future, refresh = item
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(job(self.yag))
+        except Exception as err:
+            future.set_exception(err)
+        if refresh:
+            self.scheduler.refresh()
+
+    def _run_jobs(self) -> None:
+        while True:
+            try:
+                item = self._jobs.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                self._running = False
+                return
+            self._run_job(item)
+
+    def run(self) -> None:
+        """
+        Run the device loop until `stop` is called.
+        """
+        self._running = True
+        while self._running:
+            self._run_jobs()
+            due = self.scheduler.due()
+            snapshots = []
+            for i in range(0, len(due), self.chunk_size):
+                self._run_jobs()
+                if not self._running:
+                    break
+                chunk = due[i : i + self.chunk_size]
+                try:
+                    snapshot = self.yag.snapshot(chunk)
+                except Exception as err:
+                    snapshot = LaserSnapshot({}, dict((name, err) for name in chunk))
+                self.scheduler.mark(
+                    [name for name in chunk if name not in snapshot.errors]
+                )
+                self.scheduler.retry(snapshot.errors)
+                self._update(snapshot)
+                snapshots.append(snapshot)
+            if snapshots:
+                self.polled(snapshots)
+
+            # sleep until the next field is due or a request arrives
+            timeout = self.scheduler.next_deadline() - time.monotonic()
+            if self._running and timeout > 0:
+                try:
+                    item = self._jobs.get(timeout=min(timeout, 3600))
+                except queue.Empty:
+                    continue
+                if item is None:
+                    break
+                self._run_job(item)
+
+    def polled(self, snapshots: List[LaserSnapshot]) -> None:
+        """
+        Called on the device thread after every poll cycle with the snapshot of each
+        of its transactions, e.g. to show them all at once in a GUI. Does nothing by
+        default.
+        """
+
+    def stop(self) -> None:
+        """
+        Stop serving clients and the device loop.
+        """
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+            if isinstance(server.server_address, str):
+                # Unix socket file
+                os.unlink(server.server_address)
+        self._servers.clear()
+        self._jobs.put(None)
+
+    def serve(self, address: str) -> socketserver.BaseServer:
+        """
+        Serve clients on `address`, 'tcp://<host>:<port>' or 'unix://<path>', from a
+        background thread.
+        """
+        family, server_address = parse_address(address)
+        server_class = (
+            ThreadingUnixServer
+            if family == socket.AF_UNIX
+            else socketserver.ThreadingTCPServer
+        )
+        server_class.allow_reuse_address = True
+        server_class.daemon_threads = True
+        server = server_class(server_address, self._handler())
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self._servers.append(server)
+        return server
+
+    def handle(self, request: Dict[str, Any]) -> Any:
+        """
+        Execute a client request and return its result.
+        """
+        op = request.get("op")
+        if op == "get":
+            return self.state(request.get("fields"))
+        elif op == "refresh":
+            fields = request.get("fields")
+            for name in fields or ():
+                if name not in FIELDS:
+                    raise KeyError(f"unknown field {name}")
+            return self._wait(
+                self.submit(lambda yag: self.scheduler.refresh(fields), refresh=False)
+            )
+        elif op == "set":
+            component = self._component(request["target"])
+            name, value = request["name"], request["value"]
+
+            def job(yag: BigSkyYag) -> Any:
+                obj = component(yag)
+                return obj.set(name, coerce(type(obj), name, value))
+
+            return to_json(self._wait(self.submit(job)))
+        elif op == "call":
+            target, method = request["target"], request["method"]
+            if method not in METHODS.get(target, ()):
+                raise ValueError(f"{target}.{method} can't be called")
+            component = self._component(target)
+            return to_json(
+                self._wait(self.submit(lambda yag: getattr(component(yag), method)()))
+            )
+        elif op == "write":
+            command = request["command"]
+            return self._wait(self.submit(lambda yag: yag.write(command)))
+        raise ValueError(f"unknown op {op}")
+
+    def _wait(self, future: "Future[Any]") -> Any:
+        return future.result(timeout=self.request_timeout)
+
+    @staticmethod
+    def _component(target: str) -> Callable[[BigSkyYag], Any]:
+        if target == "yag":
+            return lambda yag: yag
+        elif target in ("flashlamp", "qswitch"):
+            return lambda yag: getattr(yag, target)
+        raise ValueError(f"unknown target {target}")
+
+    def _handler(self) -> type:
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for line in self.rfile:
+                    if not line.strip():
+                        continue
+                    request: Dict[str, Any] = {}
+                    try:
+                        request = json.loads(line)
+                        response = {
+                            "id": request.get("id"),
+                            "result": daemon.handle(request),
+                        }
+                    except Exception as err:
+                        response = {
+                            "id": request.get("id"),
+                            "error": f"{type(err).__name__}: {err}",
+                        }
+                    self.wfile.write(json.dumps(response).encode() + b"\n")
+
+        return Handler
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    ThreadingUnixServer = socketserver.ThreadingUnixStreamServer
+else:  # Windows
+    ThreadingUnixServer = None
+
+
+class DaemonClient:
+    """
+    Client of a `YagDaemon`, e.g. `DaemonClient("tcp://127.0.0.1:5025")`. Values are
+    returned in their JSON form, enums by name and dataclasses as dicts.
+    """
+
+    def __init__(self, address: str, timeout: float = 15.0):
+        """
+        Args:
+            address (str): 'tcp://<host>:<port>' or 'unix://<path>'
+            timeout (float): time to wait for a response in seconds
+        """
+        family, server_address = parse_address(address)
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(server_address)
+        self._file = self.socket.makefile("rwb")
+        self._lock = threading.Lock()
+        self._id = 0
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+        self.socket.close()
+
+    def request(self, op: str, **params) -> Any:
+        """
+        Send a request and return its result.
+
+        Raises:
+            RuntimeError: raise error if the daemon failed to execute the request
+        """
+        with self._lock:
+            self._id += 1
+            self._file.write(
+                json.dumps({"id": self._id, "op": op, **params}).encode() + b"\n"
+            )
+            self._file.flush()
+            response = json.loads(self._file.readline())
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    def get(self, *fields: str) -> Dict[str, Any]:
+        """
+        Latest values of `fields`, all polled fields if none are given.
+        """
+        state = self.request("get", fields=list(fields) if fields else None)
+        return dict((name, entry["value"]) for name, entry in state.items())
+
+    def state(self, *fields: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Latest values of `fields` with the time they were read and read errors.
+        """
+        return self.request("get", fields=list(fields) if fields else None)
+
+    def set(self, target: str, name: str, value: Any) -> Any:
+        """
+        Set attribute `name` of `target`, 'yag', 'flashlamp' or 'qswitch', and return
+        the confirmed value.
+        """
+        return self.request("set", target=target, name=name, value=value)
+
+    def call(self, target: str, method: str) -> Any:
+        return self.request("call", target=target, method=method)
+
+    def write(self, command: str) -> str:
+        return self.request("write", command=command)
+
+    def refresh(self, *fields: str) -> None:
+        """
+        Poll `fields` as soon as possible, all fields if none are given.
+        """
+        self.request("refresh", fields=list(fields) if fields else None)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a Big Sky YAG to local clients."
+    )
+    parser.add_argument(
+        "resource_name", help="resource name, 'emulator' for the emulator"
+    )
+    parser.add_argument(
+        "--listen",
+        default="tcp://127.0.0.1:5025",
+        help="tcp://<host>:<port> or unix://<path>",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=1.0, help="default poll interval in s"
+    )
+    parser.add_argument(
+        "--config",
+        help="ini file whose [polling] section sets poll intervals per field",
+    )
+    parser.add_argument(
+        "--cache-max-age", type=float, default=0.2, help="driver reply cache in s"
+    )
+    parser.add_argument(
+        "--state-board",
+        help="also publish the state to the shared memory segment with this name",
+    )
+    args = parser.parse_args()
+
+    intervals: Dict[str, Optional[float]] = dict(
+        (name, args.interval) for name in FIELDS
+    )
+    intervals["serial_number"] = None
+    if args.config:
+        config = configparser.ConfigParser()
+        config.read(args.config)
+        for name, interval in (
+            config.items("polling") if config.has_section("polling") else ()
+        ):
+            intervals[name] = None if interval == "once" else float(interval)
+
+    if args.resource_name == "emulator":
+        from .emulator import YagEmulator
+
+        yag = BigSkyYag(instrument=YagEmulator(), cache_max_age=args.cache_max_age)
+    else:
+        yag = BigSkyYag(args.resource_name, cache_max_age=args.cache_max_age)
+
+    board = None
+    if args.state_board:
+        from .state_board import StateBoard
+
+        board = StateBoard.create(args.state_board)
+
+    daemon = YagDaemon(yag, intervals, board=board, retry_interval=args.interval)
+    daemon.serve(args.listen)
+    try:
+        daemon.run()
+    except KeyboardInterrupt:
+        daemon.stop()
+    finally:
+        yag.close()
+        if board is not None:
+            board.close()
+
+
+if __name__ == "__main__":
+    main()
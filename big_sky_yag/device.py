@@ -1,10 +1,46 @@
-from typing import Any, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Optional, Sequence, Union
 import pyvisa
 
-from .attributes import Flashlamp, LaserStatus, QSwitch, Status, Trigger, FloatProperty, IntProperty
+from .attributes import (
+    Flashlamp,
+    LaserStatus,
+    QSwitch,
+    FloatProperty,
+    IntProperty,
+    encode_switch,
+    parse_echo,
+    parse_laser_status,
+    parse_pump,
+    parse_serial_number,
+    parse_shutter,
+    parse_shutter_strict,
+    set_confirmed,
+)
+from .cache import ReplyCache
+from .framing import FrameReader
+from .transports import open_instrument
+
+if TYPE_CHECKING:
+    from .pool import Lease, SessionPool
+    from .snapshot import LaserSnapshot
 
 __all__ = ["BigSkyYag"]
 
+# every reply is 15 characters followed by \r\n
+REPLY_LENGTH = 17
+
+
+def address(command: str, serial_number: Optional[int] = None) -> str:
+    """
+    Prefix a command with the device address, `>` or `$<serial number>`.
+    """
+    if serial_number is None:
+        return f">{command}"
+    elif isinstance(serial_number, int):
+        return f"${serial_number}{command}"
+    else:
+        raise ValueError(f"Serial number is not valid, {serial_number}")
+
 
 class BigSkyYag:
     temperature_cooling_group = IntProperty(
@@ -15,41 +51,173 @@ class BigSkyYag:
 
     def __init__(
         self,
-        resource_name: str,
+        resource_name: Optional[str] = None,
         baud_rate: int = 9600,
         serial_number: Optional[int] = None,
+        cache_max_age: Optional[float] = None,
+        instrument: Any = None,
+        pool: Optional["SessionPool"] = None,
     ):
-        self.instrument = pyvisa.ResourceManager().open_resource(
-            resource_name=resource_name, baud_rate=baud_rate
-        )
+        """
+        Args:
+            resource_name (Optional[str]): VISA resource name, e.g. 'ASRL3::INSTR',
+                                           'serial://<port>' to bypass VISA or
+                                           'tcp://<host>:<port>' for a terminal
+                                           server, see `transports.open_instrument`
+            baud_rate (int): serial baud rate
+            serial_number (Optional[int]): serial number to address the device with
+            cache_max_age (Optional[float]): serve repeated queries from a cache for
+                                             this many seconds, None disables caching
+            instrument (Any): already opened resource used instead of opening
+                              `resource_name`, e.g. an `emulator.YagEmulator`
+            pool (Optional[SessionPool]): lease the session of `resource_name` from
+                                          this pool instead of opening it, e.g.
+                                          `pool.POOL`
+
+        Raises:
+            ValueError: raise error if neither `resource_name` nor `instrument` is given
+        """
+        self._lease: Optional["Lease"] = None
+        if instrument is not None:
+            self.instrument = instrument
+        elif resource_name is not None and pool is not None:
+            self._lease = pool.acquire(resource_name, baud_rate=baud_rate)
+            self.instrument = self._lease.instrument
+        elif resource_name is not None:
+            self.instrument = open_instrument(resource_name, baud_rate=baud_rate)
+        else:
+            raise ValueError("either resource_name or instrument is required")
         self._serial_number = serial_number
+        self.cache = ReplyCache(cache_max_age)
+        self._frames = FrameReader(self.instrument, max_frame_length=4 * REPLY_LENGTH)
         self.flashlamp = Flashlamp(self)
         self.qswitch = QSwitch(self)
 
+    def close(self, discard: bool = False) -> None:
+        """
+        Close the connection, or give the session back to the pool it was leased from.
+
+        Args:
+            discard (bool): close a pooled session instead of keeping it open
+        """
+        if self._lease is not None:
+            self._lease.release(discard)
+        else:
+            self.instrument.close()
+
     def read(self) -> str:
-        message = self.instrument.read_bytes(17).decode()
-        return message.strip("\r\n")
+        return self._frames.read_frame()
+
+    def _send(self, command: str) -> None:
+        if self._frames.desynchronized:
+            self._frames.resynchronize()
+        self.instrument.write(self._address(command))
+
+    def _begin(self) -> None:
+        # frames left over from before the transaction, e.g. an unsolicited line or the
+        # late reply to a command that timed out, would be read as its replies
+        self._frames.resynchronize()
+
+    def _address(self, command: str) -> str:
+        return address(command, self._serial_number)
 
     def query(self, query: str) -> str:
-        if self._serial_number is None:
-            _query = f">{query}"
-        elif isinstance(self._serial_number, int):
-            _query = f"${self._serial_number}{query}"
-        else:
-            raise ValueError(f"Serial number is not valid, {self._serial_number}")
-        self.instrument.write(_query)
-        return self.read()
-
-    def write(self, command: str) -> str:
-        if self._serial_number is None:
-            _command = f">{command}"
-        elif isinstance(self._serial_number, int):
-            _command = f"${self._serial_number}{command}"
-        else:
-            raise ValueError(f"Serial number is not valid, {self._serial_number}")
+        if (reply := self.cache.get(query)) is not None:
+            return reply
+        self._begin()
+        self._send(query)
+        reply = self._frames.read_reply(query)
+        if not self._frames.desynchronized:
+            self.cache.put(query, reply)
+        return reply
+
+    def query_many(self, queries: Sequence[str]) -> Dict[str, Union[str, Exception]]:
+        """
+        Query several commands in one pipelined transaction. All commands are written
+        back-to-back and the replies are drained from the receive buffer afterwards,
+        instead of waiting for the reply to each command before sending the next one.
+
+        Args:
+            queries (Sequence[str]): commands to query, e.g. ["QSM", "W", "QSF"]
+
+        Returns:
+            Dict[str, Union[str, Exception]]: reply to each command, or the exception
+                                              raised while reading that reply
+        """
+        replies: Dict[str, Union[str, Exception]] = {}
+        pending = []
+        for query in queries:
+            if (reply := self.cache.get(query)) is not None:
+                replies[query] = reply
+            elif query not in pending:
+                pending.append(query)
+
+        if pending:
+            self._begin()
+        for query in pending:
+            self._send(query)
+
+        for i, query in enumerate(pending):
+            try:
+                replies[query] = reply = self._frames.read_reply(query)
+            except (pyvisa.errors.VisaIOError, OSError) as err:
+                # the remaining replies are lost, they are discarded before the next transaction
+                replies.update((_query, err) for _query in pending[i:])
+                break
+            if not self._frames.desynchronized:
+                self.cache.put(query, reply)
+        return dict((query, replies[query]) for query in queries)
 
-        self.instrument.write(_command)
-        return self.read()
+    def write(self, command: str, invalidates: Optional[Sequence[str]] = None) -> str:
+        """
+        Send a command and return the device echo.
+
+        Args:
+            command (str): command to send
+            invalidates (Optional[Sequence[str]]): queries whose cached replies are
+                                                   changed by the command, None if
+                                                   it may change any of them
+
+        Returns:
+            str: device echo
+        """
+        try:
+            self._begin()
+            self._send(command)
+            return self.read()
+        finally:
+            if invalidates is None:
+                self.cache.invalidate()
+            else:
+                self.cache.invalidate(*invalidates)
+
+    def set(self, name: str, value: Any) -> Any:
+        """
+        Set attribute `name` and return the value confirmed by the device echo.
+
+        Args:
+            name (str): attribute name, e.g. 'pump'
+            value (Any): value to set
+
+        Returns:
+            Any: confirmed value
+        """
+        return set_confirmed(self, name, value)
+
+    def snapshot(self, fields: Optional[Iterable[str]] = None) -> "LaserSnapshot":
+        """
+        Read the laser state in a single pipelined transaction.
+
+        Args:
+            fields (Optional[Iterable[str]]): fields to read, see `snapshot.FIELDS`,
+                                              all fields if None
+
+        Returns:
+            LaserSnapshot: immutable record of the laser state
+        """
+        from .snapshot import LaserSnapshot
+
+        return LaserSnapshot.read(self, fields)
 
     def save(self):
         """
@@ -65,7 +233,7 @@ class BigSkyYag:
         Returns:
             str: serial number
         """
-        return self.query("SN").replace("s/number", "").strip()
+        return parse_serial_number(self.query("SN"))
 
     @property
     def shutter(self) -> bool:
@@ -75,12 +243,10 @@ class BigSkyYag:
         Returns:
             bool: shutter state
         """
-        shutter = self.query("R")
-        shutter = shutter.strip("shutter ")
-        return True if shutter == "opened" else False
+        return parse_shutter(self.query("R"))
 
     @shutter.setter
-    def shutter(self, state: bool):
+    def shutter(self, state: bool) -> bool:
         """
         Open or close the shutter, with open (True) or close (False)
 
@@ -89,10 +255,12 @@ class BigSkyYag:
 
         Raises:
             TypeError: raise error if state is not boolean
+
+        Returns:
+            bool: confirmed shutter state
         """
-        if not isinstance(state, bool):
-            raise TypeError(f"state not boolean but {type(state)}")
-        self.write(f"R{state:b}")
+        echo = self.write(encode_switch("R", state), invalidates=("R", "IQ", "WOR"))
+        return parse_echo(parse_shutter_strict, echo, lambda: self.query("R"))
 
     @property
     def pump(self) -> bool:
@@ -102,12 +270,10 @@ class BigSkyYag:
         Returns:
             bool: True if on, False if off
         """
-        pump = self.query("P")
-        pump = pump.strip("CG pump")
-        return bool(int(pump))
+        return parse_pump(self.query("P"))
 
     @pump.setter
-    def pump(self, state: bool):
+    def pump(self, state: bool) -> bool:
         """
         Set the pump state, either on (True) or off (False)
 
@@ -116,29 +282,13 @@ class BigSkyYag:
 
         Raises:
             Type: raise error if state is not boolean
+
+        Returns:
+            bool: confirmed pump state
         """
-        if not isinstance(state, bool):
-            raise TypeError(f"state not boolean but {type(state)}")
-        self.write(f"P{state:b}")
+        echo = self.write(encode_switch("P", state), invalidates=("P", "IF", "WOR"))
+        return parse_echo(parse_pump, echo, lambda: self.query("P"))
 
     @property
     def laser_status(self) -> LaserStatus:
-        status_string = self.query("WOR")
-        status_ints = [int(v) for v in status_string.split(" ")[1::2]]
-        args: List[Any] = []
-
-        # interlock
-        args.append(True if status_ints[0] == 0 else False)
-
-        # flashlamp
-        args.append(Status(status_ints[1] % 4))
-        args.append(Trigger.INTERNAL if status_ints[1] <= 3 else Trigger.EXTERNAL)
-
-        # simmer
-        args.append(True if status_ints[2] else False)
-
-        # q-switch
-        args.append(Status(status_ints[3] % 4))
-        args.append(Trigger.INTERNAL if status_ints[3] <= 3 else Trigger.EXTERNAL)
-
-        return LaserStatus(*args)
+        return parse_laser_status(self.query("WOR"))
@@ -0,0 +1,473 @@
+import math
+import re
+import socket
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import pyvisa
+
+from .attributes import Flashlamp, FloatProperty, Property, QSwitch, QSwitchMode, Status
+from .device import REPLY_LENGTH, BigSkyYag
+from .interlock import QSwitchInterlock
+
+__all__ = ["YagEmulator", "EmulatorBus", "EmulatorServer"]
+
+# properties whose replies are generated from their `ret_string` templates
+PROPERTIES: Dict[str, Property] = dict(
+    (attr.command, attr)
+    for cls in (BigSkyYag, Flashlamp, QSwitch)
+    for attr in vars(cls).values()
+    if isinstance(attr, Property)
+)
+
+# commands without a `Property`, and commands without a value
+COMMANDS = (*PROPERTIES, "LPM", "QSM", "QOF", "IF", "IF2", "IQ", "SN", "R", "P", "WOR")
+ACTIONS = ("A", "S", "M", "PQ", "SQ", "OQ", "SAV")
+
+# longest command names first, e.g. IF2 is not IF with value 2
+COMMAND_REGEX = re.compile(
+    r"^(?:>|\$(\d+))("
+    + "|".join(sorted(COMMANDS + ACTIONS, key=len, reverse=True))
+    + r")(\d*)$"
+)
+
+
+class YagEmulator:
+    """
+    Software stand-in for a Big Sky YAG on a serial port, implementing the subset of
+    the pyvisa serial resource interface used by `BigSkyYag`, e.g.
+    `BigSkyYag(instrument=YagEmulator())`.
+
+    Replies have the fixed width format of the real device. They become readable after
+    the command and the reply went over the wire at `baud_rate`, plus the firmware
+    `turnaround` time, so the emulator also models the timing of the device.
+    """
+
+    def __init__(
+        self,
+        serial_number: int = 184,
+        baud_rate: Optional[int] = 9600,
+        turnaround: float = 0.0,
+        timeout: float = 2000,
+        droop: float = 0.0,
+    ):
+        """
+        Args:
+            serial_number (int): serial number the emulator answers to with `$<serial>`
+            baud_rate (Optional[int]): serial baud rate, None transfers instantly
+            turnaround (float): firmware time between receiving a command and starting
+                                the reply, in seconds
+            timeout (float): read timeout in ms, like `pyvisa` resources
+            droop (float): capacitor voltage drop per flashlamp shot in V, recharged
+                           linearly until the next shot, seen by the VT command
+        """
+        self.serial_number = serial_number
+        self.droop = droop
+        self.baud_rate = baud_rate
+        self.turnaround = turnaround
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # replies as (time.monotonic() time their first byte arrives, bytes)
+        self._output: List[Tuple[float, bytes]] = []
+        self._rx_free = 0.0
+        self._tx_free = 0.0
+        self._closed = False
+
+        # device state, values of `PROPERTIES` keyed by command
+        self.values: Dict[str, float] = {
+            "V": 900,
+            "VA": 0,
+            "VT": 0,
+            "ENE": 0.0,
+            "CAP": 30.0,
+            "F": 10.0,
+            "C": 0,
+            "UC": 0,
+            "QSF": 1,
+            "QSP": 10,
+            "CQ": 0,
+            "UCQ": 0,
+            "W": 140,
+            "QSW": 0,
+            "CG": 25,
+        }
+        self._set("V", 900)
+        self.trigger = 0
+        self.qswitch_mode = QSwitchMode.AUTO
+        self.qswitch_on = False
+        self.flashlamp_status = Status.STOP
+        self.qswitch_status = Status.STOP
+        self.simmer = False
+        self.shutter = False
+        self.pump = False
+        # interlock bits set on top of those following from the state, e.g. 1 << 6
+        # for an open cover
+        self.if1 = 0
+        self.if2 = 0
+        self.iq = 0
+        self._fired = 0.0
+        self._last = time.monotonic()
+
+        self._replies: Dict[str, Callable[[], str]] = {
+            "LPM": lambda: f"LP synch : {self.trigger:>4}",
+            "QSM": lambda: f"QS mode : {int(self.qswitch_mode):>5}",
+            "QOF": lambda: f"QS at run {int(self.qswitch_on):>5}",
+            "IF": lambda: self._interlock_reply("IF", self.if1 | (not self.pump)),
+            "IF2": lambda: self._interlock_reply("IF2", self.if2),
+            "IQ": lambda: self._interlock_reply(
+                "IQ",
+                self.iq
+                | (not self.shutter) << QSwitchInterlock.SHUTTER_CLOSED
+                | (not self.qswitch_on) << QSwitchInterlock.EMISSION_INHIBITED,
+            ),
+            "SN": lambda: f"s/number {self.serial_number:>6}",
+            "R": lambda: f"shutter  {'opened' if self.shutter else 'closed'}",
+            "P": lambda: f"CG pump {int(self.pump):>7}",
+            "WOR": self._status_reply,
+        }
+
+    @property
+    def bytes_in_buffer(self) -> int:
+        with self._lock:
+            return self._available(time.monotonic())
+
+    def _byte_time(self) -> float:
+        # 8 data bits, a start and a stop bit
+        return 10 / self.baud_rate if self.baud_rate else 0.0
+
+    def _available(self, now: float) -> int:
+        byte_time = self._byte_time()
+        available = 0
+        for t, data in self._output:
+            if t > now:
+                break
+            if byte_time == 0:
+                available += len(data)
+            else:
+                available += min(len(data), int((now - t) / byte_time))
+        return available
+
+    def write(self, message: str) -> int:
+        """
+        Receive a command, e.g. '>V900' or '$184WOR', and queue its reply.
+        """
+        with self._lock:
+            if self._closed:
+                raise pyvisa.errors.InvalidSession()
+            now = time.monotonic()
+            command = message.strip()
+            byte_time = self._byte_time()
+            self._rx_free = max(now, self._rx_free) + (len(command) + 2) * byte_time
+
+            reply = self._execute(command)
+            if reply is not None:
+                start = max(self._rx_free + self.turnaround, self._tx_free)
+                self._tx_free = start + REPLY_LENGTH * byte_time
+                data = f"{reply:<15.15}\r\n".encode("ascii")
+                self._output.append((start, data))
+            return len(message)
+
+    def read_bytes(self, count: int) -> bytes:
+        """
+        Read `count` bytes, waiting until they arrived.
+
+        Raises:
+            pyvisa.errors.VisaIOError: raise error if they don't arrive within `timeout`
+        """
+        with self._lock:
+            now = time.monotonic()
+            deadline = now + self.timeout / 1000
+            arrival = self._arrival(count)
+        if arrival > deadline:
+            time.sleep(max(0.0, deadline - now))
+            raise pyvisa.errors.VisaIOError(pyvisa.constants.StatusCode.error_timeout)
+        if arrival > now:
+            time.sleep(arrival - now)
+
+        with self._lock:
+            data = bytearray()
+            while len(data) < count:
+                t, chunk = self._output.pop(0)
+                take = count - len(data)
+                data += chunk[:take]
+                if take < len(chunk):
+                    self._output.insert(0, (t + take * self._byte_time(), chunk[take:]))
+            return bytes(data)
+
+    def _arrival(self, count: int) -> float:
+        # time at which the first `count` bytes of the output are available
+        byte_time = self._byte_time()
+        for t, data in self._output:
+            if count <= len(data):
+                return t + count * byte_time
+            count -= len(data)
+        return math.inf
+
+    def clear(self) -> None:
+        with self._lock:
+            self._output.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._output.clear()
+            self._closed = True
+
+    def _execute(self, command: str) -> Optional[str]:
+        match = COMMAND_REGEX.match(command)
+        if match is None:
+            return "unknown command"
+        serial_number, name, value = match.groups()
+        if serial_number is not None and int(serial_number) != self.serial_number:
+            # addressed to another device on the bus
+            return None
+
+        self._advance()
+        if name in ACTIONS:
+            return self._action(name)
+        if value:
+            if not self._set(name, int(value)):
+                return "unknown command"
+        if name in PROPERTIES:
+            return self._property_reply(PROPERTIES[name])
+        return self._replies[name]()
+
+    def _set(self, name: str, value: int) -> bool:
+        if name in ("V", "ENE", "CAP", "F", "QSF", "QSP", "W"):
+            prop = PROPERTIES[name]
+            if isinstance(prop, FloatProperty):
+                self.values[name] = value / 10**prop._decimals
+            else:
+                self.values[name] = value
+            if name in ("V", "CAP"):
+                self.values["ENE"] = round(
+                    0.5 * self.values["CAP"] * 1e-6 * self.values["V"] ** 2, 1
+                )
+            elif name == "ENE":
+                self.values["V"] = round(
+                    math.sqrt(2 * self.values["ENE"] / (self.values["CAP"] * 1e-6))
+                )
+        elif name in ("UC", "UCQ") and value == 0:
+            self.values[name] = 0
+        elif name == "LPM" and value in (0, 1):
+            self.trigger = value
+        elif name == "QSM" and value in (0, 1, 2):
+            self.qswitch_mode = QSwitchMode(value)
+        elif name == "QOF" and value in (0, 1):
+            self.qswitch_on = bool(value)
+            if not self.qswitch_on:
+                self.qswitch_status = Status.STOP
+        elif name == "R" and value in (0, 1):
+            self.shutter = bool(value)
+        elif name == "P" and value in (0, 1):
+            self.pump = bool(value)
+            if not self.pump:
+                self.flashlamp_status = Status.STOP
+                self.simmer = False
+        else:
+            return False
+        return True
+
+    def _action(self, name: str) -> str:
+        if name == "A" and self.pump:
+            self.simmer = True
+            self.flashlamp_status = Status.START
+        elif name == "S":
+            self.flashlamp_status = Status.STOP
+        elif name == "M" and self.pump:
+            self.simmer = True
+        elif name == "PQ" and self.qswitch_on:
+            self.qswitch_status = Status.START
+        elif name == "OQ" and self.qswitch_on:
+            self.qswitch_status = Status.SINGLE
+        elif name == "SQ":
+            self.qswitch_status = Status.STOP
+        elif name == "SAV":
+            return "saved"
+        return self._status_reply()
+
+    def _advance(self) -> None:
+        # count the shots fired since the last command
+        now = time.monotonic()
+        if self.flashlamp_status == Status.START and self.trigger == 0:
+            self._fired += (now - self._last) * self.values["F"]
+        self._last = now
+        shots = int(self._fired)
+        self._fired -= shots
+        self.values["C"] += shots
+        self.values["UC"] += shots
+        if self.qswitch_status == Status.START and self.shutter:
+            qswitch_shots = shots // int(self.values["QSF"])
+            self.values["CQ"] += qswitch_shots
+            self.values["UCQ"] += qswitch_shots
+
+        charged = self.simmer or self.flashlamp_status != Status.STOP
+        self.values["VA"] = self.values["V"] if charged else 0
+        self.values["VT"] = self.values["V"] if charged else 0
+        if self.flashlamp_status == Status.START and self.trigger == 0:
+            # self._fired is the fraction of the shot period since the last shot
+            self.values["VT"] -= round(self.droop * (1 - self._fired))
+
+    def _property_reply(self, prop: Property) -> str:
+        template, (start, end) = prop._ret_string, prop._span
+        width = end - start
+        value = self.values[prop.command]
+        if isinstance(prop, FloatProperty):
+            field = f"{value:>{width}.{prop._decimals}f}"
+        else:
+            field = f"{int(value):>{width}d}"
+        return template[:start] + field[-width:] + template[end:]
+
+    def _interlock_reply(self, name: str, bits: int) -> str:
+        # bit 0 first, in two groups of four
+        bits_str = "".join(str(bits >> i & 1) for i in range(8))
+        return f"{name:<6}{bits_str[:4]} {bits_str[4:]}"
+
+    def _status_reply(self) -> str:
+        interlock = int(bool(self.if1 or self.if2 or not self.pump))
+        flashlamp = self.flashlamp_status + 4 * self.trigger
+        qswitch = self.qswitch_status + 4 * (self.qswitch_mode == QSwitchMode.EXTERNAL)
+        return f"W {interlock} F {flashlamp} S {int(self.simmer)} Q {qswitch}"
+
+
+class EmulatorBus:
+    """
+    Several emulated heads on one RS-485 line, with the same interface as a single
+    `YagEmulator`. Commands go to the head with the serial number they are addressed
+    to, and replies are read in the order of the commands. Contention of the heads
+    for the line is not modelled.
+    """
+
+    def __init__(self, emulators: Iterable[YagEmulator], timeout: float = 2000):
+        """
+        Args:
+            emulators (Iterable[YagEmulator]): heads, with distinct serial numbers
+            timeout (float): read timeout in ms, like `pyvisa` resources
+        """
+        self.heads = dict((emulator.serial_number, emulator) for emulator in emulators)
+        self.timeout = timeout
+        # head and number of bytes of each reply not read yet
+        self._replies: Deque[List] = deque()
+
+    @property
+    def bytes_in_buffer(self) -> int:
+        if not self._replies:
+            return 0
+        head, remaining = self._replies[0]
+        return min(head.bytes_in_buffer, remaining)
+
+    def write(self, message: str) -> int:
+        match = re.match(r"\$(\d+)", message.strip())
+        head = self.heads.get(int(match.group(1))) if match is not None else None
+        if head is not None:
+            head.write(message)
+            self._replies.append([head, REPLY_LENGTH])
+        return len(message)
+
+    def read_bytes(self, count: int) -> bytes:
+        data = b""
+        while len(data) < count:
+            if not self._replies:
+                time.sleep(self.timeout / 1000)
+                raise pyvisa.errors.VisaIOError(pyvisa.constants.StatusCode.error_timeout)
+            reply = self._replies[0]
+            head, remaining = reply
+            head.timeout = self.timeout
+            take = min(count - len(data), remaining)
+            data += head.read_bytes(take)
+            reply[1] -= take
+            if reply[1] == 0:
+                self._replies.popleft()
+        return data
+
+    def clear(self) -> None:
+        for head in self.heads.values():
+            head.clear()
+        self._replies.clear()
+
+    def close(self) -> None:
+        for head in self.heads.values():
+            head.close()
+        self._replies.clear()
+
+
+class EmulatorServer:
+    """
+    TCP server exposing a `YagEmulator` like a serial-over-network terminal server,
+    e.g. for `BigSkyYag("tcp://127.0.0.1:<port>")`.
+    """
+
+    def __init__(
+        self,
+        emulator: Optional[YagEmulator] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        """
+        Args:
+            emulator (Optional[YagEmulator]): emulated device, a new one if None
+            host (str): address to listen on
+            port (int): TCP port to listen on, 0 picks a free one
+        """
+        self.emulator = YagEmulator() if emulator is None else emulator
+        self._server = socket.create_server((host, port))
+        self._server.settimeout(0.1)
+        self.address: Tuple[str, int] = self._server.getsockname()[:2]
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+
+    def __enter__(self) -> "EmulatorServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def resource_name(self) -> str:
+        return f"tcp://{self.address[0]}:{self.address[1]}"
+
+    def start(self) -> "EmulatorServer":
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._closed.set()
+        self._thread.join()
+        self._server.close()
+
+    def _serve(self) -> None:
+        while not self._closed.is_set():
+            try:
+                connection, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            threading.Thread(target=self._receive, args=(connection,), daemon=True).start()
+
+    def _receive(self, connection: socket.socket) -> None:
+        connected = threading.Event()
+        connected.set()
+        sender = threading.Thread(target=self._send, args=(connection, connected), daemon=True)
+        sender.start()
+        buffer = b""
+        connection.settimeout(0.1)
+        with connection:
+            while not self._closed.is_set():
+                try:
+                    chunk = connection.recv(4096)
+                except socket.timeout:
+                    continue
+                if not chunk:
+                    break
+                *lines, buffer = (buffer + chunk).split(b"\n")
+                for line in lines:
+                    self.emulator.write(line.decode("ascii", "replace"))
+            connected.clear()
+            sender.join()
+
+    def _send(self, connection: socket.socket, connected: threading.Event) -> None:
+        while connected.is_set():
+            if count := self.emulator.bytes_in_buffer:
+                connection.sendall(self.emulator.read_bytes(count))
+            else:
+                time.sleep(0.001)
@@ -0,0 +1,123 @@
+import time
+from typing import Any, Optional
+
+from .codec import matches
+
+__all__ = ["FrameReader"]
+
+TERMINATOR = b"\r\n"
+
+
+class FrameReader:
+    """
+    Split the byte stream received from the device into frames terminated by \\r\\n.
+
+    Received bytes are kept in a rolling buffer, so a short or garbled reply only
+    produces one bad frame instead of shifting every reply read after it.
+    """
+
+    def __init__(self, instrument: Any, max_frame_length: int = 68):
+        """
+        Args:
+            instrument (Any): pyvisa resource, or an object with the same
+                              `read_bytes` and `bytes_in_buffer` interface
+            max_frame_length (int): number of bytes without a terminator after which
+                                    the buffered bytes are treated as garbage
+        """
+        self.instrument = instrument
+        self.max_frame_length = max_frame_length
+        self.desynchronized = False
+        self._buffer = bytearray()
+        self._start = 0
+
+    def _receive(self, deadline: Optional[float] = None) -> None:
+        if deadline is not None:
+            # one deadline for the whole reply, however many reads it takes
+            self.instrument.timeout = max(0.0, deadline - time.monotonic()) * 1000
+        # block for at least one byte, then take everything that already arrived
+        try:
+            chunk = self.instrument.read_bytes(max(1, self.instrument.bytes_in_buffer))
+        except Exception:
+            # a reply may still arrive after a timeout and has to be discarded
+            self.desynchronized = True
+            raise
+        self._buffer += chunk
+
+    def _compact(self) -> None:
+        if self._start == len(self._buffer):
+            self._buffer.clear()
+            self._start = 0
+        elif self._start > len(self._buffer) // 2:
+            del self._buffer[: self._start]
+            self._start = 0
+
+    def read_frame(self, deadline: Optional[float] = None) -> str:
+        """
+        Read the next non-empty frame.
+
+        Args:
+            deadline (Optional[float]): time.monotonic() time by which the frame has to
+                                        be received, the instrument timeout applies to
+                                        each read if None
+
+        Returns:
+            str: frame content without the terminator
+        """
+        while True:
+            end = self._buffer.find(TERMINATOR, self._start)
+            if end >= 0:
+                with memoryview(self._buffer) as view:
+                    frame = str(view[self._start : end], "ascii", "replace")
+                self._start = end + len(TERMINATOR)
+                self._compact()
+                if frame:
+                    return frame
+                continue
+
+            if len(self._buffer) - self._start > self.max_frame_length:
+                # garbage without terminator, keep a trailing \r in case \n follows
+                keep = self._buffer.endswith(TERMINATOR[:1])
+                self._buffer.clear()
+                self._start = 0
+                if keep:
+                    self._buffer += TERMINATOR[:1]
+
+            self._receive(deadline)
+
+    def read_reply(
+        self, command: str, max_stale: int = 4, deadline: Optional[float] = None
+    ) -> str:
+        """
+        Read the reply to `command`. Up to `max_stale` frames that can't be its reply
+        are skipped, they are left over from earlier commands, e.g. replies still in
+        flight when the stream was resynchronized. If no frame matches, the stream is
+        marked desynchronized and the last frame is returned.
+
+        Args:
+            command (str): command the reply is read for, without address prefix
+            max_stale (int): frames skipped at most
+            deadline (Optional[float]): time.monotonic() time by which the reply has to
+                                        be received, see `read_frame`
+
+        Returns:
+            str: frame content without the terminator
+        """
+        frame = self.read_frame(deadline)
+        for _ in range(max_stale):
+            if matches(command, frame):
+                return frame
+            frame = self.read_frame(deadline)
+        if not matches(command, frame):
+            self.desynchronized = True
+        return frame
+
+    def resynchronize(self) -> None:
+        """
+        Discard buffered bytes and any bytes waiting in the instrument, e.g. the late
+        reply to a command that timed out.
+        """
+        self._buffer.clear()
+        self._start = 0
+        if (waiting := self.instrument.bytes_in_buffer) > 0:
+            self.instrument.read_bytes(waiting)
+        self.desynchronized = False
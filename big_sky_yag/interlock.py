@@ -1,5 +1,13 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 from enum import IntEnum
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Tuple, Type
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# interlock replies carry one 8-bit word, the enum values are bit positions
+WORD_BITS = 8
 
 
 @dataclass
@@ -41,3 +49,108 @@ class QSwitchInterlock(IntEnum):
     EMISSION_INHIBITED = 1
     WATER_TEMP = 2
     SHUTTER_CLOSED = 6
+
+
+def bit_table(interlock: Type[IntEnum]) -> Tuple[Tuple[bool, ...], ...]:
+    """
+    State of each member of `interlock`, in definition order, for every word.
+    """
+    return tuple(
+        tuple(bool(word >> member & 1) for member in interlock)
+        for word in range(1 << WORD_BITS)
+    )
+
+
+FLASHLAMP1_TABLE = bit_table(FlashlampInterlock1)
+FLASHLAMP2_TABLE = bit_table(FlashlampInterlock2)
+QSWITCH_TABLE = bit_table(QSwitchInterlock)
+
+# the states are built positionally from the tables
+assert [field.name for field in fields(FlashlampInterlockState)] == [
+    member.name for member in (*FlashlampInterlock1, *FlashlampInterlock2)
+]
+assert [field.name for field in fields(QSwitchInterlockState)] == [
+    member.name for member in QSwitchInterlock
+]
+
+
+# enums of the bits of the device words of each interlock state, in word order
+WORDS: Dict[type, Tuple[Type[IntEnum], ...]] = {
+    FlashlampInterlockState: (FlashlampInterlock1, FlashlampInterlock2),
+    QSwitchInterlockState: (QSwitchInterlock,),
+}
+
+
+def state_words(state: Any) -> Tuple[int, ...]:
+    """
+    Device words of an interlock state, `IF` and `IF2` or `IQ`, as recorded in the
+    state board and telemetry. Bits the state doesn't keep are 0.
+    """
+    return tuple(
+        sum(getattr(state, member.name) << member for member in interlock)
+        for interlock in WORDS[type(state)]
+    )
+
+
+def words_state(kind: type, words: Tuple[int, ...]) -> Any:
+    """
+    Interlock state of type `kind` from its device words, see `state_words`.
+    """
+    return kind(
+        *(
+            bool(word >> member & 1)
+            for interlock, word in zip(WORDS[kind], words)
+            for member in interlock
+        )
+    )
+
+
+def flashlamp_interlock_state(if1: int, if2: int) -> FlashlampInterlockState:
+    """
+    Flashlamp interlock state of the `IF` and `IF2` words.
+    """
+    return FlashlampInterlockState(*FLASHLAMP1_TABLE[if1], *FLASHLAMP2_TABLE[if2])
+
+
+def qswitch_interlock_state(iq: int) -> QSwitchInterlockState:
+    """
+    Q-switch interlock state of the `IQ` word.
+    """
+    return QSwitchInterlockState(*QSWITCH_TABLE[iq])
+
+
+@lru_cache(maxsize=None)
+def _word_bits() -> "np.ndarray":
+    import numpy as np
+
+    words = np.arange(1 << WORD_BITS)
+    return (words[:, None] >> np.arange(WORD_BITS) & 1).astype(bool)
+
+
+def decode_words(words: Any) -> "np.ndarray":
+    """
+    Decode recorded `IF`, `IF2` or `IQ` words at once, e.g. for interlock history.
+
+    Args:
+        words (Any): array-like of interlock words
+
+    Raises:
+        ValueError: raise error if a word isn't an integer that fits in 8 bits
+
+    Returns:
+        np.ndarray: boolean matrix with a row per word and a column per bit, so the
+                    columns are indexed by the interlock enums, e.g.
+                    `decode_words(if1)[:, FlashlampInterlock1.COVER_OPEN]`
+    """
+    import numpy as np
+
+    values = np.asarray(words)
+    if values.size and not (values.min() >= 0 and values.max() < 1 << WORD_BITS):
+        raise ValueError(
+            f"interlock words must be between 0 and {(1 << WORD_BITS) - 1}"
+        )
+    # e.g. an empty list or a float column is an array of floats, not indices
+    words = values.astype(np.int64)
+    if not np.array_equal(words, values):
+        raise ValueError("interlock words must be integers")
+    return _word_bits()[words]
@@ -0,0 +1,219 @@
+import concurrent.futures
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import pyvisa
+
+from .device import REPLY_LENGTH, BigSkyYag, address
+from .framing import FrameReader
+
+__all__ = ["IOThread", "ThreadedBigSkyYag"]
+
+
+class Request:
+    __slots__ = ("command", "deadline", "future", "desynchronized")
+
+    def __init__(self, command: str, timeout: float):
+        self.command = command
+        # time.monotonic() time by which the reply has to be received, queueing included
+        self.deadline = time.monotonic() + timeout
+        self.future: "Future[str]" = Future()
+        # whether the reply couldn't be matched to the command, set before the result
+        self.desynchronized = False
+
+    def result(self) -> str:
+        """
+        Wait for the reply until the deadline.
+
+        Raises:
+            pyvisa.errors.VisaIOError: raise error if there is no reply by the deadline
+        """
+        try:
+            return self.future.result(max(0.0, self.deadline - time.monotonic()))
+        except concurrent.futures.TimeoutError:
+            # not sent if still queued, else its late reply is discarded by the I/O thread
+            self.future.cancel()
+            raise pyvisa.errors.VisaIOError(
+                pyvisa.constants.StatusCode.error_timeout
+            ) from None
+
+
+class IOThread:
+    """
+    Thread owning an instrument. Commands are submitted from any thread and return a
+    future of the device reply. Requests waiting in the queue are sent back-to-back
+    and their replies, which arrive in the same order, are matched to them.
+    """
+
+    def __init__(
+        self,
+        instrument: Any,
+        serial_number: Optional[int] = None,
+        timeout: float = 2.0,
+        max_pipeline: int = 8,
+    ):
+        """
+        Args:
+            instrument (Any): pyvisa resource, or an object with the same interface
+            serial_number (Optional[int]): serial number to address the device with
+            timeout (float): default time to wait for a reply in seconds
+            max_pipeline (int): maximum number of requests sent before reading replies
+        """
+        self.instrument = instrument
+        self.serial_number = serial_number
+        self.timeout = timeout
+        self.max_pipeline = max_pipeline
+        self._frames = FrameReader(instrument, max_frame_length=4 * REPLY_LENGTH)
+        self._requests: "queue.Queue[Optional[Request]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, command: str, timeout: Optional[float] = None) -> "Future[str]":
+        """
+        Queue a command for the I/O thread.
+
+        Args:
+            command (str): command, without address prefix
+            timeout (Optional[float]): time to wait for the reply in seconds, from now
+                                       including the time queued, the default
+                                       `timeout` if None
+
+        Returns:
+            Future[str]: device reply, cancel it to drop the request if it wasn't sent
+        """
+        return self.request(command, timeout).future
+
+    def request(self, command: str, timeout: Optional[float] = None) -> Request:
+        """
+        Queue a command for the I/O thread, see `submit`.
+
+        Returns:
+            Request: request holding the future of the reply and its deadline
+        """
+        request = Request(command, self.timeout if timeout is None else timeout)
+        self._requests.put(request)
+        return request
+
+    def close(self) -> None:
+        """
+        Stop the I/O thread after the requests queued so far.
+        """
+        self._requests.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            batch: List[Request] = []
+            request = self._requests.get()
+            while request is not None:
+                # cancelled requests are not sent
+                if request.future.set_running_or_notify_cancel():
+                    batch.append(request)
+                if len(batch) == self.max_pipeline:
+                    break
+                try:
+                    request = self._requests.get_nowait()
+                except queue.Empty:
+                    break
+            running = request is not None
+            if batch:
+                self._transact(batch)
+
+    def _transact(self, batch: List[Request]) -> None:
+        try:
+            # frames left over from before the batch would be read as its replies
+            self._frames.resynchronize()
+            for request in batch:
+                self.instrument.write(address(request.command, self.serial_number))
+        except Exception as err:
+            for request in batch:
+                request.future.set_exception(err)
+            return
+
+        for i, request in enumerate(batch):
+            try:
+                reply = self._frames.read_reply(request.command, deadline=request.deadline)
+            except Exception as err:
+                # the remaining replies are lost, the stream is resynchronized next time
+                for _request in batch[i:]:
+                    _request.future.set_exception(err)
+                return
+            request.desynchronized = self._frames.desynchronized
+            request.future.set_result(reply)
+
+
+class ThreadedBigSkyYag(BigSkyYag):
+    """
+    `BigSkyYag` that can be shared between threads, e.g. the GUI worker and an
+    experiment script. A single `IOThread` talks to the device, and every query or
+    write is a request of its own, so replies can't be swapped between threads and
+    no lock is held across a sequence of commands.
+    """
+
+    def __init__(self, *args, request_timeout: float = 2.0, **kwargs):
+        """
+        Args:
+            request_timeout (float): default time to wait for a reply in seconds,
+                                     including the time queued behind other requests
+
+        See `BigSkyYag` for the other arguments.
+        """
+        super().__init__(*args, **kwargs)
+        self.io = IOThread(self.instrument, self._serial_number, timeout=request_timeout)
+
+    def submit(self, command: str, timeout: Optional[float] = None) -> "Future[str]":
+        """
+        Send a command without waiting for the reply, see `IOThread.submit`.
+        """
+        return self.io.submit(command, timeout)
+
+    def read(self) -> str:
+        raise RuntimeError("replies are read by the I/O thread, use submit()")
+
+    def query(self, query: str) -> str:
+        if (reply := self.cache.get(query)) is not None:
+            return reply
+        # a write submitted meanwhile by another thread invalidates the reply
+        generation = self.cache.generation
+        request = self.io.request(query)
+        reply = request.result()
+        if not request.desynchronized:
+            self.cache.put(query, reply, generation)
+        return reply
+
+    def query_many(self, queries: Sequence[str]) -> Dict[str, Union[str, Exception]]:
+        replies: Dict[str, Union[str, Exception]] = {}
+        requests: Dict[str, Request] = {}
+        generation = self.cache.generation
+        for query in queries:
+            if (reply := self.cache.get(query)) is not None:
+                replies[query] = reply
+            elif query not in requests:
+                requests[query] = self.io.request(query)
+
+        for query, request in requests.items():
+            try:
+                replies[query] = reply = request.result()
+            except Exception as err:
+                replies[query] = err
+                continue
+            if not request.desynchronized:
+                self.cache.put(query, reply, generation)
+        return dict((query, replies[query]) for query in queries)
+
+    def write(self, command: str, invalidates: Optional[Sequence[str]] = None) -> str:
+        try:
+            return self.io.request(command).result()
+        finally:
+            if invalidates is None:
+                self.cache.invalidate()
+            else:
+                self.cache.invalidate(*invalidates)
+
+    def close(self, discard: bool = False) -> None:
+        self.io.close()
+        super().close(discard)
@@ -0,0 +1,55 @@
+import math
+from collections import deque
+from typing import Deque, Dict, Optional
+
+__all__ = ["LatencyStats"]
+
+
+class LatencyStats:
+    """
+    Statistics of the most recent `window` latencies, e.g. from queuing a command to
+    its acknowledgement by the device.
+    """
+
+    def __init__(self, window: int = 100):
+        """
+        Args:
+            window (int): number of most recent latencies kept
+        """
+        self._latencies: Deque[float] = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, latency: float) -> None:
+        """
+        Add a latency in seconds.
+        """
+        self._latencies.append(latency)
+        self.count += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        `q`-th percentile of the kept latencies, nearest-rank, None if there are none.
+
+        Args:
+            q (float): percentile between 0 and 100
+
+        Returns:
+            Optional[float]: latency in seconds
+        """
+        if not self._latencies:
+            return None
+        latencies = sorted(self._latencies)
+        rank = max(1, math.ceil(q / 100 * len(latencies)))
+        return latencies[rank - 1]
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """
+        Total number of latencies recorded, and the median, 95th percentile and maximum
+        of the kept ones in seconds.
+        """
+        return {
+            "count": self.count,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "max": max(self._latencies, default=None),
+        }
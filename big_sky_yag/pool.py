@@ -0,0 +1,134 @@
+import threading
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from .transports import open_instrument
+
+__all__ = ["Lease", "SessionPool", "POOL"]
+
+
+class Lease:
+    """
+    Exclusive use of a pooled session, given back with `release` or by leaving the
+    `with` block.
+    """
+
+    def __init__(
+        self, pool: "SessionPool", resource_name: str, baud_rate: int, instrument: Any
+    ):
+        self.pool = pool
+        self.resource_name = resource_name
+        self.baud_rate = baud_rate
+        self.instrument = instrument
+        self.released = False
+
+    def __enter__(self) -> "Lease":
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def release(self, discard: bool = False) -> None:
+        """
+        Give the session back to the pool.
+
+        Args:
+            discard (bool): close the session instead of keeping it open for the next
+                            lease, e.g. after the device stopped answering
+        """
+        if not self.released:
+            self.released = True
+            self.pool._release(self, discard)
+
+
+class SessionPool:
+    """
+    Thread-safe pool of open sessions keyed by resource name. A released session stays
+    open, so leasing the same resource again, e.g. to reconnect, doesn't reopen it.
+    """
+
+    def __init__(self, opener: Callable[..., Any] = open_instrument):
+        """
+        Args:
+            opener (Callable[..., Any]): opens a session from a resource name and
+                                         `baud_rate` keyword argument
+        """
+        self._opener = opener
+        self._cond = threading.Condition()
+        self._idle: Dict[str, Tuple[int, Any]] = {}
+        self._leased: Set[str] = set()
+
+    def acquire(
+        self, resource_name: str, baud_rate: int = 9600, timeout: Optional[float] = 2.0
+    ) -> Lease:
+        """
+        Lease the session of `resource_name`, opening it if there is no idle one.
+
+        Args:
+            resource_name (str): resource name, see `transports.open_instrument`
+            baud_rate (int): serial baud rate
+            timeout (Optional[float]): time to wait for another lease of the same
+                                       resource to be released, forever if None
+
+        Raises:
+            TimeoutError: raise error if the resource is still leased after `timeout`
+
+        Returns:
+            Lease: lease of the session
+        """
+        with self._cond:
+            if not self._cond.wait_for(
+                lambda: resource_name not in self._leased, timeout
+            ):
+                raise TimeoutError(f"{resource_name} is in use")
+            self._leased.add(resource_name)
+            idle = self._idle.pop(resource_name, None)
+
+        try:
+            if idle is not None and idle[0] == baud_rate:
+                instrument = idle[1]
+            else:
+                if idle is not None:
+                    idle[1].close()
+                instrument = self._opener(resource_name, baud_rate=baud_rate)
+        except Exception:
+            with self._cond:
+                self._leased.discard(resource_name)
+                self._cond.notify_all()
+            raise
+        return Lease(self, resource_name, baud_rate, instrument)
+
+    def _release(self, lease: Lease, discard: bool) -> None:
+        if not discard:
+            try:
+                # drop replies the previous user didn't read
+                lease.instrument.clear()
+            except Exception:
+                discard = True
+        if discard:
+            try:
+                lease.instrument.close()
+            except Exception:
+                pass
+
+        with self._cond:
+            self._leased.discard(lease.resource_name)
+            if not discard:
+                self._idle[lease.resource_name] = (lease.baud_rate, lease.instrument)
+            self._cond.notify_all()
+
+    def close_idle(self) -> None:
+        """
+        Close the sessions that are not leased.
+        """
+        with self._cond:
+            idle = list(self._idle.values())
+            self._idle.clear()
+        for _, instrument in idle:
+            try:
+                instrument.close()
+            except Exception:
+                pass
+
+
+# process-wide pool
+POOL = SessionPool()
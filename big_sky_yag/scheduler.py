@@ -0,0 +1,87 @@
+import math
+import time
+from typing import Dict, Iterable, List, Optional
+
+__all__ = ["PollScheduler"]
+
+
+class PollScheduler:
+    """
+    Keep track of when each polled field is due, every field with its own interval.
+    Fields that failed to be read are polled again after their interval, or after
+    `retry_interval` if they are polled only once.
+    """
+
+    def __init__(
+        self, intervals: Dict[str, Optional[float]], retry_interval: float = 1.0
+    ):
+        """
+        Args:
+            intervals (Dict[str, Optional[float]]): poll interval in seconds per field,
+                                                    None to poll a field only once
+            retry_interval (float): time until a field polled only once is polled
+                                    again after it failed to be read, in seconds
+        """
+        self.retry_interval = retry_interval
+        self.intervals: Dict[str, Optional[float]] = {}
+        self._next: Dict[str, float] = {}
+        for field, interval in intervals.items():
+            self.set_interval(field, interval)
+
+    def set_interval(self, field: str, interval: Optional[float]) -> None:
+        """
+        Set the poll interval of `field`, the field is due immediately.
+        """
+        self.intervals[field] = interval
+        self._next[field] = 0.0
+
+    def due(self, now: Optional[float] = None) -> List[str]:
+        """
+        Fields due for polling, the ones with the shortest interval first.
+
+        Args:
+            now (Optional[float]): time.monotonic() time, now if None
+
+        Returns:
+            List[str]: fields due
+        """
+        now = time.monotonic() if now is None else now
+        due = [field for field, t in self._next.items() if t <= now]
+        return sorted(due, key=lambda field: self.intervals[field] or math.inf)
+
+    def mark(self, fields: Iterable[str], now: Optional[float] = None) -> None:
+        """
+        Mark `fields` as polled, scheduling their next poll.
+        """
+        now = time.monotonic() if now is None else now
+        for field in fields:
+            interval = self.intervals[field]
+            self._next[field] = math.inf if interval is None else now + interval
+
+    def retry(self, fields: Iterable[str], now: Optional[float] = None) -> None:
+        """
+        Mark `fields` as failed to be read, scheduling their next attempt.
+        """
+        now = time.monotonic() if now is None else now
+        for field in fields:
+            interval = self.intervals[field]
+            self._next[field] = now + (
+                self.retry_interval if interval is None else interval
+            )
+
+    def refresh(self, fields: Optional[Iterable[str]] = None) -> None:
+        """
+        Make `fields` due immediately, e.g. after a command changed them.
+
+        Args:
+            fields (Optional[Iterable[str]]): fields to refresh, all fields if None
+        """
+        for field in self._next if fields is None else fields:
+            if field in self._next:
+                self._next[field] = 0.0
+
+    def next_deadline(self) -> float:
+        """
+        time.monotonic() time at which the next field is due, inf if none is.
+        """
+        return min(self._next.values(), default=math.inf)
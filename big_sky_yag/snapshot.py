@@ -0,0 +1,158 @@
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from .attributes import (
+    Flashlamp,
+    QSwitch,
+    parse_flashlamp_interlock,
+    parse_laser_status,
+    parse_pump,
+    parse_qswitch_interlock,
+    parse_qswitch_mode,
+    parse_qswitch_status,
+    parse_serial_number,
+    parse_shutter_strict,
+    parse_trigger,
+)
+from .device import BigSkyYag
+
+__all__ = ["LaserSnapshot", "FIELDS"]
+
+# snapshot field, commands it is read from and the parser of their replies
+FIELDS: Dict[str, Tuple[Tuple[str, ...], Callable[..., Any]]] = {
+    "serial_number": (("SN",), parse_serial_number),
+    "pump": (("P",), parse_pump),
+    "shutter": (("R",), parse_shutter_strict),
+    "temperature_cooling_group": (("CG",), BigSkyYag.temperature_cooling_group.parse),
+    "laser_status": (("WOR",), parse_laser_status),
+    "flashlamp_trigger": (("LPM",), parse_trigger),
+    "flashlamp_frequency": (("F",), Flashlamp.frequency.parse),
+    "flashlamp_voltage": (("V",), Flashlamp.voltage.parse),
+    "flashlamp_energy": (("ENE",), Flashlamp.energy.parse),
+    "flashlamp_capacitance": (("CAP",), Flashlamp.capacitance.parse),
+    "flashlamp_voltage_capacitor_sampled": (
+        ("VA",),
+        Flashlamp.voltage_capacitor_sampled.parse,
+    ),
+    "flashlamp_voltage_capacitor_instant": (
+        ("VT",),
+        Flashlamp.voltage_capacitor_instant.parse,
+    ),
+    "flashlamp_counter": (("C",), Flashlamp.counter.parse),
+    "flashlamp_user_counter": (("UC",), Flashlamp.user_counter.parse),
+    "flashlamp_interlock": (("IF", "IF2"), parse_flashlamp_interlock),
+    "qswitch_status": (("QOF",), parse_qswitch_status),
+    "qswitch_mode": (("QSM",), parse_qswitch_mode),
+    "qswitch_delay": (("W",), QSwitch.delay.parse),
+    "qswitch_frequency_divider": (("QSF",), QSwitch.frequency_divider.parse),
+    "qswitch_pulses": (("QSP",), QSwitch.pulses.parse),
+    "qswitch_pulses_wait": (("QSW",), QSwitch.pulses_wait.parse),
+    "qswitch_counter": (("CQ",), QSwitch.counter.parse),
+    "qswitch_user_counter": (("UCQ",), QSwitch.user_counter.parse),
+    "qswitch_interlock": (("IQ",), parse_qswitch_interlock),
+}
+
+
+class LaserSnapshot:
+    """
+    Immutable record of the laser state, read in a single pipelined transaction.
+
+    Every name in `FIELDS` is an attribute. Fields that were not read, or failed to
+    be read, are None; the latter are listed in `errors` with the exception raised.
+    """
+
+    __slots__ = ("time", "fields", "errors", *FIELDS)
+
+    def __init__(
+        self,
+        values: Dict[str, Any],
+        errors: Optional[Dict[str, Exception]] = None,
+        t: Optional[float] = None,
+    ):
+        """
+        Args:
+            values (Dict[str, Any]): field values
+            errors (Optional[Dict[str, Exception]]): exception per field that failed
+            t (Optional[float]): time.time() when the snapshot was taken
+        """
+        errors = {} if errors is None else dict(errors)
+        object.__setattr__(self, "time", time.time() if t is None else t)
+        object.__setattr__(
+            self, "fields", tuple(name for name in FIELDS if name in values or name in errors)
+        )
+        object.__setattr__(self, "errors", errors)
+        for name in FIELDS:
+            object.__setattr__(self, name, values.get(name))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("LaserSnapshot is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("LaserSnapshot is immutable")
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.fields)
+        return f"LaserSnapshot({values})"
+
+    @classmethod
+    def read(
+        cls, yag: BigSkyYag, fields: Optional[Iterable[str]] = None
+    ) -> "LaserSnapshot":
+        """
+        Read the laser state with one `query_many` transaction.
+
+        Args:
+            yag (BigSkyYag): device to read
+            fields (Optional[Iterable[str]]): fields to read, all of `FIELDS` if None
+
+        Returns:
+            LaserSnapshot: laser state
+        """
+        fields = list(FIELDS) if fields is None else list(fields)
+        commands = list(
+            dict.fromkeys(command for name in fields for command in FIELDS[name][0])
+        )
+        replies = yag.query_many(commands)
+
+        values: Dict[str, Any] = {}
+        errors: Dict[str, Exception] = {}
+        for name in fields:
+            field_commands, parse = FIELDS[name]
+            field_replies = [replies[command] for command in field_commands]
+            try:
+                for reply in field_replies:
+                    if isinstance(reply, Exception):
+                        raise reply
+                values[name] = parse(*field_replies)
+            except Exception as err:
+                errors[name] = err
+        return cls(values, errors)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        Values of the fields read successfully.
+        """
+        return dict(
+            (name, getattr(self, name)) for name in self.fields if name not in self.errors
+        )
+
+    def diff(self, previous: Optional["LaserSnapshot"]) -> Dict[str, Any]:
+        """
+        Fields read successfully in this snapshot whose value differs from `previous`,
+        or that were not read successfully in `previous`.
+
+        Args:
+            previous (Optional[LaserSnapshot]): earlier snapshot, None reports all fields
+
+        Returns:
+            Dict[str, Any]: changed field values
+        """
+        current = self.as_dict()
+        if previous is None:
+            return current
+        before = previous.as_dict()
+        return dict(
+            (name, value)
+            for name, value in current.items()
+            if name not in before or before[name] != value
+        )
@@ -0,0 +1,224 @@
+import dataclasses
+import math
+import struct
+import sys
+import time
+import typing
+import zlib
+from enum import IntEnum
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from .interlock import WORDS, state_words, words_state
+from .snapshot import FIELDS, LaserSnapshot
+
+__all__ = ["StateBoard", "LAYOUT"]
+
+SERIAL_NUMBER_LENGTH = 16
+
+# segments created by this process, the resource tracker still owns them
+_created: Set[str] = set()
+
+
+class Slot:
+    """
+    Snapshot field in the state board, stored as `format` values followed by the
+    time.time() it was read.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        format: str,
+        encode: Callable[[Any], Tuple[Any, ...]],
+        decode: Callable[[Tuple[Any, ...]], Any],
+    ):
+        """
+        Args:
+            name (str): snapshot field
+            format (str): struct format of the value
+            encode (Callable[[Any], Tuple[Any, ...]]): value to struct values
+            decode (Callable[[Tuple[Any, ...]], Any]): struct values to value
+        """
+        self.name = name
+        self.format = format
+        self.encode = encode
+        self.decode = decode
+        # struct values before the field is read
+        self.empty = struct.unpack(f"<{format}", bytes(struct.calcsize(f"<{format}")))
+        self.width = len(self.empty)
+
+
+def make_slot(name: str, parse: Callable[..., Any]) -> Slot:
+    """
+    Slot of a snapshot field, laid out after the return type of its parser, e.g.
+    `IntProperty.parse` or `parse_qswitch_interlock`.
+    """
+    kind = typing.get_type_hints(parse)["return"]
+    if kind is bool:
+        return Slot(name, "?", lambda v: (v,), lambda t: t[0])
+    elif isinstance(kind, type) and issubclass(kind, IntEnum):
+        return Slot(name, "b", lambda v: (int(v),), lambda t: kind(t[0]))
+    elif kind is int:
+        return Slot(name, "q", lambda v: (v,), lambda t: t[0])
+    elif kind is float:
+        return Slot(name, "d", lambda v: (v,), lambda t: t[0])
+    elif kind is str:
+        return Slot(
+            name,
+            f"{SERIAL_NUMBER_LENGTH}s",
+            lambda v: (v.encode("ascii")[:SERIAL_NUMBER_LENGTH],),
+            lambda t: t[0].rstrip(b"\0").decode("ascii"),
+        )
+    elif dataclasses.is_dataclass(kind):
+        fields = [field.name for field in dataclasses.fields(kind)]
+        types = typing.get_type_hints(kind)
+        if kind in WORDS:
+            # interlock states as the device words, decoded with `decode_words`
+            words = WORDS[kind]
+            return Slot(
+                name,
+                "B" * len(words),
+                state_words,
+                lambda t: words_state(kind, t),
+            )
+        # e.g. the laser status, one byte per field
+        return Slot(
+            name,
+            "b" * len(fields),
+            lambda v: tuple(int(getattr(v, f)) for f in fields),
+            lambda t: kind(**dict((f, types[f](x)) for f, x in zip(fields, t))),
+        )
+    raise TypeError(f"no state board layout for {name} of type {kind}")
+
+
+# every snapshot field, stored as its value followed by the time.time() it was read
+LAYOUT: List[Slot] = [make_slot(name, parse) for name, (_, parse) in FIELDS.items()]
+
+# layout version, sequence counter and publish time
+HEADER = struct.Struct("<IIQd")
+BODY = struct.Struct("<" + "".join(f"{slot.format}d" for slot in LAYOUT))
+LAYOUT_ID = zlib.crc32(
+    "".join(f"{slot.name}:{slot.format};" for slot in LAYOUT).encode()
+)
+
+
+class StateBoard:
+    """
+    Latest laser state in a fixed-layout shared memory segment, so other processes on
+    the machine can read it without IPC calls or serial traffic.
+
+    The publisher increments a sequence counter before and after writing, so readers
+    retry while it is odd or changed during their copy (a seqlock) and never block
+    the publisher.
+    """
+
+    def __init__(self, memory: shared_memory.SharedMemory, owner: bool):
+        self.memory = memory
+        self.owner = owner
+        self._values: List[Any] = []
+        for slot in LAYOUT:
+            self._values.extend((*slot.empty, math.nan))
+        self._sequence = 0
+
+    @classmethod
+    def create(cls, name: str) -> "StateBoard":
+        """
+        Create the segment `name` to publish to.
+        """
+        memory = shared_memory.SharedMemory(
+            name, create=True, size=HEADER.size + BODY.size
+        )
+        _created.add(name)
+        board = cls(memory, owner=True)
+        board._write()
+        return board
+
+    @classmethod
+    def attach(cls, name: str) -> "StateBoard":
+        """
+        Attach to the segment `name` to read from.
+
+        Raises:
+            ValueError: raise error if the segment was written with another layout
+        """
+        memory = shared_memory.SharedMemory(name)
+        if sys.platform != "win32" and name not in _created:
+            # don't let the resource tracker remove the segment when this process exits
+            from multiprocessing import resource_tracker
+
+            resource_tracker.unregister(
+                memory._name, "shared_memory"  # type: ignore[attr-defined]
+            )
+        if HEADER.unpack_from(memory.buf)[0] != LAYOUT_ID:
+            memory.close()
+            raise ValueError(f"state board {name} has a different layout")
+        return cls(memory, owner=False)
+
+    def close(self) -> None:
+        """
+        Detach from the segment, the publisher also removes it.
+        """
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+            _created.discard(self.memory.name.lstrip("/"))
+
+    def publish(self, snapshot: LaserSnapshot) -> None:
+        """
+        Write the fields read successfully in `snapshot`, the others keep their value.
+        """
+        index = 0
+        for slot in LAYOUT:
+            if slot.name in snapshot.fields and slot.name not in snapshot.errors:
+                value = getattr(snapshot, slot.name)
+                self._values[index : index + slot.width] = slot.encode(value)
+                self._values[index + slot.width] = snapshot.time
+            index += slot.width + 1
+        self._write()
+
+    def _write(self) -> None:
+        buf = self.memory.buf
+        self._sequence += 1
+        HEADER.pack_into(buf, 0, LAYOUT_ID, 0, self._sequence, time.time())
+        BODY.pack_into(buf, HEADER.size, *self._values)
+        self._sequence += 1
+        HEADER.pack_into(buf, 0, LAYOUT_ID, 0, self._sequence, time.time())
+
+    def read(self, max_retries: int = 1000) -> Dict[str, Tuple[Any, float]]:
+        """
+        Consistent copy of the state.
+
+        Returns:
+            Dict[str, Tuple[Any, float]]: value and time.time() it was read per field,
+                                          (None, nan) if it wasn't read yet
+        """
+        buf = self.memory.buf
+        for _ in range(max_retries):
+            _, _, before, _ = HEADER.unpack_from(buf)
+            if before % 2 == 0:
+                values = BODY.unpack_from(buf, HEADER.size)
+                if HEADER.unpack_from(buf)[2] == before:
+                    break
+            # let a publisher in this process finish
+            time.sleep(0)
+        else:
+            raise TimeoutError("state board is being written continuously")
+
+        state: Dict[str, Tuple[Any, float]] = {}
+        index = 0
+        for slot in LAYOUT:
+            t = values[index + slot.width]
+            if math.isnan(t):
+                state[slot.name] = (None, t)
+            else:
+                state[slot.name] = (slot.decode(values[index : index + slot.width]), t)
+            index += slot.width + 1
+        return state
+
+    @property
+    def sequence(self) -> int:
+        """
+        Sequence counter, changes on every publish.
+        """
+        return HEADER.unpack_from(self.memory.buf)[2]
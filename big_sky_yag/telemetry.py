@@ -0,0 +1,239 @@
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from .snapshot import LaserSnapshot
+from .state_board import LAYOUT, LAYOUT_ID, Slot
+
+__all__ = ["RingBuffer", "TelemetryArchive", "TelemetryRecorder", "COLUMNS"]
+
+
+def column_dtype(slot: Slot) -> np.dtype:
+    """
+    Record of a snapshot field column: time.time() it was read and its value, typed
+    like the field in the state board, e.g. interlock states as their device words,
+    decoded with `decode_words`.
+    """
+    if slot.format.endswith("s"):
+        # bytes, e.g. the serial number
+        value = np.dtype(f"S{slot.format[:-1]}")
+    elif slot.width == 1:
+        value = np.dtype(slot.format)
+    else:
+        # one struct format character per value, e.g. the laser status
+        value = np.dtype((np.dtype(slot.format[0]), slot.width))
+    return np.dtype([("time", "<f8"), ("value", value.newbyteorder("<"))])
+
+
+# record type per snapshot field
+COLUMNS: Dict[str, np.dtype] = dict((slot.name, column_dtype(slot)) for slot in LAYOUT)
+SLOTS: Dict[str, Slot] = dict((slot.name, slot) for slot in LAYOUT)
+
+
+class RingBuffer:
+    """
+    Preallocated array of the most recent `capacity` records, oldest overwritten first.
+    """
+
+    def __init__(self, dtype: np.dtype, capacity: int):
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.capacity = capacity
+        # total number of records appended, the next one goes to total % capacity
+        self.total = 0
+
+    def append(self, record: Any) -> None:
+        self.data[self.total % self.capacity] = record
+        self.total += 1
+
+    def since(self, total: int) -> np.ndarray:
+        """
+        Copy of the records appended after the first `total`, oldest first, as far as
+        they weren't overwritten.
+        """
+        start = max(total, self.total - self.capacity, 0)
+        indices = np.arange(start, self.total) % self.capacity
+        return self.data[indices]
+
+    def latest(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        Copy of the `n` most recent records, all kept records if None, oldest first.
+        """
+        n = self.capacity if n is None else n
+        return self.since(self.total - n)
+
+
+class TelemetryArchive:
+    """
+    Append-only columnar archive in a directory: one file of (time, value) records
+    per snapshot field, and layout.json with the record types. Records are appended
+    in time order, so the time column of each file is its time index, and files are
+    read through memory maps without loading them.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory (str): archive directory, created if it doesn't exist
+
+        Raises:
+            ValueError: raise error if the archive was written with another layout
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        layout = {
+            "layout_id": LAYOUT_ID,
+            "columns": dict(
+                (name, str(dtype.descr)) for name, dtype in COLUMNS.items()
+            ),
+        }
+        path = os.path.join(directory, "layout.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                if json.load(f) != layout:
+                    raise ValueError(
+                        f"telemetry archive {directory} has a different layout"
+                    )
+        else:
+            with open(path, "w") as f:
+                json.dump(layout, f, indent=1)
+
+    def path(self, field: str) -> str:
+        return os.path.join(self.directory, f"{field}.bin")
+
+    def append(self, field: str, records: np.ndarray) -> None:
+        """
+        Append records of `field`, which must not be older than the archived ones.
+        """
+        if len(records):
+            with open(self.path(field), "ab") as f:
+                f.write(records.astype(COLUMNS[field], copy=False).tobytes())
+
+    def read(
+        self, field: str, start: Optional[float] = None, stop: Optional[float] = None
+    ) -> np.ndarray:
+        """
+        Records of `field` read in [start, stop), found by bisection of the time column.
+
+        Args:
+            field (str): snapshot field
+            start (Optional[float]): time.time() of the first record, from the oldest if
+                                     None
+            stop (Optional[float]): time.time() after the last record, to the newest if
+                                    None
+
+        Returns:
+            np.ndarray: read-only memory map of the records
+        """
+        dtype = COLUMNS[field]
+        try:
+            count = os.path.getsize(self.path(field)) // dtype.itemsize
+        except FileNotFoundError:
+            count = 0
+        if count == 0:
+            return np.zeros(0, dtype=dtype)
+        records = np.memmap(self.path(field), dtype=dtype, mode="r", shape=(count,))
+        times = records["time"]
+        first = 0 if start is None else int(np.searchsorted(times, start, "left"))
+        last = count if stop is None else int(np.searchsorted(times, stop, "left"))
+        return records[first:last]
+
+    @staticmethod
+    def decode(field: str, record: np.void) -> Any:
+        """
+        Field value of a record, e.g. a `LaserStatus` instead of its bytes.
+        """
+        value = record["value"]
+        values = tuple(value.tolist()) if np.ndim(value) else (value.item(),)
+        return SLOTS[field].decode(values)
+
+
+class TelemetryRecorder:
+    """
+    Records every polled snapshot field into a ring buffer of typed records, and
+    appends them to a `TelemetryArchive` every `flush_interval` seconds from a
+    background thread, so recording never waits for the disk.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 4096,
+        archive: Optional[TelemetryArchive] = None,
+        flush_interval: float = 10.0,
+    ):
+        """
+        Args:
+            capacity (int): records kept in memory per field
+            archive (Optional[TelemetryArchive]): archive to flush to, none if None
+            flush_interval (float): time between flushes in seconds
+        """
+        self.buffers = dict(
+            (name, RingBuffer(dtype, capacity)) for name, dtype in COLUMNS.items()
+        )
+        self.archive = archive
+        self.flush_interval = flush_interval
+        self._flushed = dict((name, 0) for name in COLUMNS)
+        # records overwritten before they were flushed
+        self.dropped = 0
+        # guards the buffers, held only to append or copy records
+        self._lock = threading.Lock()
+        # one flush at a time, so the records are appended in time order
+        self._flush_lock = threading.Lock()
+        self._closed = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if archive is not None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def record(self, snapshot: LaserSnapshot) -> None:
+        """
+        Add the fields read successfully in `snapshot`.
+        """
+        records = []
+        for name in snapshot.fields:
+            if name not in snapshot.errors:
+                value = SLOTS[name].encode(getattr(snapshot, name))
+                records.append((name, value if len(value) > 1 else value[0]))
+        with self._lock:
+            for name, value in records:
+                self.buffers[name].append((snapshot.time, value))
+
+    def latest(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        """
+        The `n` most recent records of `field`, all kept ones if None, oldest first.
+        """
+        with self._lock:
+            return self.buffers[field].latest(n)
+
+    def _run(self) -> None:
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self, fields: Optional[Iterable[str]] = None) -> None:
+        """
+        Append the records recorded since the last flush to the archive.
+        """
+        if self.archive is None:
+            return
+        with self._flush_lock:
+            pending = []
+            with self._lock:
+                for name in COLUMNS if fields is None else fields:
+                    buffer = self.buffers[name]
+                    records = buffer.since(self._flushed[name])
+                    self.dropped += buffer.total - self._flushed[name] - len(records)
+                    self._flushed[name] = buffer.total
+                    pending.append((name, records))
+            for name, records in pending:
+                self.archive.append(name, records)
+
+    def close(self) -> None:
+        """
+        Stop the background flushes and flush the remaining records.
+        """
+        self._closed.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
@@ -0,0 +1,170 @@
+import select
+import socket
+import threading
+from typing import Any, Optional
+
+import pyvisa
+
+__all__ = ["SerialTransport", "SocketTransport", "open_instrument", "resource_manager"]
+
+TERMINATOR = "\r\n"
+
+_resource_manager: Optional[pyvisa.ResourceManager] = None
+_resource_manager_lock = threading.Lock()
+
+
+def resource_manager() -> pyvisa.ResourceManager:
+    """
+    Process-wide pyvisa ResourceManager, created on first use.
+    """
+    global _resource_manager
+    with _resource_manager_lock:
+        if _resource_manager is None:
+            _resource_manager = pyvisa.ResourceManager()
+        return _resource_manager
+
+
+class SerialTransport:
+    """
+    Serial port opened directly with pyserial instead of through VISA, implementing
+    the subset of the pyvisa serial resource interface used by `BigSkyYag`.
+    """
+
+    def __init__(self, port: str, baud_rate: int = 9600, timeout: float = 2000):
+        """
+        Args:
+            port (str): serial port, e.g. 'COM3' or '/dev/ttyUSB0'
+            baud_rate (int): serial baud rate
+            timeout (float): read timeout in ms, like `pyvisa` resources
+        """
+        try:
+            import serial
+        except ImportError as err:
+            raise ImportError("SerialTransport requires the pyserial package") from err
+        self.serial = serial.Serial(port, baudrate=baud_rate, timeout=timeout / 1000)
+
+    @property
+    def timeout(self) -> float:
+        return self.serial.timeout * 1000
+
+    @timeout.setter
+    def timeout(self, timeout: float):
+        self.serial.timeout = timeout / 1000
+
+    @property
+    def bytes_in_buffer(self) -> int:
+        return self.serial.in_waiting
+
+    def write(self, message: str) -> int:
+        return self.serial.write(f"{message}{TERMINATOR}".encode("ascii"))
+
+    def read_bytes(self, count: int) -> bytes:
+        """
+        Read `count` bytes.
+
+        Raises:
+            TimeoutError: raise error if they don't arrive within `timeout`
+        """
+        data = self.serial.read(count)
+        if len(data) < count:
+            raise TimeoutError(f"received {len(data)} of {count} bytes")
+        return data
+
+    def clear(self) -> None:
+        self.serial.reset_input_buffer()
+        self.serial.reset_output_buffer()
+
+    def close(self) -> None:
+        self.serial.close()
+
+
+class SocketTransport:
+    """
+    TCP connection to a serial-over-network terminal server, e.g. ser2net in raw
+    mode, implementing the subset of the pyvisa serial resource interface used by
+    `BigSkyYag`.
+    """
+
+    def __init__(self, host: str, port: int, timeout: float = 2000):
+        """
+        Args:
+            host (str): terminal server host name or address
+            port (int): TCP port of the serial line
+            timeout (float): connect and read timeout in ms, like `pyvisa` resources
+        """
+        self.socket = socket.create_connection((host, port), timeout=timeout / 1000)
+        self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._buffer = bytearray()
+
+    @property
+    def timeout(self) -> float:
+        return self.socket.gettimeout() * 1000
+
+    @timeout.setter
+    def timeout(self, timeout: float):
+        self.socket.settimeout(timeout / 1000)
+
+    def _drain(self) -> None:
+        # move the bytes already received into the buffer without blocking
+        while select.select([self.socket], [], [], 0)[0]:
+            chunk = self.socket.recv(4096)
+            if not chunk:
+                raise ConnectionError("connection closed by the terminal server")
+            self._buffer += chunk
+
+    @property
+    def bytes_in_buffer(self) -> int:
+        self._drain()
+        return len(self._buffer)
+
+    def write(self, message: str) -> int:
+        data = f"{message}{TERMINATOR}".encode("ascii")
+        self.socket.sendall(data)
+        return len(data)
+
+    def read_bytes(self, count: int) -> bytes:
+        """
+        Read `count` bytes.
+
+        Raises:
+            TimeoutError: raise error if they don't arrive within `timeout`
+        """
+        while len(self._buffer) < count:
+            chunk = self.socket.recv(max(4096, count - len(self._buffer)))
+            if not chunk:
+                raise ConnectionError("connection closed by the terminal server")
+            self._buffer += chunk
+        data = bytes(self._buffer[:count])
+        del self._buffer[:count]
+        return data
+
+    def clear(self) -> None:
+        self._drain()
+        self._buffer.clear()
+
+    def close(self) -> None:
+        self.socket.close()
+
+
+def open_instrument(resource_name: str, baud_rate: int = 9600) -> Any:
+    """
+    Open the connection to a device.
+
+    Args:
+        resource_name (str): 'serial://<port>' to open a serial port with pyserial,
+                             'tcp://<host>:<port>' to connect to a terminal server,
+                             otherwise a VISA resource name, e.g. 'ASRL3::INSTR'
+        baud_rate (int): serial baud rate, set on the terminal server for tcp://
+
+    Returns:
+        Any: pyvisa resource or transport with the same interface
+    """
+    if resource_name.startswith("serial://"):
+        return SerialTransport(resource_name[len("serial://") :], baud_rate=baud_rate)
+    elif resource_name.startswith("tcp://"):
+        host, _, port = resource_name[len("tcp://") :].rpartition(":")
+        return SocketTransport(host, int(port))
+
+    return resource_manager().open_resource(
+        resource_name=resource_name, baud_rate=baud_rate
+    )
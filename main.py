@@ -1,14 +1,133 @@
 import sys, os, time
 import logging, traceback
-import configparser, queue
-from collections import deque
+import configparser, threading, queue
 import PyQt5
 import PyQt5.QtWidgets as qt
 import numpy as np
-import qdarkstyle, pyvisa
+import qdarkstyle
 
 import widgets
 from big_sky_yag import BigSkyYag
+from big_sky_yag.command_queue import CommandQueue
+from big_sky_yag.daemon import YagDaemon
+from big_sky_yag.emulator import YagEmulator
+from big_sky_yag.metrics import LatencyStats
+from big_sky_yag.pool import POOL
+from big_sky_yag.telemetry import TelemetryArchive, TelemetryRecorder
+from big_sky_yag.transports import resource_manager
+
+# label type, snapshot field shown on the label, and the function formatting the field value
+LABEL_TABLE = [
+    ("serial_number", "serial_number", str),
+    ("pump_status", "pump", lambda v: "ON" if v else "OFF"),
+    ("temperature_C", "temperature_cooling_group", str),
+    ("shutter_status", "shutter", lambda v: "OPEN" if v else "CLOSED"),
+    ("flashlamp_status", "laser_status", lambda v: v.flashlamp.name),
+    ("simmer_status", "laser_status", lambda v: "ON" if v.simmer else "OFF"),
+    ("flashlamp_trigger", "flashlamp_trigger", lambda v: v.name),
+    ("flashlamp_frequency_Hz", "flashlamp_frequency", "{:.2f}".format),
+    ("flashlamp_voltage_V", "flashlamp_voltage", str),
+    ("flashlamp_energy_J", "flashlamp_energy", "{:.1f}".format),
+    ("flashlamp_capacitance_uF", "flashlamp_capacitance", "{:.1f}".format),
+    ("flashlamp_counter", "flashlamp_counter", str),
+    ("flashlamp_user_counter", "flashlamp_user_counter", str),
+    ("flashlamp_intlk", "flashlamp_interlock", lambda v: v),
+    ("qswitch_status", "qswitch_status", lambda v: "ON" if v else "OFF"),
+    ("qswitch_mode", "qswitch_mode", lambda v: v.name),
+    ("qswitch_delay_us", "qswitch_delay", str),
+    ("qswitch_freq_divider", "qswitch_frequency_divider", str),
+    ("qswitch_burst_pulses", "qswitch_pulses", str),
+    ("qswitch_counter", "qswitch_counter", str),
+    ("qswitch_user_counter", "qswitch_user_counter", str),
+    ("qswitch_intlk", "qswitch_interlock", lambda v: v),
+]
+
+# snapshot fields polled, each once even if several labels show it
+POLL_FIELDS = list(dict.fromkeys(field for _, field, _ in LABEL_TABLE))
+
+# snapshot fields to poll right after a command because the command changed them, besides the value it
+# reports itself; commands not listed here may change anything
+CMD_REFRESH = {
+    "toggle_pump": ("flashlamp_interlock", "laser_status"),
+    "toggle_shutter": ("qswitch_interlock",),
+    "toggle_flashlamp": ("laser_status",),
+    "turn_on_simmer": ("laser_status",),
+    "flashlamp_trigger": ("laser_status",),
+    "flashlamp_frequency_Hz": (),
+    "flashlamp_voltage_V": ("flashlamp_energy",),
+    "flashlamp_energy_J": ("flashlamp_voltage",),
+    "flashlamp_capacitance_uF": ("flashlamp_voltage", "flashlamp_energy"),
+    "reset_flashlamp_user_counter": (),
+    "toggle_qswitch": ("laser_status",),
+    "qswitch_mode": ("laser_status",),
+    "qswitch_delay_us": (),
+    "qswitch_freq_divider": (),
+    "qswitch_burst_pulses": (),
+    "reset_qswitch_user_counter": (),
+    "activate_yag": ("laser_status", "shutter", "qswitch_status", "qswitch_interlock"),
+    "loop_cycle_seconds": (),
+}
+
+# setpoint commands, only the latest value of each is sent if the worker falls behind
+COALESCED_CMDS = (
+    "flashlamp_trigger",
+    "flashlamp_frequency_Hz",
+    "flashlamp_voltage_V",
+    "flashlamp_energy_J",
+    "flashlamp_capacitance_uF",
+    "qswitch_mode",
+    "qswitch_delay_us",
+    "qswitch_freq_divider",
+    "qswitch_burst_pulses",
+    "loop_cycle_seconds",
+)
+
+# start/stop buttons, queued as urgent when they stop the laser so they jump ahead of pending setpoints and
+# polling; their value is the requested action, "start" or "stop", or None if the worker decides
+START_STOP_CMDS = ("activate_yag", "toggle_flashlamp", "toggle_qswitch")
+
+# com port name selecting the software emulator instead of a real YAG
+EMULATOR_PORT = "emulator"
+
+# number of fields polled in one transaction, queued commands are executed in between
+POLL_CHUNK_SIZE = 4
+
+# label backgrounds for a failed read/write, a normal value, and an active state
+STYLE_FAIL = "QLabel{background: red}"
+STYLE_NORMAL = "QLabel{background: transparent}"
+STYLE_ACTIVE = "QLabel{background: green}"
+
+def plain_label(success, value):
+    """Text and style of a label showing a value."""
+
+    return value, STYLE_NORMAL if success else STYLE_FAIL
+
+def active_label(*active):
+    """Label renderer highlighting the values in `active`, e.g. a running flashlamp."""
+
+    def render(success, value):
+        if not success:
+            return value, STYLE_FAIL
+        return value, STYLE_ACTIVE if value in active else STYLE_NORMAL
+    return render
+
+def interlock_label(name, attr):
+    """Label renderer for one interlock `attr` of an interlock state."""
+
+    def render(success, value):
+        if not success:
+            return value, STYLE_FAIL
+        failed = getattr(value, attr)
+        return f"{name}: Failed" if failed else f"{name}: Pass", STYLE_FAIL if failed else STYLE_NORMAL
+    return render
+
+def latency_label(success, value):
+    """Text of the command latency label, its style is left as is."""
+
+    return f"{value['p50']*1e3:.0f} / {value['p95']*1e3:.0f} / {value['max']*1e3:.0f}", None
+
+# lines kept in the event log view, older lines are dropped
+EVENT_LOG_MAX_LINES = 10000
 
 def pt_to_px(pt):
     """Convert GUI widget size from unit pt to unit px using monitor dpi"""
@@ -16,40 +135,101 @@ def pt_to_px(pt):
     return round(pt*monitor_dpi/72)
 
 
+class LogWriter:
+    """Appends event log lines to the monthly log files on a thread of its own. Lines queued while a batch is
+    written are written together, with one open and flush per batch."""
+
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def write(self, msg):
+        """Queue a line, the log file is chosen by the time it is queued."""
+
+        self.queue.put(("logging/log_" + time.strftime("%b%Y") + ".txt", msg))
+
+    def close(self):
+        """Write the queued lines and stop the thread."""
+
+        self.queue.put(None)
+        self.thread.join()
+
+    def run(self):
+        running = True
+        while running:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            running = None not in batch
+
+            lines = {}
+            for item in batch:
+                if item is not None:
+                    lines.setdefault(item[0], []).append("\n" + item[1])
+            for filename, msgs in lines.items():
+                try:
+                    with open(filename, "a") as f:
+                        f.write("".join(msgs))
+                except OSError as err:
+                    logging.warning(f"Can't write to event log file {filename}.\n{err}")
+
+
+class GuiDaemon(YagDaemon):
+    """Device loop of the GUI worker, showing every poll cycle on the labels."""
+
+    def __init__(self, worker, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.worker = worker
+
+    def polled(self, snapshots):
+        self.worker.show_snapshots(snapshots)
+
+
 class Worker(PyQt5.QtCore.QObject):
     """A worker class that controls Hornet. This class should be run in a separate thread."""
 
     finished = PyQt5.QtCore.pyqtSignal()
     update = PyQt5.QtCore.pyqtSignal(dict)
+    # (type, success, value) records of all labels read in one poll cycle
+    update_batch = PyQt5.QtCore.pyqtSignal(list)
     update_event_log = PyQt5.QtCore.pyqtSignal(str)
 
     def __init__(self, parent):
         super().__init__()
         self.parent = parent
-        self.cmd_queue = queue.Queue()
+        self.cmd_queue = CommandQueue(coalesce=COALESCED_CMDS)
+        self.cmd_latency = LatencyStats()
+        # whether the last transaction failed, then the COM port session is not reused
+        self.io_failed = False
+        # device loop, created once connected
+        self.daemon = None
+        # whether the flashlamp and the q-switch were running at the last poll, None until polled
+        self.laser_running = {"flashlamp": None, "qswitch": None}
 
     def exec_cmd(self):
          while not self.cmd_queue.empty():
-            config_type, val = self.cmd_queue.get()
+            config_type, val, queued = self.cmd_queue.get()
             try:
                 if config_type == "toggle_pump":
                     self.update_event_log.emit("Toggling pump status...")
-                    self.yag.pump = not self.yag.pump
-                    pump_status = "ON" if self.yag.pump else "OFF"
+                    pump_status = "ON" if self.yag.set("pump", not self.yag.pump) else "OFF"
                     self.update.emit({"type": "pump_status", "success": True, "value": pump_status})
                     self.update_event_log.emit(f"Toggled pump status. It reads {pump_status} now.")
 
                 elif config_type == "toggle_shutter":
                     self.update_event_log.emit("Toggling shutter status...")
-                    self.yag.shutter = not self.yag.shutter
-                    shutter_status = "OPEN" if self.yag.shutter else "CLOSED"
+                    shutter_status = "OPEN" if self.yag.set("shutter", not self.yag.shutter) else "CLOSED"
                     self.update.emit({"type": "shutter_status", "success": True, "value": shutter_status})
                     self.update_event_log.emit(f"Toggled shutter status. It reads {shutter_status} now.")
 
                 elif config_type == "toggle_flashlamp":
                     self.update_event_log.emit("Toggling flashlamp status...")
                     flashlamp_status = self.yag.laser_status.flashlamp
-                    if flashlamp_status.name in ["START", "SINGLE"]:
+                    if self.stops(val, flashlamp_status.name in ["START", "SINGLE"]):
                         self.yag.flashlamp.stop()
                     elif flashlamp_status.name == "STOP":
                         self.yag.flashlamp.activate()
@@ -66,95 +246,90 @@ class Worker(PyQt5.QtCore.QObject):
 
                 elif config_type == "flashlamp_trigger":
                     self.update_event_log.emit("Setting flashlamp trigger...")
-                    self.yag.flashlamp.trigger = val
-                    trigger = self.yag.flashlamp.trigger.name
+                    trigger = self.yag.flashlamp.set("trigger", val).name
                     self.update.emit({"type": config_type, "success": True, "value": trigger})
                     self.update_event_log.emit(f"Set flashlamp trigger status. It reads {trigger} now.")
 
                 elif config_type == "flashlamp_frequency_Hz":
                     self.update_event_log.emit("Setting flashlamp frequency...")
-                    self.yag.flashlamp.frequency = val
-                    freq = "{:.2f}".format(self.yag.flashlamp.frequency)
+                    freq = "{:.2f}".format(self.yag.flashlamp.set("frequency", val))
                     self.update.emit({"type": config_type, "success": True, "value": freq})
                     self.update_event_log.emit(f"Set flashlamp frequency. It reads {freq} Hz now.")
 
                 elif config_type == "flashlamp_voltage_V":
                     self.update_event_log.emit("Setting flashlamp frequency...")
-                    self.yag.flashlamp.voltage = val
-                    voltage = str(self.yag.flashlamp.voltage)
+                    voltage = str(self.yag.flashlamp.set("voltage", val))
                     self.update.emit({"type": config_type, "success": True, "value": voltage})
                     self.update_event_log.emit(f"Set flashlamp voltage. It reads {voltage} V now.")
 
                 elif config_type == "flashlamp_energy_J":
                     self.update_event_log.emit("Setting flashlamp energy...")
-                    self.yag.flashlamp.energy = val
-                    energy = "{:.1f}".format(self.yag.flashlamp.energy)
+                    energy = "{:.1f}".format(self.yag.flashlamp.set("energy", val))
                     self.update.emit({"type": config_type, "success": True, "value": energy})
                     self.update_event_log.emit(f"Set flashlamp energy. It reads {energy} J now.")
 
                 elif config_type == "flashlamp_capacitance_uF":
                     self.update_event_log.emit("Setting flashlamp capacitance...")
-                    self.yag.flashlamp.capacitance = val
-                    cap = "{:.1f}".format(self.yag.flashlamp.capacitance)
+                    cap = "{:.1f}".format(self.yag.flashlamp.set("capacitance", val))
                     self.update.emit({"type": config_type, "success": True, "value": cap})
                     self.update_event_log.emit(f"Set flashlamp capacitance. It reads {cap} uF now.")
 
                 elif config_type == "reset_flashlamp_user_counter":
                     self.update_event_log.emit("Resetting flashlamp user counter...")
-                    self.yag.flashlamp.user_counter_reset()
-                    count = str(self.yag.flashlamp.user_counter)
+                    count = str(self.yag.flashlamp.user_counter_reset())
                     self.update.emit({"type": "flashlamp_user_counter", "success": True, "value": count})
                     self.update_event_log.emit(f"Reset flashlamp user counter. It reads {count} now.")
 
                 elif config_type == "toggle_qswitch":
                     self.update_event_log.emit("Toggling QSwitch status...")
-                    if self.yag.qswitch.status:
+                    if self.stops(val, self.yag.qswitch.status):
                         self.yag.qswitch.stop()
                         time.sleep(0.05)
-                        self.yag.qswitch.off()
+                        qswitch_status = self.yag.qswitch.off()
                     else:
-                        self.yag.qswitch.on()
+                        qswitch_status = self.yag.qswitch.on()
                         time.sleep(0.05)
                         self.yag.qswitch.start()
-                    status = "ON" if self.yag.qswitch.status else "OFF"
+                    status = "ON" if qswitch_status else "OFF"
                     self.update.emit({"type": "qswitch_status", "success": True, "value": status})
                     self.update_event_log.emit(f"Toggled QSwitch status. It reads {status} now.")
 
                 elif config_type == "qswitch_mode":
                     self.update_event_log.emit("Setting QSwitch mode...")
-                    self.yag.qswitch.mode = val
-                    mode = self.yag.qswitch.mode.name
+                    mode = self.yag.qswitch.set("mode", val).name
                     self.update.emit({"type": config_type, "success": True, "value": mode})
                     self.update_event_log.emit(f"Set QSwitch mode. It reads {mode} now.")
 
                 elif config_type == "qswitch_delay_us":
                     self.update_event_log.emit("Setting QSwitch delay...")
-                    self.yag.qswitch.delay = val
-                    delay = str(self.yag.qswitch.delay)
+                    delay = str(self.yag.qswitch.set("delay", val))
                     self.update.emit({"type": config_type, "success": True, "value": delay})
                     self.update_event_log.emit(f"Set QSwitch delay. It reads {delay} us now.")
 
                 elif config_type == "qswitch_freq_divider":
                     self.update_event_log.emit("Setting QSwitch frequency divider...")
-                    self.yag.qswitch.frequency_divider = val
-                    freq_divider = str(self.yag.qswitch.frequency_divider)
+                    freq_divider = str(self.yag.qswitch.set("frequency_divider", val))
                     self.update.emit({"type": config_type, "success": True, "value": freq_divider})
                     self.update_event_log.emit(f"Set QSwitch frequency divider. It reads {freq_divider} now.")
 
                 elif config_type == "qswitch_burst_pulses":
                     self.update_event_log.emit("Setting QSwitch burst pulses...")
-                    self.yag.qswitch.pulses = val
-                    pulses = str(self.yag.qswitch.pulses)
+                    pulses = str(self.yag.qswitch.set("pulses", val))
                     self.update.emit({"type": config_type, "success": True, "value": pulses})
                     self.update_event_log.emit(f"Set QSwitch burst pulses. It reads {pulses} now.")
 
                 elif config_type == "reset_qswitch_user_counter":
                     self.update_event_log.emit(f"Resetting QSwitch user counter...")
-                    self.yag.qswitch.user_counter_reset()
-                    count = str(self.yag.qswitch.user_counter)
+                    count = str(self.yag.qswitch.user_counter_reset())
                     self.update.emit({"type": "qswitch_user_counter", "success": True, "value": count})
                     self.update_event_log.emit(f"Reset QSwitch user counter. It reads {count} now.")
 
+                elif config_type == "loop_cycle_seconds":
+                    self.scheduler.retry_interval = val
+                    for field in POLL_FIELDS:
+                        if not self.parent.config.has_option("polling", field):
+                            self.scheduler.set_interval(field, val)
+
                 elif config_type == "custom_command":
                     self.update_event_log.emit(f"Sending custom command '{val}'...")
                     retval = self.yag.write(val)
@@ -162,38 +337,40 @@ class Worker(PyQt5.QtCore.QObject):
 
                 elif config_type == "activate_yag":
                     flashlamp_status = self.yag.laser_status.flashlamp.name
-                    if flashlamp_status in ["START", "SINGLE"]:
+                    if self.stops(val, flashlamp_status in ["START", "SINGLE"]):
                         self.update_event_log.emit("Deactivating YAG...")
                         self.yag.flashlamp.stop()
                         time.sleep(0.05)
                         self.yag.qswitch.stop()
                         time.sleep(0.05)
-                        self.yag.qswitch.off()
+                        qswitch_status = self.yag.qswitch.off()
                         time.sleep(0.05)
                         flashlamp_status = self.yag.laser_status.flashlamp.name
                         shutter_status = self.yag.shutter
-                        qswitch_status = self.yag.qswitch.status
                         if (flashlamp_status == "STOP") and (not shutter_status) and (not qswitch_status):
                             return_str = "Deactivated YAG. "
                         else:
                             return_str = "Fail to deactivate YAG. "
                     elif flashlamp_status == "STOP":
                         self.update_event_log.emit("Activating YAG...")
-                        self.yag.shutter = True
+                        shutter_status = self.yag.set("shutter", True)
                         time.sleep(0.05)
-                        self.yag.qswitch.on()
+                        qswitch_status = self.yag.qswitch.on()
                         time.sleep(0.05)
                         self.yag.qswitch.start()
                         time.sleep(0.05)
                         self.yag.flashlamp.activate()
                         time.sleep(0.05)
                         flashlamp_status = self.yag.laser_status.flashlamp.name
-                        shutter_status = self.yag.shutter
-                        qswitch_status = self.yag.qswitch.status
                         if (flashlamp_status in ["START", "SINGLE"]) and (shutter_status) and (qswitch_status):
                             return_str = "Activated YAG. "
                         else:
                             return_str = "Fail to activate YAG. "
+                    else:
+                        # asked to start while already running
+                        qswitch_status = self.yag.qswitch.status
+                        shutter_status = self.yag.shutter
+                        return_str = "YAG is already active. "
 
                     return_str += f"Flashlamp reads {flashlamp_status} now. "
                     return_str += "Qswitch reads ON. " if qswitch_status else "Qswitch reads OFF. "
@@ -211,294 +388,125 @@ class Worker(PyQt5.QtCore.QObject):
                     # RunTime Error could be raised when COM port is disconnected and this object is deleted
                     pass
 
+                # the YAG state is unknown after a failed command
+                self.scheduler.refresh()
+                self.io_failed = True
 
-    def run(self):
-        """Repeatedly read from the device."""
-
-        try:
-            self.yag = BigSkyYag(resource_name=self.parent.config["setting"]["com_port"])
-            self.update_event_log.emit(f'Connected to {self.parent.config["setting"]["com_port"]}.')
-        except Exception as err:
-            self.update_event_log.emit(f"Can't connect to Big Sky YAG at COM port {self.parent.config['setting']['com_port']}.\n"+str(err))
-            self.finished.emit()
-            return
-
-        t0 = 0
-        while self.parent.running:
-            self.exec_cmd()
-
-            if self.parent.running and (time.time() - t0 > self.parent.config.getfloat("setting", "loop_cycle_seconds")):
-                t0 = time.time()
-
-                try:
-                    self.update.emit({"type": "serial_number", "success": True, "value": self.yag.serial_number})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "serial_number", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG serial number.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
-
-                try:
-                    self.update.emit({"type": "pump_status", "success": True, "value": "ON" if self.yag.pump else "OFF"})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "pump_status", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG pump status.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
-
-                try:
-                    self.update.emit({"type": "temperature_C", "success": True, "value": str(self.yag.temperature_cooling_group)})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "temperature_C", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG cooling group temperature.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
-
-                try:
-                    self.update.emit({"type": "shutter_status", "success": True, "value": "OPEN" if self.yag.shutter else "CLOSED"})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "shutter_status", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG shutter status.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
-
-                try:
-                    self.update.emit({"type": "flashlamp_status", "success": True, "value": self.yag.laser_status.flashlamp.name})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "flashlamp_status", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG flashlamp status.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
-
-                try:
-                    self.update.emit({"type": "simmer_status", "success": True, "value": "ON" if self.yag.laser_status.simmer else "OFF"})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "simmer_status", "success": False,  "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG simmer status.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
-
-                try:
-                    self.update.emit({"type": "flashlamp_trigger", "success": True, "value": self.yag.flashlamp.trigger.name})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "flashlamp_trigger", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG flashlamp trigger.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
-
-                try:
-                    self.update.emit({"type": "flashlamp_frequency_Hz", "success": True, "value": "{:.2f}".format(self.yag.flashlamp.frequency)})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "flashlamp_frequency_Hz", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG flashlamp frequency.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
-
-                try:
-                    self.update.emit({"type": "flashlamp_voltage_V", "success": True, "value": str(self.yag.flashlamp.voltage)})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "flashlamp_voltage_V", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG flashlamp voltage.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
+            else:
+                self.scheduler.refresh(CMD_REFRESH.get(config_type))
+                self.io_failed = False
 
-                try:
-                    self.update.emit({"type": "flashlamp_energy_J", "success": True, "value": "{:.1f}".format(self.yag.flashlamp.energy)})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "flashlamp_energy_J", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG flashlamp energy.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
+            self.report_latency(time.monotonic() - queued)
 
-                try:
-                    self.update.emit({"type": "flashlamp_capacitance_uF", "success": True, "value": "{:.1f}".format(self.yag.flashlamp.capacitance)})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "flashlamp_capacitance_uF", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG flashlamp capacitance.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
+    def report_latency(self, latency):
+        """Record the latency of a command, from queuing it to its acknowledgement by the device, and show the
+        latency statistics."""
 
-                try:
-                    self.update.emit({"type": "flashlamp_counter", "success": True, "value": str(self.yag.flashlamp.counter)})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "flashlamp_counter", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG flashlamp counter.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
+        self.cmd_latency.record(latency)
+        logging.info(f"Command latency {latency*1e3:.0f} ms.")
+        try:
+            self.update.emit({"type": "cmd_latency", "success": True, "value": self.cmd_latency.summary()})
+        except RuntimeError:
+            pass
 
-                try:
-                    self.update.emit({"type": "flashlamp_user_counter", "success": True, "value": str(self.yag.flashlamp.counter)})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "flashlamp_user_counter", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG flashlamp user counter.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
 
-                try:
-                    self.update.emit({"type": "flashlamp_intlk", "success": True, "value": self.yag.flashlamp.interlock})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "flashlamp_intlk", "success": False, "value": "Fail to read"})
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
+    def poll_intervals(self):
+        """Poll interval of each field from the [polling] config section, 'once' polls a field once per connection.
+        Fields not in that section are polled every loop cycle."""
+
+        intervals = {}
+        for field in POLL_FIELDS:
+            interval = self.parent.config.get("polling", field, fallback=self.parent.config["setting"]["loop_cycle_seconds"])
+            intervals[field] = None if interval == "once" else float(interval)
+        return intervals
+
+    def show_snapshots(self, snapshots):
+        """Record the snapshots of a poll cycle and update the labels of their fields, once for the whole cycle."""
+
+        records = []
+        for snapshot in snapshots:
+            self.io_failed = bool(snapshot.errors)
+            self.parent.telemetry.record(snapshot)
+            if "laser_status" in snapshot.fields and "laser_status" not in snapshot.errors:
+                self.laser_running["flashlamp"] = snapshot.laser_status.flashlamp.name in ["START", "SINGLE"]
+            if "qswitch_status" in snapshot.fields and "qswitch_status" not in snapshot.errors:
+                self.laser_running["qswitch"] = snapshot.qswitch_status
+            for info_type, field, formatter in LABEL_TABLE:
+                if field not in snapshot.fields:
+                    continue
+                if field in snapshot.errors:
+                    records.append((info_type, False, "Fail to read"))
+                else:
+                    records.append((info_type, True, formatter(getattr(snapshot, field))))
 
-                try:
-                    self.update.emit({"type": "qswitch_status", "success": True, "value": "ON" if self.yag.qswitch.status else "OFF"})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "qswitch_status", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG qswitch status.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
+        if records and self.parent.running:
+            try:
+                self.update_batch.emit(records)
+            except RuntimeError:
+                pass
 
-                try:
-                    self.update.emit({"type": "qswitch_mode", "success": True, "value": self.yag.qswitch.mode.name})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "qswitch_mode", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG qswitch mode.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
+    def requested_action(self, config_type):
+        """Action of a start/stop button: "stop" if the last poll found the flashlamp running, or the q-switch
+        for toggle_qswitch, "start" if not, and None before the first poll, then exec_cmd reads the device."""
 
-                try:
-                    self.update.emit({"type": "qswitch_delay_us", "success": True, "value": str(self.yag.qswitch.delay)})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "qswitch_delay_us", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG qswitch delay.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
+        running = self.laser_running["qswitch" if config_type == "toggle_qswitch" else "flashlamp"]
+        if running is None:
+            return None
+        return "stop" if running else "start"
 
-                try:
-                    self.update.emit({"type": "qswitch_freq_divider", "success": True, "value": str(self.yag.qswitch.frequency_divider)})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "qswitch_freq_divider", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG qswitch frequency divider.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
+    def stops(self, val, running):
+        """Whether a start/stop command with value `val` stops, `running` is the current device state."""
 
-                try:
-                    self.update.emit({"type": "qswitch_burst_pulses", "success": True, "value": str(self.yag.qswitch.pulses)})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "qswitch_burst_pulses", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG qswitch burst pulse number.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
+        return val == "stop" or (val is None and running)
 
-                try:
-                    self.update.emit({"type": "qswitch_counter", "success": True, "value": str(self.yag.qswitch.counter)})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "qswitch_counter", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG qswitch counter.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
+    def wake(self):
+        """Execute the queued commands on the device thread, between poll transactions."""
 
-                try:
-                    self.update.emit({"type": "qswitch_user_counter", "success": True, "value": str(self.yag.qswitch.user_counter)})
-                except Exception as err:
-                    try:
-                        self.update.emit({"type": "qswitch_user_counter", "success": False, "value": "Fail to read"})
-                        # self.update_event_log.emit(f"Ununable to read YAG qswitch user counter.\n{err}")
-                    except RuntimeError:
-                        pass
-
-                if not self.parent.running:
-                    break
+        if self.daemon is not None:
+            self.daemon.submit(lambda yag: self.exec_cmd(), refresh=False)
 
-                try:
-                    self.update.emit({"type": "qswitch_intlk", "success": True, "value":self.yag.qswitch.interlock})
-                except Exception as err:
-                    try: 
-                        self.update.emit({"type": "qswitch_intlk", "success": False, "value": "Fail to read"})
-                    except RuntimeError:
-                        pass
+    def stop(self):
+        if self.daemon is not None:
+            self.daemon.stop()
 
-            time.sleep(0.05)
+    def run(self):
+        """Poll the device on the shared daemon loop, which also serves scripts if [setting] daemon_listen is set,
+        so they don't open the COM port themselves."""
 
         try:
-            self.yag.instrument.clear()
-        except pyvisa.errors.VisaIOError as err:
-            pass
+            com_port = self.parent.config["setting"]["com_port"]
+            self.yag = BigSkyYag(resource_name=com_port,
+                                 instrument=YagEmulator() if com_port == EMULATOR_PORT else None,
+                                 pool=POOL,
+                                 cache_max_age=self.parent.config.getfloat("setting", "cache_max_age_seconds", fallback=0.2))
+            self.update_event_log.emit(f'Connected to {self.parent.config["setting"]["com_port"]}.')
+        except Exception as err:
+            self.update_event_log.emit(f"Can't connect to Big Sky YAG at COM port {self.parent.config['setting']['com_port']}.\n"+str(err))
+            self.finished.emit()
+            return
+
+        self.daemon = GuiDaemon(self, self.yag, self.poll_intervals(), chunk_size=POLL_CHUNK_SIZE,
+                                retry_interval=self.parent.config.getfloat("setting", "loop_cycle_seconds"))
+        self.scheduler = self.daemon.scheduler
+        listen = self.parent.config.get("setting", "daemon_listen", fallback="")
+        if listen:
+            try:
+                self.daemon.serve(listen)
+                self.update_event_log.emit(f"Serving clients on {listen}.")
+            except (OSError, ValueError) as err:
+                self.update_event_log.emit(f"Can't serve clients on {listen}.\n{err}")
+
+        # commands queued while connecting
+        self.wake()
+        # stop_control may have run before the daemon existed
+        if self.parent.running:
+            self.daemon.run()
+        self.daemon.stop()
 
         try:
-            self.yag.instrument.close()
-        except pyvisa.errors.VisaIOError as err:
+            # keep the COM port open for reconnecting, unless the YAG stopped answering
+            self.yag.close(discard=self.io_failed)
+        except Exception as err:
             pass
 
         self.finished.emit()
@@ -511,7 +519,8 @@ class mainWindow(qt.QMainWindow):
         super().__init__()
         self.app = app
         self.running = True
-        self.event_log_deque = deque(maxlen=10000)
+        self.log_writer = LogWriter()
+        self.log_viewer = None
         # logging.getLogger().setLevel("INFO")
 
         self.config = configparser.ConfigParser()
@@ -525,6 +534,15 @@ class mainWindow(qt.QMainWindow):
         self.config.optionxform = str
         self.config.read("main_config_latest.ini")
 
+        # every polled value, archived if a telemetry directory is set
+        archive = None
+        if self.config.get("setting", "telemetry_directory", fallback=""):
+            try:
+                archive = TelemetryArchive(self.config["setting"]["telemetry_directory"])
+            except (OSError, ValueError) as err:
+                logging.warning(f"Can't open telemetry archive.\n{err}")
+        self.telemetry = TelemetryRecorder(archive=archive)
+
         self.setCentralWidget(self.box)
         self.resize(self.config.getint("general", "window_width"), self.config.getint("general", "window_height"))
         self.setWindowTitle("BigSky-YAG-control")
@@ -546,6 +564,10 @@ class mainWindow(qt.QMainWindow):
         event_log_box = self.place_event_log_controls()
         self.box.frame.addWidget(event_log_box, 2, 0)
 
+        self.label_dispatch = self.build_label_dispatch()
+        # last (success, value) shown per label type
+        self.label_records = {}
+
         self.show()
 
         self.update_event_log("This program controls Big Sky/Quantel YAG Laser.")
@@ -561,7 +583,7 @@ class mainWindow(qt.QMainWindow):
         self.activate_yag_pb = qt.QPushButton("\nActivate/Deactivate YAG\n")
         self.activate_yag_pb.setStyleSheet("QPushButton{font: 15pt;}")
         self.activate_yag_pb.setToolTip("Activate: shutter-->Qswitch-->flashlamp\nDeactivate: flashlamp-->Qswitch")
-        self.activate_yag_pb.clicked[bool].connect(lambda val, config_type="activate_yag": self.update_config(config_type))
+        self.activate_yag_pb.clicked[bool].connect(lambda val, config_type="activate_yag": self.update_config(config_type, self.worker.requested_action(config_type)))
         ctrl_box.frame.addWidget(self.activate_yag_pb, 0, 0)
 
         return ctrl_box
@@ -590,6 +612,7 @@ class mainWindow(qt.QMainWindow):
         # self.loop_cycle_dsb.valueChanged[float].connect(lambda val, config_type="loop_cycle_seconds": self.update_config(config_type, val))
         # self.loop_cycle_dsb.editingFinished.connect(lambda dsb=self.loop_cycle_dsb, config_type="loop_cycle_seconds": self.update_config(config_type, dsb.value()))
         self.loop_cycle_dsb.editingFinished.connect(lambda val="": self.update_config("loop_cycle_seconds", self.loop_cycle_dsb.value()))
+        self.loop_cycle_dsb.setToolTip("Poll interval of parameters not listed in the [polling] config section.")
         ctrl_box.frame.addWidget(self.loop_cycle_dsb, 2, 1)
 
         ctrl_box.frame.addWidget(qt.QLabel("Configurations:"), 3, 0, alignment=PyQt5.QtCore.Qt.AlignRight)
@@ -630,6 +653,11 @@ class mainWindow(qt.QMainWindow):
         self.toggle_shutter_pb.clicked[bool].connect(lambda val, config_type="toggle_shutter": self.update_config(config_type))
         ctrl_box.frame.addWidget(self.toggle_shutter_pb, 9, 2)
 
+        ctrl_box.frame.addWidget(qt.QLabel("Cmd latency (ms, p50/p95/max):"), 10, 0, alignment=PyQt5.QtCore.Qt.AlignRight)
+        self.cmd_latency_la = qt.QLabel("N/A")
+        self.cmd_latency_la.setToolTip("Time from clicking a control to the YAG acknowledging the command, over the last 100 commands.")
+        ctrl_box.frame.addWidget(self.cmd_latency_la, 10, 1)
+
         # let column 100 grow if there are extra space (row index start from 0, default stretch is 0)
         ctrl_box.frame.setRowStretch(100, 1)
 
@@ -647,7 +675,7 @@ class mainWindow(qt.QMainWindow):
         self.flashlamp_status_la = qt.QLabel("N/A")
         ctrl_box.frame.addWidget(self.flashlamp_status_la, 0, 1)
         self.toggle_flashlamp_pb = qt.QPushButton("Toggle flashlamp status")
-        self.toggle_flashlamp_pb.clicked[bool].connect(lambda val, config_type="toggle_flashlamp": self.update_config(config_type))
+        self.toggle_flashlamp_pb.clicked[bool].connect(lambda val, config_type="toggle_flashlamp": self.update_config(config_type, self.worker.requested_action(config_type)))
         ctrl_box.frame.addWidget(self.toggle_flashlamp_pb, 0, 2)
 
         ctrl_box.frame.addWidget(qt.QLabel("Flashlamp simmer:"), 1, 0, alignment=PyQt5.QtCore.Qt.AlignRight)
@@ -757,7 +785,7 @@ class mainWindow(qt.QMainWindow):
         self.qswitch_status_la = qt.QLabel("N/A")
         ctrl_box.frame.addWidget(self.qswitch_status_la, 0, 1)
         self.toggle_qswitch_pb = qt.QPushButton("Toggle qswitch status")
-        self.toggle_qswitch_pb.clicked[bool].connect(lambda val, config_type="toggle_qswitch": self.update_config(config_type))
+        self.toggle_qswitch_pb.clicked[bool].connect(lambda val, config_type="toggle_qswitch": self.update_config(config_type, self.worker.requested_action(config_type)))
         ctrl_box.frame.addWidget(self.toggle_qswitch_pb, 0, 2)
 
         ctrl_box.frame.addWidget(qt.QLabel("QSwitch mode:"), 1, 0, alignment=PyQt5.QtCore.Qt.AlignRight)
@@ -836,27 +864,36 @@ class mainWindow(qt.QMainWindow):
         self.clear_log_pb = qt.QPushButton('Clear event log')
         event_log_box.frame.addWidget(self.clear_log_pb, 0, 0)
 
-        self.event_log_tb = qt.QTextBrowser()
+        self.browse_log_pb = qt.QPushButton('Browse log files')
+        self.browse_log_pb.setToolTip("Search the event log files of past months")
+        self.browse_log_pb.clicked[bool].connect(lambda val: self.browse_log_files())
+        event_log_box.frame.addWidget(self.browse_log_pb, 0, 1)
+
+        self.event_log_tb = qt.QPlainTextEdit()
+        self.event_log_tb.setReadOnly(True)
+        self.event_log_tb.setMaximumBlockCount(EVENT_LOG_MAX_LINES)
         self.clear_log_pb.clicked[bool].connect(lambda val: self.clear_event_log())
-        event_log_box.frame.addWidget(self.event_log_tb, 1, 0)
+        event_log_box.frame.addWidget(self.event_log_tb, 1, 0, 1, 2)
 
         return event_log_box
 
-    def update_event_log(self, msg=None):
-        if msg is not None:
-            msg = f"{time.strftime('%Y/%m/%d %H:%M:%S')}: {msg}"
-            self.event_log_deque.append(msg)
-            filename = "logging/log_" + time.strftime("%b%Y") + ".txt"
-            with open(filename, "a") as f:
-                f.write("\n"+msg)
+    def update_event_log(self, msg):
+        """Append a message to the event log view, and queue it for the log file."""
 
-            
-        self.event_log_tb.setText("\n".join(self.event_log_deque))
+        msg = f"{time.strftime('%Y/%m/%d %H:%M:%S')}: {msg}"
+        self.log_writer.write(msg)
+
+        self.event_log_tb.appendPlainText(msg)
         self.event_log_tb.moveCursor(PyQt5.QtGui.QTextCursor.End)
 
     def clear_event_log(self):
         self.event_log_tb.clear()
-        self.event_log_deque.clear()
+
+    def browse_log_files(self):
+        if self.log_viewer is None or not self.log_viewer.isVisible():
+            self.log_viewer = widgets.LogViewer("logging")
+        self.log_viewer.show()
+        self.log_viewer.raise_()
 
     # for a really nice tutorial for QThread(), see https://realpython.com/python-pyqt-qthread/
     def start_control(self):
@@ -873,10 +910,23 @@ class mainWindow(qt.QMainWindow):
         self.worker.finished.connect(self.worker.deleteLater)
         self.thread.finished.connect(self.thread.deleteLater)
         self.worker.update[dict].connect(self.update_labels)
+        self.worker.update_batch[list].connect(self.update_label_batch)
         self.worker.update_event_log[str].connect(self.update_event_log)
 
         self.thread.start()
 
+    def stop_control(self):
+        """Stop the worker thread, and wait for it to close the COM port."""
+
+        self.running = False
+        try:
+            # wake the worker if it is waiting for the next poll
+            self.worker.stop()
+            self.thread.quit()
+            self.thread.wait()
+        except RuntimeError as err:
+            pass
+
     def update_config(self, config_type, val=None):
         # print((config_type, val))
 
@@ -885,167 +935,80 @@ class mainWindow(qt.QMainWindow):
 
         if config_type == "com_port":
             self.reconnect_com()
-        elif config_type == "loop_cycle_seconds":
-            return
         else:
-            self.worker.cmd_queue.put((config_type, val))
+            # commands stopping the laser jump ahead of pending setpoints and polling, as do start/stop commands
+            # whose direction is only known once executed
+            urgent = config_type in START_STOP_CMDS and val != "start"
+            self.worker.cmd_queue.put(config_type, val, urgent=urgent)
+            self.worker.wake()
+
+    def build_label_dispatch(self):
+        """Labels showing each update type, with the function rendering their text and style from the
+        success state and value of an update."""
+
+        return {
+            "serial_number": [(self.serial_number_la, plain_label)],
+            "temperature_C": [(self.temp_la, plain_label)],
+            "pump_status": [(self.pump_status_la, active_label("ON"))],
+            "shutter_status": [(self.shutter_status_la, active_label("OPEN"))],
+            "flashlamp_status": [(self.flashlamp_status_la, active_label("START", "SINGLE"))],
+            "simmer_status": [(self.flashlamp_simmer_la, active_label("ON"))],
+            "flashlamp_trigger": [(self.flashlamp_trigger_la, plain_label)],
+            "flashlamp_frequency_Hz": [(self.flashlamp_frequency_la, plain_label)],
+            "flashlamp_voltage_V": [(self.flashlamp_voltage_la, plain_label)],
+            "flashlamp_energy_J": [(self.flashlamp_energy_la, plain_label)],
+            "flashlamp_capacitance_uF": [(self.flashlamp_capacitance_la, plain_label)],
+            "flashlamp_counter": [(self.flashlamp_counter_la, plain_label)],
+            "flashlamp_user_counter": [(self.flashlamp_user_counter_la, plain_label)],
+            "flashlamp_intlk": [
+                (self.flashlamp_intlk_water_flow_la, interlock_label("Water flow", "WATER_FLOW")),
+                (self.flashlamp_intlk_water_level_la, interlock_label("Water level", "WATER_LEVEL")),
+                (self.flashlamp_intlk_lamp_head_la, interlock_label("Lamp head conn", "LAMP_HEAD_CONN")),
+                (self.flashlamp_intlk_auxiliary_la, interlock_label("Auxiliary conn", "AUXILIARY_CONN")),
+                (self.flashlamp_intlk_external_la, interlock_label("External intlk", "EXT_INTERLOCK")),
+                (self.flashlamp_intlk_cover_la, interlock_label("Cover status", "COVER_OPEN")),
+                (self.flashlamp_intlk_capacitor_la, interlock_label("Capacitor status", "CAPACITOR_LOAD_FAIL")),
+                (self.flashlamp_intlk_simmer_la, interlock_label("Simmer status", "SIMMER_FAIL")),
+                (self.flashlamp_intlk_water_temp_la, interlock_label("Water temp", "WATER_TEMP")),
+            ],
+            "qswitch_status": [(self.qswitch_status_la, active_label("ON"))],
+            "qswitch_mode": [(self.qswitch_mode_la, plain_label)],
+            "qswitch_delay_us": [(self.qswitch_delay_la, plain_label)],
+            "qswitch_freq_divider": [(self.qswitch_freq_divider_la, plain_label)],
+            "qswitch_burst_pulses": [(self.qswitch_burst_pulses_la, plain_label)],
+            "qswitch_counter": [(self.qswitch_counter_la, plain_label)],
+            "qswitch_user_counter": [(self.qswitch_user_counter_la, plain_label)],
+            "qswitch_intlk": [
+                (self.qswitch_intlk_emission_la, interlock_label("Emission allowed", "EMISSION_INHIBITED")),
+                (self.qswitch_intlk_water_temp_la, interlock_label("Water temp", "WATER_TEMP")),
+                (self.qswitch_intlk_shutter_la, interlock_label("Shutter status", "SHUTTER_CLOSED")),
+            ],
+            "cmd_latency": [(self.cmd_latency_la, latency_label)],
+        }
 
     # @PyQt5.QtCore.pyqtSlot(dict)
     def update_labels(self, info_dict):
-        if info_dict["type"] == "serial_number":
-            self.serial_number_la.setText(info_dict["value"])
-            self.serial_number_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "temperature_C":
-            self.temp_la.setText(info_dict["value"])
-            self.temp_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "pump_status":
-            self.pump_status_la.setText(info_dict["value"])
-            if info_dict["success"]:
-                self.pump_status_la.setStyleSheet("QLabel{background: green}" if info_dict["value"] == "ON" else "QLabel{background: transparent}")
-            else:
-                self.pump_status_la.setStyleSheet("QLabel{background: red}")
-
-        elif info_dict["type"] == "shutter_status":
-            self.shutter_status_la.setText(info_dict["value"])
-            if info_dict["success"]:
-                self.shutter_status_la.setStyleSheet("QLabel{background: green}" if info_dict["value"] == "OPEN" else "QLabel{background: transparent}")
-            else:
-                self.shutter_status_la.setStyleSheet("QLabel{background: red}")
-
-        elif info_dict["type"] == "flashlamp_status":
-            self.flashlamp_status_la.setText(info_dict["value"])
-            if info_dict["success"]:
-                self.flashlamp_status_la.setStyleSheet("QLabel{background: green}" if info_dict["value"] in ["START", "SINGLE"] else "QLabel{background: Transparent}")
-            else:
-                self.flashlamp_status_la.setStyleSheet("QLabel{background: red}")
-
-        elif info_dict["type"] == "simmer_status":
-            self.flashlamp_simmer_la.setText(info_dict["value"])
-            if info_dict["success"]:
-                self.flashlamp_simmer_la.setStyleSheet("QLabel{background: green}" if info_dict["value"] == "ON" else "QLabel{background: transparent}")
-            else:
-                self.flashlamp_simmer_la.setStyleSheet("QLabel{background: red}")
-
-        elif info_dict["type"] == "flashlamp_trigger":
-            self.flashlamp_trigger_la.setText(info_dict["value"])
-            self.flashlamp_trigger_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "flashlamp_frequency_Hz":
-            self.flashlamp_frequency_la.setText(info_dict["value"])
-            self.flashlamp_frequency_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "flashlamp_voltage_V":
-            self.flashlamp_voltage_la.setText(info_dict["value"])
-            self.flashlamp_voltage_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "flashlamp_energy_J":
-            self.flashlamp_energy_la.setText(info_dict["value"])
-            self.flashlamp_energy_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "flashlamp_capacitance_uF":
-            self.flashlamp_capacitance_la.setText(info_dict["value"])
-            self.flashlamp_capacitance_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "flashlamp_counter":
-            self.flashlamp_counter_la.setText(info_dict["value"])
-            self.flashlamp_counter_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "flashlamp_user_counter":
-            self.flashlamp_user_counter_la.setText(info_dict["value"])
-            self.flashlamp_user_counter_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "flashlamp_intlk":
-            if info_dict["success"]:
-                self.flashlamp_intlk_water_flow_la.setText("Water flow: Failed" if info_dict["value"].WATER_FLOW else "Water flow: Pass")
-                self.flashlamp_intlk_water_flow_la.setStyleSheet("QLabel{background: red}" if info_dict["value"].WATER_FLOW else "QLabel{background: transparent}")
-                self.flashlamp_intlk_water_level_la.setText("Water level: Failed" if info_dict["value"].WATER_LEVEL else "Water level: Pass")
-                self.flashlamp_intlk_water_level_la.setStyleSheet("QLabel{background: red}" if info_dict["value"].WATER_LEVEL else "QLabel{background: transparent}")
-                self.flashlamp_intlk_lamp_head_la.setText("Lamp head conn: Failed" if info_dict["value"].LAMP_HEAD_CONN else "Lamp head conn: Pass")
-                self.flashlamp_intlk_lamp_head_la.setStyleSheet("QLabel{background: red}" if info_dict["value"].LAMP_HEAD_CONN else "QLabel{background: transparent}")
-                self.flashlamp_intlk_auxiliary_la.setText("Auxiliary conn: Failed" if info_dict["value"].AUXILIARY_CONN else "Auxiliary conn: Pass")
-                self.flashlamp_intlk_auxiliary_la.setStyleSheet("QLabel{background: red}" if info_dict["value"].AUXILIARY_CONN else "QLabel{background: transparent}")
-                self.flashlamp_intlk_external_la.setText("External intlk: Failed" if info_dict["value"].EXT_INTERLOCK else "External intlk: Pass")
-                self.flashlamp_intlk_external_la.setStyleSheet("QLabel{background: red}" if info_dict["value"].EXT_INTERLOCK else "QLabel{background: transparent}")
-                self.flashlamp_intlk_cover_la.setText("Cover status: Failed" if info_dict["value"].COVER_OPEN else "Cover status: Pass")
-                self.flashlamp_intlk_cover_la.setStyleSheet("QLabel{background: red}" if info_dict["value"].COVER_OPEN else "QLabel{background: transparent}")
-                self.flashlamp_intlk_capacitor_la.setText("Capacitor status: Failed" if info_dict["value"].CAPACITOR_LOAD_FAIL else "Capacitor status: Pass")
-                self.flashlamp_intlk_capacitor_la.setStyleSheet("QLabel{background: red}" if info_dict["value"].CAPACITOR_LOAD_FAIL else "QLabel{background: transparent}")
-                self.flashlamp_intlk_simmer_la.setText("Simmer status: Failed" if info_dict["value"].SIMMER_FAIL else "Simmer status: Pass")
-                self.flashlamp_intlk_simmer_la.setStyleSheet("QLabel{background: red}" if info_dict["value"].SIMMER_FAIL else "QLabel{background: transparent}")
-                self.flashlamp_intlk_water_temp_la.setText("Water temp: Failed" if info_dict["value"].WATER_TEMP else "Water temp: Pass")
-                self.flashlamp_intlk_water_temp_la.setStyleSheet("QLabel{background: red}" if info_dict["value"].WATER_TEMP else "QLabel{background: transparent}")
-            else:
-                self.flashlamp_intlk_water_flow_la.setText(info_dict["value"])
-                self.flashlamp_intlk_water_flow_la.setStyleSheet("QLabel{background: red}")
-                self.flashlamp_intlk_water_level_la.setText(info_dict["value"])
-                self.flashlamp_intlk_water_level_la.setStyleSheet("QLabel{background: red}")
-                self.flashlamp_intlk_lamp_head_la.setText(info_dict["value"])
-                self.flashlamp_intlk_lamp_head_la.setStyleSheet("QLabel{background: red}")
-                self.flashlamp_intlk_auxiliary_la.setText(info_dict["value"])
-                self.flashlamp_intlk_auxiliary_la.setStyleSheet("QLabel{background: red}")
-                self.flashlamp_intlk_external_la.setText(info_dict["value"])
-                self.flashlamp_intlk_external_la.setStyleSheet("QLabel{background: red}")
-                self.flashlamp_intlk_cover_la.setText(info_dict["value"])
-                self.flashlamp_intlk_cover_la.setStyleSheet("QLabel{background: red}")
-                self.flashlamp_intlk_capacitor_la.setText(info_dict["value"])
-                self.flashlamp_intlk_capacitor_la.setStyleSheet("QLabel{background: red}")
-                self.flashlamp_intlk_simmer_la.setText(info_dict["value"])
-                self.flashlamp_intlk_simmer_la.setStyleSheet("QLabel{background: red}")
-                self.flashlamp_intlk_water_temp_la.setText(info_dict["value"])
-                self.flashlamp_intlk_water_temp_la.setStyleSheet("QLabel{background: red}")
-        
-        elif info_dict["type"] == "qswitch_status":
-            self.qswitch_status_la.setText(info_dict["value"])
-            if info_dict["success"]:
-                self.qswitch_status_la.setStyleSheet("QLabel{background: green}" if info_dict["value"] == "ON" else "QLabel{background: transparent}")
-            else:
-                self.qswitch_status_la.setStyleSheet("QLabel{background: red}")
-
-        elif info_dict["type"] == "qswitch_mode":
-            self.qswitch_mode_la.setText(info_dict["value"])
-            self.qswitch_mode_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "qswitch_delay_us":
-            self.qswitch_delay_la.setText(info_dict["value"])
-            self.qswitch_delay_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "qswitch_freq_divider":
-            self.qswitch_freq_divider_la.setText(info_dict["value"])
-            self.qswitch_freq_divider_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "qswitch_burst_pulses":
-            self.qswitch_burst_pulses_la.setText(info_dict["value"])
-            self.qswitch_burst_pulses_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "qswitch_counter":
-            self.qswitch_counter_la.setText(info_dict["value"])
-            self.qswitch_counter_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "qswitch_user_counter":
-            self.qswitch_user_counter_la.setText(info_dict["value"])
-            self.qswitch_user_counter_la.setStyleSheet("QLabel{background: transparent}" if info_dict["success"] else "QLabel{background: red}")
-
-        elif info_dict["type"] == "qswitch_intlk":
-            if info_dict["success"]:
-                self.qswitch_intlk_emission_la.setText("Emission allowed: Failed" if info_dict["value"].EMISSION_INHIBITED else "Emission allowed: Pass")
-                self.qswitch_intlk_emission_la.setStyleSheet("QLabel{background: red}" if info_dict["value"].EMISSION_INHIBITED else "QLabel{background: transparent}")
-                self.qswitch_intlk_water_temp_la.setText("Water temp: Failed" if info_dict["value"].WATER_TEMP else "Water temp: Pass")
-                self.qswitch_intlk_water_temp_la.setStyleSheet("QLabel{background: red}" if info_dict["value"].WATER_TEMP else "QLabel{background: transparent}")
-                self.qswitch_intlk_shutter_la.setText("Shutter status: Failed" if info_dict["value"].SHUTTER_CLOSED else "Shutter status: Pass")
-                self.qswitch_intlk_shutter_la.setStyleSheet("QLabel{background: red}" if info_dict["value"].SHUTTER_CLOSED else "QLabel{background: transparent}")
-            else:
-                self.qswitch_intlk_emission_la.setText(info_dict["value"])
-                self.qswitch_intlk_emission_la.setStyleSheet("QLabel{background: red}")
-                self.qswitch_intlk_water_temp_la.setText(info_dict["value"])
-                self.qswitch_intlk_water_temp_la.setStyleSheet("QLabel{background: red}")
-                self.qswitch_intlk_shutter_la.setText(info_dict["value"])
-                self.qswitch_intlk_shutter_la.setStyleSheet("QLabel{background: red}")
-
-        else:
-            self.update_event_log(f"Unrecognized command: {info_dict['type']}, {info_dict['success']}, {info_dict['value']}")
-
+        self.update_label_batch([(info_dict["type"], info_dict["success"], info_dict["value"])])
+
+    # @PyQt5.QtCore.pyqtSlot(list)
+    def update_label_batch(self, records):
+        """Update the labels from (type, success, value) records. Labels whose value and success state didn't
+        change keep their text and style, so an unchanged laser state costs no repaints."""
+
+        for info_type, success, value in records:
+            if self.label_records.get(info_type) == (success, value):
+                continue
+            labels = self.label_dispatch.get(info_type)
+            if labels is None:
+                self.update_event_log(f"Unrecognized command: {info_type}, {success}, {value}")
+                continue
+
+            self.label_records[info_type] = (success, value)
+            for label, render in labels:
+                text, style = render(success, value)
+                label.setText(text)
+                if style is not None:
+                    label.setStyleSheet(style)
 
     def refresh_com(self):
         """Get latests list of available com ports. And reconnect to YAG."""
@@ -1065,13 +1028,7 @@ class mainWindow(qt.QMainWindow):
     def reconnect_com(self):
         self.update_event_log(f"Reconnecting to {self.config['setting']['com_port']}...")
 
-        self.running = False
-        try:
-            self.thread.quit()
-            self.thread.wait()
-        except RuntimeError as err:
-            pass
-        time.sleep(0.05)
+        self.stop_control()
 
         self.running = True
         self.start_control() 
@@ -1079,10 +1036,15 @@ class mainWindow(qt.QMainWindow):
     def get_com_port_list(self):
         """Get a list of com ports that have device connected."""
 
-        rm = pyvisa.ResourceManager()
-        return rm.list_resources()
+        return [*resource_manager().list_resources(), EMULATOR_PORT]
 
     def closeEvent(self, event):
+        self.stop_control()
+        self.telemetry.close()
+        if self.log_viewer is not None:
+            self.log_viewer.close()
+        POOL.close_idle()
+
         configfile = open("main_config_latest.ini", "w")
         self.config["general"]["window_width"] = str(self.frameGeometry().width())
         self.config["general"]["window_height"] = str(self.frameGeometry().height())
@@ -1090,6 +1052,7 @@ class mainWindow(qt.QMainWindow):
         configfile.close()
 
         self.update_event_log("Program shut down...")
+        self.log_writer.close()
 
         super().closeEvent(event)
 
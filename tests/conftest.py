@@ -0,0 +1,67 @@
+from typing import Optional
+
+import pytest
+
+from big_sky_yag import BigSkyYag
+from big_sky_yag.emulator import YagEmulator
+
+
+class Line:
+    """
+    Serial line to an emulator that can add stray bytes to the received stream, e.g.
+    an unsolicited line, and stop answering after a number of commands.
+    """
+
+    def __init__(self, emulator: YagEmulator):
+        self.emulator = emulator
+        # bytes received before the reply to the next command
+        self.stray = b""
+        # number of commands answered until the device goes silent, None for all
+        self.answers: Optional[int] = None
+        self._received = b""
+
+    def __getattr__(self, name):
+        return getattr(self.emulator, name)
+
+    @property
+    def bytes_in_buffer(self) -> int:
+        return len(self._received) + self.emulator.bytes_in_buffer
+
+    def receive(self, data: bytes) -> None:
+        """
+        Add `data` to the received bytes now, ahead of any reply.
+        """
+        self._received += data
+
+    def write(self, message: str) -> int:
+        self._received += self.stray
+        self.stray = b""
+        if self.answers is not None:
+            if self.answers == 0:
+                return len(message)
+            self.answers -= 1
+        return self.emulator.write(message)
+
+    def read_bytes(self, count: int) -> bytes:
+        data, self._received = self._received[:count], self._received[count:]
+        if len(data) < count:
+            data += self.emulator.read_bytes(count - len(data))
+        return data
+
+
+@pytest.fixture
+def emulator() -> YagEmulator:
+    # short timeout, reads of a silent device fail fast
+    return YagEmulator(baud_rate=None, timeout=50)
+
+
+@pytest.fixture
+def line(emulator: YagEmulator) -> Line:
+    return Line(emulator)
+
+
+@pytest.fixture
+def yag(line: Line) -> BigSkyYag:
+    yag = BigSkyYag(instrument=line)
+    yield yag
+    yag.close()
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+
+from big_sky_yag.acquisition import CapacitorAcquisition, VoltageStats
+
+# instant capacitor voltage with two shots, 900 -> 880 and 901 -> 879
+VOLTAGES = [900, 902, 898, 900, 880, 899, 901, 879, 890, 900]
+
+
+@pytest.fixture
+def samples(emulator, monkeypatch):
+    """
+    Make the emulator answer VT with `VOLTAGES` in turn.
+    """
+    voltages = iter(VOLTAGES)
+    advance = emulator._advance
+
+    def next_sample():
+        advance()
+        emulator.values["VT"] = next(voltages, 0)
+
+    monkeypatch.setattr(emulator, "_advance", next_sample)
+
+
+def test_statistics_of_known_samples(yag, samples):
+    trace = CapacitorAcquisition(yag, channels=("VT",)).acquire(len(VOLTAGES))
+    assert trace.error is None
+    assert trace.samples("VT")[:, 1].tolist() == VOLTAGES
+    summary = trace.stats["VT"].summary()
+    assert summary["count"] == len(VOLTAGES)
+    assert summary["mean"] == pytest.approx(np.mean(VOLTAGES))
+    assert summary["std"] == pytest.approx(np.std(VOLTAGES))
+    assert (summary["min"], summary["max"]) == (879, 902)
+    assert summary["shots"] == 2
+    assert summary["droop"] == pytest.approx(21)
+    assert summary["droop_max"] == 22
+    # peak-to-peak before the first shot, and from the first to the second shot
+    assert summary["ripple"] == pytest.approx((4 + 21) / 2)
+
+
+def test_charged_capacitor(yag, emulator):
+    emulator.values["V"] = 950
+    emulator.simmer = True
+    trace = CapacitorAcquisition(yag, channels=("VA", "VT")).acquire(20)
+    for channel in ("VA", "VT"):
+        assert trace.count[channel] == 20
+        summary = trace.stats[channel].summary()
+        assert summary["mean"] == 950
+        assert summary["std"] == 0
+        assert summary["shots"] == 0
+        assert summary["ripple"] == 0
+        assert summary["droop"] is None
+    assert (np.diff(trace.samples("VA")[:, 0]) >= 0).all()
+
+
+def test_read_error_ends_acquisition(yag, line, emulator):
+    emulator.simmer = True
+    line.answers = 5
+    trace = CapacitorAcquisition(yag, channels=("VA",), max_pipeline=2).acquire(10)
+    assert trace.error is not None
+    assert trace.count["VA"] == 5
+    assert trace.stats["VA"].summary()["count"] == 5
+    # the line is usable afterwards
+    line.answers = None
+    assert yag.flashlamp.voltage == 900
+
+
+def test_empty_statistics():
+    assert VoltageStats().summary()["mean"] is None
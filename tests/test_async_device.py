@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+
+from big_sky_yag.async_device import AsyncBigSkyYag
+from big_sky_yag.attributes import Flashlamp, QSwitch
+from big_sky_yag.emulator import EmulatorServer
+
+
+@pytest.fixture
+def server(line) -> EmulatorServer:
+    with EmulatorServer(emulator=line) as server:
+        yield server
+
+
+def run(server: EmulatorServer, session) -> None:
+    async def main():
+        reader, writer = await asyncio.open_connection(*server.address)
+        yag = AsyncBigSkyYag(reader, writer, timeout=0.5)
+        try:
+            await session(yag)
+        finally:
+            await yag.close()
+
+    asyncio.run(main())
+
+
+def test_query_round_trip(server, emulator):
+    emulator.values["V"] = 950
+
+    async def session(yag):
+        assert Flashlamp.voltage.parse(await yag.query("V")) == 950
+        assert await yag.flashlamp.voltage == 950
+        assert await yag.flashlamp.voltage.set(1000) == 1000
+        assert emulator.values["V"] == 1000
+
+    run(server, session)
+
+
+def test_query_many_round_trip(server):
+    async def session(yag):
+        replies = await yag.query_many(["V", "W", "V", "F"])
+        assert list(replies) == ["V", "W", "F"]
+        assert Flashlamp.voltage.parse(replies["V"]) == 900
+        assert QSwitch.delay.parse(replies["W"]) == 140
+        assert Flashlamp.frequency.parse(replies["F"]) == 10.0
+
+    run(server, session)
+
+
+def test_stray_frame_during_query(server, line):
+    async def session(yag):
+        # e.g. the late reply to an earlier command, read ahead of the reply
+        line.stray = b"voltage  1000 V\r\n"
+        assert await yag.qswitch.delay == 140
+        line.stray = b"voltage  1000 V\r\n"
+        replies = await yag.query_many(["W", "V"])
+        assert QSwitch.delay.parse(replies["W"]) == 140
+        assert Flashlamp.voltage.parse(replies["V"]) == 900
+        # the following replies are not shifted
+        assert await yag.qswitch.delay == 140
+        assert await yag.flashlamp.voltage == 900
+
+    run(server, session)
+
+
+def test_stale_input_dropped(server, line):
+    async def session(yag):
+        # received before the transaction, e.g. an unsolicited line
+        line.receive(b"voltage  1000 V\r\n")
+        deadline = time.monotonic() + 1
+        while line.bytes_in_buffer and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        assert await yag.flashlamp.voltage == 900
+
+    run(server, session)
+
+
+def test_echo_methods_return_confirmed_values(server, emulator):
+    emulator.values["UC"] = 100
+    emulator.values["UCQ"] = 100
+
+    async def session(yag):
+        assert await yag.flashlamp.user_counter_reset() == 0
+        assert await yag.qswitch.user_counter_reset() == 0
+        assert await yag.qswitch.on() is True
+        assert await yag.qswitch.off() is False
+
+    run(server, session)
@@ -0,0 +1,135 @@
+import pytest
+
+from big_sky_yag import BigSkyYag, cache
+from big_sky_yag.attributes import QSwitchMode
+from big_sky_yag.io_thread import ThreadedBigSkyYag
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def queries(emulator):
+    # commands received by the emulator
+    queries = []
+    write = emulator.write
+
+    def recording_write(message):
+        queries.append(message.strip().lstrip(">"))
+        return write(message)
+
+    emulator.write = recording_write
+    return queries
+
+
+@pytest.fixture
+def cached_yag(line) -> BigSkyYag:
+    yag = BigSkyYag(instrument=line, cache_max_age=1.0)
+    yield yag
+    yag.close()
+
+
+def test_reply_served_until_max_age(cached_yag, emulator, queries, clock):
+    assert cached_yag.flashlamp.voltage == 900
+    emulator.values["V"] = 950
+    clock.now = 1.0
+    assert cached_yag.flashlamp.voltage == 900
+    assert queries == ["V"]
+    clock.now = 1.5
+    assert cached_yag.flashlamp.voltage == 950
+    assert queries == ["V", "V"]
+
+
+def test_disabled_cache(yag, emulator, queries):
+    assert not yag.cache.enabled
+    assert yag.flashlamp.voltage == 900
+    emulator.values["V"] = 950
+    assert yag.flashlamp.voltage == 950
+    assert queries == ["V", "V"]
+
+
+def test_reply_from_before_invalidation_dropped():
+    replies = cache.ReplyCache(max_age=1.0)
+    generation = replies.generation
+    # e.g. a write executed while the query was in flight
+    replies.invalidate("V")
+    replies.put("V", "voltage  900 V", generation)
+    assert replies.get("V") is None
+    replies.put("V", "voltage  950 V", replies.generation)
+    assert replies.get("V") == "voltage  950 V"
+    replies.invalidate()
+    assert replies.get("V") is None
+
+
+def test_reply_read_across_a_write_not_cached(line, emulator, queries):
+    yag = ThreadedBigSkyYag(instrument=line, cache_max_age=1.0)
+    write = emulator.write
+
+    def write_from_other_thread(message):
+        # e.g. the voltage set by another thread while the query is in flight
+        yag.cache.invalidate("V")
+        return write(message)
+
+    emulator.write = write_from_other_thread
+    try:
+        assert yag.flashlamp.voltage == 900
+        emulator.values["V"] = 950
+        assert yag.flashlamp.voltage == 950
+        emulator.write = write
+        assert yag.flashlamp.voltage == 950
+        assert yag.flashlamp.voltage == 950
+    finally:
+        yag.close()
+    assert queries == ["V", "V", "V"]
+
+
+def test_voltage_write_drops_coupled_replies(cached_yag, emulator, queries):
+    energy = cached_yag.flashlamp.energy
+    assert cached_yag.flashlamp.voltage == 900
+    cached_yag.flashlamp.voltage = 1000
+    queries.clear()
+    assert cached_yag.flashlamp.voltage == 1000
+    assert cached_yag.flashlamp.energy > energy
+    # the echo of the write is cached as the voltage reply
+    assert queries == ["ENE"]
+
+
+def test_capacitance_write_drops_coupled_replies(cached_yag, queries):
+    cached_yag.flashlamp.voltage
+    cached_yag.flashlamp.energy
+    cached_yag.flashlamp.capacitance = 32.0
+    queries.clear()
+    cached_yag.flashlamp.voltage
+    cached_yag.flashlamp.energy
+    cached_yag.flashlamp.capacitance
+    assert queries == ["V", "ENE"]
+
+
+def test_unrelated_write_keeps_replies(cached_yag, queries):
+    cached_yag.flashlamp.voltage
+    cached_yag.qswitch.delay = 150
+    queries.clear()
+    assert cached_yag.flashlamp.voltage == 900
+    assert queries == []
+
+
+def test_mode_write_drops_mode_and_status(cached_yag, queries):
+    assert cached_yag.qswitch.mode == QSwitchMode.AUTO
+    status = cached_yag.laser_status
+    cached_yag.qswitch.mode = "burst"
+    queries.clear()
+    assert cached_yag.qswitch.mode == QSwitchMode.BURST
+    assert cached_yag.laser_status == status
+    assert queries == ["QSM", "WOR"]
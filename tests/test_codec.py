@@ -0,0 +1,124 @@
+import pytest
+import pyvisa
+
+from big_sky_yag.attributes import (
+    PUMP,
+    SHUTTER,
+    QSwitchMode,
+    Trigger,
+    parse_qswitch_mode,
+    parse_shutter,
+    parse_trigger,
+)
+from big_sky_yag.codec import CODECS, matches
+from big_sky_yag.snapshot import FIELDS, LaserSnapshot
+
+
+@pytest.mark.parametrize("command", sorted(CODECS))
+def test_decode_emulator_reply(yag, command):
+    reply = yag.query(command)
+    assert matches(command, reply)
+    assert CODECS[command].decode(reply) is not None
+
+
+@pytest.mark.parametrize("command", sorted(CODECS))
+def test_reject_reply_to_other_command(yag, command):
+    # e.g. a stale reply left in the stream
+    codec = CODECS[command]
+    for other in CODECS:
+        if other == command:
+            continue
+        reply = yag.query(other)
+        assert not codec.matches(reply)
+        with pytest.raises(ValueError):
+            codec.decode(reply)
+
+
+def test_commands_without_codec_match_any_reply():
+    # e.g. set commands, whose echo isn't checked
+    assert matches("V950", "anything")
+
+
+@pytest.mark.parametrize(
+    "component, name, value",
+    [
+        ("flashlamp", "voltage", 950),
+        ("flashlamp", "frequency", 5.5),
+        ("flashlamp", "capacitance", 32.1),
+        ("qswitch", "delay", 180),
+        ("qswitch", "frequency_divider", 3),
+        ("qswitch", "pulses", 25),
+    ],
+)
+def test_property_round_trip(yag, component, name, value):
+    target = getattr(yag, component)
+    assert target.set(name, value) == value
+    assert getattr(target, name) == value
+
+
+def test_trigger_and_mode_round_trip(yag):
+    assert yag.flashlamp.set("trigger", "external") == Trigger.EXTERNAL
+    assert parse_trigger(yag.query("LPM")) == Trigger.EXTERNAL
+    assert yag.qswitch.set("mode", "burst") == QSwitchMode.BURST
+    assert parse_qswitch_mode(yag.query("QSM")) == QSwitchMode.BURST
+
+
+def test_switch_round_trip(yag):
+    assert yag.set("pump", True) is True
+    assert yag.pump is True
+    assert yag.set("shutter", True) is True
+    assert yag.shutter is True
+
+
+def test_pump_digits():
+    assert PUMP.decode("CG pump       0") is False
+    assert PUMP.decode("CG pump      00") is False
+    assert PUMP.decode("CG pump       1") is True
+
+
+def test_shutter_strict():
+    assert SHUTTER.decode("shutter  opened") is True
+    assert SHUTTER.decode("shutter  closed") is False
+    with pytest.raises(ValueError):
+        SHUTTER.decode("shutter  jammed")
+
+
+def interlock_reply(name, word):
+    bits = "".join(str(word >> i & 1) for i in range(8))
+    return f"{name:<6}{bits[:4]} {bits[4:]}"
+
+
+@pytest.mark.parametrize("word", range(256))
+def test_interlock_reply_round_trip(word):
+    for command in ("IF", "IF2", "IQ"):
+        assert CODECS[command].decode(interlock_reply(command, word)) == word
+
+
+@pytest.mark.parametrize("reply", ["IF 101", "IF 0000 000", "IF 0000 0000 01"])
+def test_interlock_reply_not_eight_bits_rejected(reply):
+    # these used to be read as a shorter or longer word
+    with pytest.raises(ValueError):
+        CODECS["IF"].decode(reply)
+
+
+def test_unknown_shutter_state_rejected(yag, emulator, monkeypatch):
+    # any state but opened used to be read as closed
+    with pytest.raises(ValueError):
+        SHUTTER.decode("shutter  unknown")
+    assert parse_shutter("shutter  unknown") is False
+    # the reader skips a reply that doesn't match the query as a stale frame
+    monkeypatch.setitem(emulator._replies, "R", lambda: "shutter  unknown")
+    with pytest.raises(pyvisa.errors.VisaIOError):
+        yag.shutter
+
+
+def test_bad_shutter_reply_is_a_snapshot_error(yag, emulator, monkeypatch):
+    _, parse = FIELDS["shutter"]
+    with pytest.raises(ValueError):
+        parse("shutter  jammed")
+
+    monkeypatch.setitem(emulator._replies, "R", lambda: "shutter  jammed")
+    snapshot = LaserSnapshot.read(yag, ["pump", "shutter"])
+    assert list(snapshot.errors) == ["shutter"]
+    assert snapshot.shutter is None
+    assert snapshot.pump is False
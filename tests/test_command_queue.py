@@ -0,0 +1,88 @@
+import queue
+import time
+
+import pytest
+
+from big_sky_yag.command_queue import CommandQueue
+
+
+def drain(commands: CommandQueue):
+    entries = []
+    while not commands.empty():
+        command, value, _ = commands.get(block=False)
+        entries.append((command, value))
+    return entries
+
+
+def test_fifo():
+    commands = CommandQueue()
+    for i in range(3):
+        commands.put("custom_command", i)
+    assert drain(commands) == [
+        ("custom_command", 0),
+        ("custom_command", 1),
+        ("custom_command", 2),
+    ]
+
+
+def test_coalesced_command_moves_to_end():
+    commands = CommandQueue(coalesce=["voltage", "energy"])
+    commands.put("voltage", 900)
+    commands.put("energy", 12.0)
+    commands.put("voltage", 950)
+    # the latest voltage is applied after the energy queued before it
+    assert drain(commands) == [("energy", 12.0), ("voltage", 950)]
+
+
+def test_coalesced_command_keeps_queue_time():
+    commands = CommandQueue(coalesce=["voltage"])
+    start = time.monotonic()
+    commands.put("voltage", 900)
+    end = time.monotonic()
+    time.sleep(0.01)
+    commands.put("voltage", 950)
+    assert commands.qsize() == 1
+    command, value, queued = commands.get(block=False)
+    assert (command, value) == ("voltage", 950)
+    assert start <= queued <= end
+
+
+def test_coalesced_command_after_get_is_queued_again():
+    commands = CommandQueue(coalesce=["voltage"])
+    commands.put("voltage", 900)
+    assert commands.get(block=False)[:2] == ("voltage", 900)
+    commands.put("voltage", 950)
+    assert drain(commands) == [("voltage", 950)]
+
+
+def test_other_commands_not_coalesced():
+    commands = CommandQueue(coalesce=["voltage"])
+    commands.put("toggle_pump")
+    commands.put("toggle_pump")
+    assert drain(commands) == [("toggle_pump", None), ("toggle_pump", None)]
+
+
+def test_urgent_first():
+    commands = CommandQueue(coalesce=["voltage"])
+    commands.put("voltage", 900)
+    commands.put("toggle_pump")
+    commands.put("stop", urgent=True)
+    assert drain(commands) == [("stop", None), ("voltage", 900), ("toggle_pump", None)]
+
+
+def test_coalesced_command_becomes_urgent():
+    commands = CommandQueue(coalesce=["voltage"])
+    commands.put("toggle_pump")
+    commands.put("voltage", 900)
+    commands.put("voltage", 0, urgent=True)
+    commands.put("voltage", 100)
+    # stays urgent once it was queued as urgent
+    assert drain(commands) == [("voltage", 100), ("toggle_pump", None)]
+
+
+def test_get_empty():
+    commands = CommandQueue()
+    with pytest.raises(queue.Empty):
+        commands.get(block=False)
+    with pytest.raises(queue.Empty):
+        commands.get(timeout=0.01)
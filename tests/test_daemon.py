@@ -0,0 +1,185 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from big_sky_yag import BigSkyYag, daemon
+from big_sky_yag.daemon import DaemonClient, YagDaemon
+from big_sky_yag.emulator import EmulatorServer, YagEmulator
+from big_sky_yag.snapshot import FIELDS
+
+INTERVALS = {"flashlamp_voltage": 0.05, "laser_status": 0.05, "serial_number": None}
+
+
+@pytest.fixture
+def yag_daemon(emulator) -> YagDaemon:
+    # the daemon talks to the emulator over TCP, as to a networked laser
+    with EmulatorServer(emulator) as server:
+        yag = BigSkyYag(server.resource_name)
+        yag_daemon = YagDaemon(yag, INTERVALS, request_timeout=2.0)
+        thread = threading.Thread(target=yag_daemon.run)
+        thread.start()
+        yield yag_daemon
+        yag_daemon.stop()
+        thread.join()
+        yag.close()
+
+
+@pytest.fixture
+def client(yag_daemon) -> DaemonClient:
+    server = yag_daemon.serve("tcp://127.0.0.1:0")
+    host, port = server.server_address
+    with DaemonClient(f"tcp://{host}:{port}", timeout=5.0) as client:
+        yield client
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_get(client):
+    wait_for(lambda: client.get("flashlamp_voltage")["flashlamp_voltage"] is not None)
+    assert client.get("flashlamp_voltage", "serial_number") == {
+        "flashlamp_voltage": 900,
+        "serial_number": "184",
+    }
+    state = client.state("laser_status")["laser_status"]
+    assert state["error"] is None
+    assert state["value"]["flashlamp"] == "STOP"
+    assert set(client.get()) == set(INTERVALS)
+
+
+def test_set(client, emulator):
+    assert client.set("flashlamp", "voltage", 950) == 950
+    assert emulator.values["V"] == 950
+    # JSON numbers are converted to the type of the property
+    assert client.set("flashlamp", "frequency", 5) == 5.0
+    assert client.set("qswitch", "mode", "burst") == "BURST"
+    assert client.set("yag", "shutter", True) is True
+    wait_for(lambda: client.get("flashlamp_voltage")["flashlamp_voltage"] == 950)
+
+
+def test_call_and_write(client, emulator):
+    assert client.call("qswitch", "on") is True
+    assert emulator.qswitch_on
+    assert client.write("QOF0") == "QS at run     0"
+
+
+def test_refresh(client, emulator):
+    wait_for(lambda: client.get("serial_number")["serial_number"] is not None)
+    emulator.serial_number = 185
+    # polled once, read again only on request
+    client.refresh("serial_number")
+    wait_for(lambda: client.get("serial_number")["serial_number"] == "185")
+
+
+@pytest.mark.parametrize(
+    "request_args, error",
+    [
+        (("get", {"fields": ["unknown"]}), "KeyError"),
+        (("refresh", {"fields": ["unknown"]}), "KeyError"),
+        (("set", {"target": "laser", "name": "voltage", "value": 1}), "ValueError"),
+        (
+            ("set", {"target": "flashlamp", "name": "voltage", "value": 0}),
+            "outside of range",
+        ),
+        (("call", {"target": "yag", "method": "close"}), "ValueError"),
+        (("reboot", {}), "ValueError"),
+    ],
+)
+def test_error_replies(client, request_args, error):
+    op, params = request_args
+    with pytest.raises(RuntimeError, match=error):
+        client.request(op, **params)
+    # the connection is still usable
+    assert client.get("serial_number")
+
+
+def test_unsupported_address(yag_daemon, monkeypatch):
+    with pytest.raises(ValueError):
+        yag_daemon.serve("udp://127.0.0.1:5025")
+    # e.g. on Windows
+    monkeypatch.setattr(daemon, "ThreadingUnixServer", None)
+    with pytest.raises(ValueError, match="Unix sockets"):
+        yag_daemon.serve("unix:///tmp/yag.sock")
+
+
+class CycleDaemon(YagDaemon):
+    """
+    Records when each poll cycle ended.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cycles = []
+
+    def polled(self, snapshots):
+        self.cycles.append(time.monotonic())
+
+
+def test_command_preempts_poll_cycle():
+    # at 9600 baud a transaction of 4 fields takes about 0.1 s, the whole cycle
+    # about 0.6 s
+    emulator = YagEmulator()
+    yag = BigSkyYag(instrument=emulator)
+    cycle_daemon = CycleDaemon(yag, dict((name, 60.0) for name in FIELDS))
+    thread = threading.Thread(target=cycle_daemon.run)
+    thread.start()
+    try:
+        time.sleep(0.1)
+        queued = time.monotonic()
+        executed = cycle_daemon.submit(lambda yag: time.monotonic(), refresh=False)
+        latency = executed.result(timeout=5) - queued
+        # run at the next transaction boundary, well before the cycle ends
+        assert latency < 0.25
+        wait_for(lambda: cycle_daemon.cycles)
+        assert cycle_daemon.cycles[0] - queued > 3 * latency
+    finally:
+        cycle_daemon.stop()
+        thread.join()
+        yag.close()
+
+
+def test_idle_loop_wakes_on_job_and_stop(emulator):
+    yag = BigSkyYag(instrument=emulator)
+    cycle_daemon = CycleDaemon(yag, {"flashlamp_voltage": 60.0})
+    thread = threading.Thread(target=cycle_daemon.run)
+    thread.start()
+    try:
+        wait_for(lambda: cycle_daemon.cycles)
+        latencies = []
+        for _ in range(5):
+            time.sleep(0.02)
+            queued = time.monotonic()
+            executed = cycle_daemon.submit(lambda yag: time.monotonic(), refresh=False)
+            latencies.append(executed.result(timeout=1) - queued)
+        # the loop waits on the job queue, not in sleeps between checks
+        assert max(latencies) < 0.02
+        # nothing is due, so nothing was polled meanwhile
+        assert len(cycle_daemon.cycles) == 1
+    finally:
+        stopped = time.monotonic()
+        cycle_daemon.stop()
+        thread.join()
+        yag.close()
+    assert time.monotonic() - stopped < 0.1
+
+
+def test_poll_due_after_idle(emulator):
+    yag = BigSkyYag(instrument=emulator)
+    cycle_daemon = CycleDaemon(yag, {"flashlamp_voltage": 0.1})
+    thread = threading.Thread(target=cycle_daemon.run)
+    thread.start()
+    try:
+        wait_for(lambda: len(cycle_daemon.cycles) >= 4)
+    finally:
+        cycle_daemon.stop()
+        thread.join()
+        yag.close()
+    # woken when the next poll is due
+    intervals = np.diff(cycle_daemon.cycles)
+    assert (intervals > 0.09).all() and (intervals < 0.2).all()
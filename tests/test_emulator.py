@@ -0,0 +1,54 @@
+import time
+
+import pytest
+import pyvisa
+
+from big_sky_yag import BigSkyYag
+from big_sky_yag.emulator import EmulatorBus, YagEmulator
+
+
+def test_reply_format(emulator):
+    emulator.write(">V\r\n")
+    assert emulator.bytes_in_buffer == 17
+    reply = emulator.read_bytes(17)
+    assert reply.endswith(b"\r\n")
+    assert reply[:-2].decode().split() == ["voltage", "900", "V"]
+
+
+def test_set_command_echo(yag, emulator):
+    yag.flashlamp.voltage = 950
+    assert emulator.values["V"] == 950
+    assert yag.flashlamp.voltage == 950
+
+
+def test_unknown_command(yag):
+    assert yag.write("XYZ").strip() == "unknown command"
+
+
+def test_other_serial_number_not_answered(emulator):
+    emulator.write("$185V\r\n")
+    assert emulator.bytes_in_buffer == 0
+
+
+def test_read_timeout(emulator):
+    start = time.monotonic()
+    with pytest.raises(pyvisa.errors.VisaIOError):
+        emulator.read_bytes(1)
+    assert time.monotonic() - start >= emulator.timeout / 1000
+
+
+def test_serial_timing():
+    emulator = YagEmulator(baud_rate=9600, turnaround=0.01)
+    yag = BigSkyYag(instrument=emulator)
+    start = time.monotonic()
+    yag.query("V")
+    # '>V\r\n' and the 17 byte reply, 10 bits per byte at 9600 baud
+    assert time.monotonic() - start >= 0.01 + 21 * 10 / 9600
+
+
+def test_bus_addresses_heads():
+    heads = [YagEmulator(serial_number=n, baud_rate=None) for n in (184, 185)]
+    heads[1].values["V"] = 950
+    bus = EmulatorBus(heads, timeout=50)
+    assert BigSkyYag(instrument=bus, serial_number=184).flashlamp.voltage == 900
+    assert BigSkyYag(instrument=bus, serial_number=185).flashlamp.voltage == 950
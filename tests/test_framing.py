@@ -0,0 +1,91 @@
+import time
+
+import pytest
+import pyvisa
+
+from big_sky_yag.attributes import Flashlamp
+from big_sky_yag.framing import FrameReader
+
+STRAY = b"stray line\r\n"
+
+
+def test_frames_split_across_reads(line):
+    line.receive(b"\r\nvoltage  9")
+    line.receive(b"00 V\r\nfreq")
+    line.receive(b"uency 10.00\r\n")
+    frames = FrameReader(line)
+    assert frames.read_frame() == "voltage  900 V"
+    assert frames.read_frame() == "frequency 10.00"
+
+
+def test_stray_frame_before_query(yag, line):
+    line.receive(STRAY)
+    assert yag.flashlamp.voltage == 900
+    assert yag.flashlamp.frequency == 10.0
+
+
+def test_stray_frame_during_query(yag, line):
+    # received after the transaction started, ahead of the reply
+    line.stray = STRAY
+    assert yag.flashlamp.voltage == 900
+    assert yag.flashlamp.frequency == 10.0
+
+
+def test_stray_frame_during_query_many(yag, line):
+    line.stray = STRAY
+    replies = yag.query_many(["V", "F", "QSM"])
+    assert replies == {
+        "V": yag.query("V"),
+        "F": yag.query("F"),
+        "QSM": yag.query("QSM"),
+    }
+
+
+def test_stray_frame_before_write(yag, line):
+    line.receive(STRAY)
+    yag.flashlamp.voltage = 950
+    assert yag.flashlamp.voltage == 950
+
+
+def test_garbage_without_terminator(yag, line):
+    line.receive(b"\x00" * 100)
+    assert yag.flashlamp.voltage == 900
+    assert yag.qswitch.delay == 140
+
+
+def test_late_reply_after_timeout(yag, emulator):
+    emulator.turnaround = 0.1
+    with pytest.raises(pyvisa.errors.VisaIOError):
+        yag.query("V")
+    emulator.turnaround = 0.0
+    # the reply to V is still in flight, ahead of the reply to F
+    assert yag.flashlamp.frequency == 10.0
+    assert yag.flashlamp.voltage == 900
+
+
+def test_late_reply_received_after_timeout(yag, emulator):
+    emulator.turnaround = 0.1
+    with pytest.raises(pyvisa.errors.VisaIOError):
+        yag.query("V")
+    emulator.turnaround = 0.0
+    time.sleep(0.1)
+    replies = yag.query_many(["F", "V"])
+    assert Flashlamp.frequency.parse(replies["F"]) == 10.0
+    assert Flashlamp.voltage.parse(replies["V"]) == 900
+
+
+def test_read_reply_skips_stale_frames(line):
+    line.receive(b"frequency 10.00\r\n" + STRAY + b"voltage  900 V\r\n")
+    frames = FrameReader(line)
+    assert frames.read_reply("V") == "voltage  900 V"
+    assert not frames.desynchronized
+
+
+def test_read_reply_without_match_desynchronizes(line):
+    line.receive(STRAY * 3 + b"voltage  900 V\r\n")
+    frames = FrameReader(line)
+    assert frames.read_reply("V", max_stale=1) == "stray line"
+    assert frames.desynchronized
+    frames.resynchronize()
+    assert not frames.desynchronized
+    assert line.bytes_in_buffer == 0
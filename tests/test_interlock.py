@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from big_sky_yag.interlock import (
+    FlashlampInterlock1,
+    FlashlampInterlock2,
+    QSwitchInterlock,
+    decode_words,
+    flashlamp_interlock_state,
+    qswitch_interlock_state,
+)
+
+
+@pytest.mark.parametrize("word", range(256))
+def test_states_follow_word_bits(word):
+    state = flashlamp_interlock_state(word, 255 - word)
+    for member in FlashlampInterlock1:
+        assert getattr(state, member.name) == bool(word >> member & 1)
+    for member in FlashlampInterlock2:
+        assert getattr(state, member.name) == bool((255 - word) >> member & 1)
+
+    state = qswitch_interlock_state(word)
+    for member in QSwitchInterlock:
+        assert getattr(state, member.name) == bool(word >> member & 1)
+
+
+def test_decode_words():
+    words = np.arange(256)
+    bits = decode_words(words)
+    assert bits.shape == (256, 8)
+    assert bits.dtype == bool
+    for bit in range(8):
+        assert (bits[:, bit] == (words >> bit & 1).astype(bool)).all()
+    assert (
+        bits[:, QSwitchInterlock.SHUTTER_CLOSED]
+        == [qswitch_interlock_state(w).SHUTTER_CLOSED for w in range(256)]
+    ).all()
+
+
+def test_decode_words_input():
+    assert decode_words([]).shape == (0, 8)
+    assert decode_words(7).shape == (8,)
+    assert decode_words(np.zeros((2, 3), dtype=np.uint8)).shape == (2, 3, 8)
+    assert (
+        decode_words(np.array([1.0, 128.0])).tolist() == decode_words([1, 128]).tolist()
+    )
+    for words in ([256], [-1], [1.5], [float("nan")]):
+        with pytest.raises(ValueError):
+            decode_words(words)
@@ -0,0 +1,95 @@
+import threading
+import time
+
+import pytest
+import pyvisa
+
+from big_sky_yag.attributes import Flashlamp, QSwitch
+from big_sky_yag.emulator import YagEmulator
+from big_sky_yag.io_thread import ThreadedBigSkyYag
+
+
+@pytest.fixture
+def threaded_yag(line) -> ThreadedBigSkyYag:
+    yag = ThreadedBigSkyYag(instrument=line, request_timeout=0.5)
+    yield yag
+    yag.close()
+
+
+def test_concurrent_callers(threaded_yag, emulator):
+    emulator.values.update({"V": 950, "F": 5.0, "W": 160, "QSF": 3})
+    properties = [
+        (Flashlamp.voltage, 950),
+        (Flashlamp.frequency, 5.0),
+        (QSwitch.delay, 160),
+        (QSwitch.frequency_divider, 3),
+    ]
+    errors = []
+
+    def caller(prop, value):
+        try:
+            for _ in range(50):
+                assert prop.parse(threaded_yag.query(prop._command)) == value
+        except Exception as err:
+            errors.append(err)
+
+    threads = [threading.Thread(target=caller, args=args) for args in properties]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+
+
+def test_timeout_then_late_reply_discarded(emulator):
+    yag = ThreadedBigSkyYag(instrument=emulator, request_timeout=0.05)
+    try:
+        emulator.turnaround = 0.1
+        start = time.monotonic()
+        with pytest.raises(pyvisa.errors.VisaIOError):
+            yag.query("V")
+        assert time.monotonic() - start < 0.1
+        emulator.turnaround = 0.0
+        assert yag.flashlamp.frequency == 10.0
+        assert yag.flashlamp.voltage == 900
+    finally:
+        yag.close()
+
+
+def test_one_deadline_per_request():
+    # each byte arrives well within the timeout, the whole reply doesn't
+    emulator = YagEmulator(baud_rate=300)
+    yag = ThreadedBigSkyYag(instrument=emulator, request_timeout=0.2)
+    try:
+        start = time.monotonic()
+        with pytest.raises(pyvisa.errors.VisaIOError):
+            yag.query("V")
+        assert time.monotonic() - start < 0.4
+    finally:
+        yag.close()
+
+
+def test_timeout_while_queued(emulator):
+    yag = ThreadedBigSkyYag(instrument=emulator, request_timeout=2.0)
+    try:
+        emulator.turnaround = 0.3
+        slow = yag.submit("V")
+        start = time.monotonic()
+        with pytest.raises(pyvisa.errors.VisaIOError):
+            yag.io.request("F", timeout=0.05).result()
+        assert time.monotonic() - start < 0.2
+        assert Flashlamp.voltage.parse(slow.result()) == 900
+    finally:
+        yag.close()
+
+
+def test_unmatched_reply_not_cached(line):
+    yag = ThreadedBigSkyYag(instrument=line, cache_max_age=60)
+    try:
+        line.stray = b"voltage  1000 V\r\n" * 5
+        assert yag.query("W") == "voltage  1000 V"
+        assert yag.cache.get("W") is None
+        assert yag.qswitch.delay == 140
+        assert yag.cache.get("W") is not None
+    finally:
+        yag.close()
@@ -0,0 +1,88 @@
+import datetime
+
+import pytest
+
+# the widgets package needs the GUI dependencies, LogIndex itself runs without an
+# event loop
+pytest.importorskip("PyQt5")
+pytest.importorskip("pyqtgraph")
+
+from widgets.logviewer import LogIndex, parse_time  # noqa: E402
+
+
+def log_line(minute, text):
+    return f"2024/03/01 12:{minute:02d}:00 {text}\n"
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / "log_Mar2024.txt"
+    path.write_text(
+        "\n"
+        + log_line(0, "Starting GUI...")
+        + log_line(1, "Set flashlamp voltage. It reads 950 V now.")
+        + log_line(2, "Ununable to read/write YAG parameters flashlamp_voltage_V.")
+        + "continuation of the message\n"
+        + log_line(3, "Set flashlamp VOLTAGE. It reads 900 V now.")
+    )
+    return path
+
+
+@pytest.fixture
+def index(log_file):
+    # small pages and chunks, so lines cross their boundaries
+    index = LogIndex(str(log_file), chunk_size=64, page_size=2, max_pages=2)
+    yield index
+    index.close()
+
+
+def test_lines(index):
+    assert len(index) == 5
+    assert index.line(0).endswith("Starting GUI...")
+    assert index.line(3) == "continuation of the message"
+    assert index.line(4).endswith("900 V now.")
+    # read again after its page was evicted
+    assert index.line(0).endswith("Starting GUI...")
+    assert len(index.pages) <= 2
+
+
+def test_incremental_update(index, log_file):
+    with open(log_file, "a") as f:
+        # a line written partially
+        f.write("2024/03/01 12:04:00 Toggling")
+    assert index.update() == 5
+    assert len(index) == 6
+    assert index.line(5).endswith("Toggling")
+
+    with open(log_file, "a") as f:
+        f.write(" pump status...\n" + log_line(5, "Toggled pump status."))
+    # the partial line is indexed again
+    assert index.update() == 5
+    assert len(index) == 7
+    assert index.line(5).endswith("Toggling pump status...")
+    assert index.line(6).endswith("Toggled pump status.")
+    assert index.update() == 7
+
+
+def test_truncated_file_indexed_again(index, log_file):
+    log_file.write_text(log_line(7, "Starting GUI..."))
+    assert index.update() == 0
+    assert len(index) == 1
+    assert index.line(0) == log_line(7, "Starting GUI...").strip()
+
+
+def test_search(index):
+    assert index.search("flashlamp voltage").tolist() == [1, 4]
+    assert index.search("flashlamp voltage", first=2).tolist() == [4]
+    assert index.search("continuation").tolist() == [3]
+    assert index.search("simmer").tolist() == []
+
+
+def test_find_time(index):
+    assert parse_time(index.line(3)) is None
+    # a continuation line takes the time of its message
+    assert index.time(3) == datetime.datetime(2024, 3, 1, 12, 2)
+    assert index.find_time(datetime.datetime(2024, 3, 1, 11)) == 0
+    assert index.find_time(datetime.datetime(2024, 3, 1, 12, 1)) == 1
+    assert index.find_time(datetime.datetime(2024, 3, 1, 12, 2, 30)) == 4
+    assert index.find_time(datetime.datetime(2024, 3, 2)) == 5
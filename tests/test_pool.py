@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+from big_sky_yag import BigSkyYag
+from big_sky_yag.emulator import EmulatorServer
+from big_sky_yag.pool import SessionPool
+from big_sky_yag.transports import open_instrument
+
+
+class Opener:
+    """
+    Opens sessions with `open_instrument` and keeps them, to tell them apart.
+    """
+
+    def __init__(self):
+        self.opened = []
+        self.closed = []
+
+    def __call__(self, resource_name, baud_rate):
+        instrument = open_instrument(resource_name, baud_rate=baud_rate)
+        close = instrument.close
+
+        def recording_close():
+            self.closed.append(instrument)
+            close()
+
+        instrument.close = recording_close
+        self.opened.append(instrument)
+        return instrument
+
+
+@pytest.fixture
+def servers():
+    with EmulatorServer() as first, EmulatorServer() as second:
+        yield first.resource_name, second.resource_name
+
+
+@pytest.fixture
+def opener() -> Opener:
+    return Opener()
+
+
+@pytest.fixture
+def pool(opener) -> SessionPool:
+    pool = SessionPool(opener)
+    yield pool
+    pool.close_idle()
+
+
+def test_session_reused(servers, opener, pool):
+    resource_name, _ = servers
+    yag = BigSkyYag(resource_name, pool=pool)
+    assert yag.flashlamp.voltage == 900
+    yag.close()
+    yag = BigSkyYag(resource_name, pool=pool)
+    assert yag.flashlamp.voltage == 900
+    yag.close()
+    assert len(opener.opened) == 1
+    assert opener.closed == []
+
+
+def test_unread_replies_dropped_on_release(servers, pool):
+    resource_name, _ = servers
+    with pool.acquire(resource_name) as lease:
+        lease.instrument.write(">V")
+        time.sleep(0.05)
+    with pool.acquire(resource_name) as lease:
+        assert lease.instrument.bytes_in_buffer == 0
+
+
+def test_leases_not_shared(servers, pool):
+    first, second = servers
+    lease = pool.acquire(first)
+    # another resource is leased alongside
+    with pool.acquire(second) as other:
+        assert other.instrument is not lease.instrument
+    with pytest.raises(TimeoutError):
+        pool.acquire(first, timeout=0.05)
+
+    leased = []
+    waiter = threading.Thread(target=lambda: leased.append(pool.acquire(first)))
+    waiter.start()
+    time.sleep(0.05)
+    assert leased == []
+    lease.release()
+    waiter.join(timeout=2)
+    assert leased[0].instrument is lease.instrument
+    leased[0].release()
+
+
+def test_discarded_session_reopened(servers, opener, pool):
+    resource_name, _ = servers
+    yag = BigSkyYag(resource_name, pool=pool)
+    yag.close(discard=True)
+    assert opener.closed == opener.opened
+    with pool.acquire(resource_name) as lease:
+        assert lease.instrument is opener.opened[1]
+
+
+def test_other_baud_rate_reopened(servers, opener, pool):
+    resource_name, _ = servers
+    pool.acquire(resource_name).release()
+    pool.acquire(resource_name, baud_rate=19200).release()
+    assert len(opener.opened) == 2
+    assert opener.closed == opener.opened[:1]
+
+
+def test_close_idle(servers, opener, pool):
+    first, second = servers
+    pool.acquire(first).release()
+    lease = pool.acquire(second)
+    pool.close_idle()
+    # only the idle session is closed
+    assert opener.closed == opener.opened[:1]
+    lease.release()
+    with pool.acquire(first) as lease:
+        assert lease.instrument is opener.opened[2]
@@ -0,0 +1,64 @@
+import pyvisa
+
+from big_sky_yag import BigSkyYag
+from big_sky_yag.attributes import Flashlamp, QSwitchMode, parse_qswitch_mode
+
+
+def test_replies_in_query_order(yag):
+    replies = yag.query_many(["QSM", "V", "F"])
+    assert list(replies) == ["QSM", "V", "F"]
+    assert replies == {
+        "QSM": yag.query("QSM"),
+        "V": yag.query("V"),
+        "F": yag.query("F"),
+    }
+
+
+def record_writes(emulator, record):
+    write = emulator.write
+
+    def recording_write(message):
+        record(message)
+        return write(message)
+
+    emulator.write = recording_write
+
+
+def test_commands_written_back_to_back(yag, emulator):
+    waiting = []
+    record_writes(emulator, lambda message: waiting.append(emulator.bytes_in_buffer))
+    yag.query_many(["V", "F", "QSM"])
+    # no reply was read before the last command was written
+    assert waiting == [0, 17, 34]
+
+
+def test_duplicate_queries_sent_once(yag, emulator):
+    writes = []
+    record_writes(emulator, lambda message: writes.append(message.strip()))
+    replies = yag.query_many(["V", "F", "V"])
+    assert writes == [">V", ">F"]
+    assert list(replies) == ["V", "F"]
+
+
+def test_errors_mapped_to_queries(yag, line):
+    # the device goes silent after the first command
+    line.answers = 1
+    replies = yag.query_many(["V", "F", "V", "QSM"])
+    assert list(replies) == ["V", "F", "QSM"]
+    assert Flashlamp.voltage.parse(replies["V"]) == 900
+    assert isinstance(replies["F"], pyvisa.errors.VisaIOError)
+    assert isinstance(replies["QSM"], pyvisa.errors.VisaIOError)
+
+    line.answers = None
+    replies = yag.query_many(["F", "QSM"])
+    assert Flashlamp.frequency.parse(replies["F"]) == 10.0
+    assert parse_qswitch_mode(replies["QSM"]) == QSwitchMode.AUTO
+
+
+def test_cached_replies_not_queried(emulator):
+    yag = BigSkyYag(instrument=emulator, cache_max_age=60)
+    assert yag.flashlamp.voltage == 900
+    emulator.values["V"] = 950
+    replies = yag.query_many(["V", "F"])
+    assert Flashlamp.voltage.parse(replies["V"]) == 900
+    assert Flashlamp.frequency.parse(replies["F"]) == 10.0
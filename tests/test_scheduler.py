@@ -0,0 +1,64 @@
+import math
+
+from big_sky_yag import LaserSnapshot
+from big_sky_yag.scheduler import PollScheduler
+
+
+def poll(scheduler: PollScheduler, snapshot: LaserSnapshot, now: float) -> None:
+    # as the daemon loop does after each transaction
+    scheduler.mark(
+        [name for name in snapshot.fields if name not in snapshot.errors], now
+    )
+    scheduler.retry(snapshot.errors, now)
+
+
+def test_all_due_at_start():
+    scheduler = PollScheduler({"shutter": 1.0, "serial_number": None, "pump": 0.5})
+    # shortest interval first, fields polled once last
+    assert scheduler.due(now=0.0) == ["pump", "shutter", "serial_number"]
+
+
+def test_mark_schedules_next_poll():
+    scheduler = PollScheduler({"shutter": 1.0, "serial_number": None, "pump": 0.5})
+    scheduler.mark(["shutter", "serial_number", "pump"], now=10.0)
+    assert scheduler.due(now=10.4) == []
+    assert scheduler.due(now=10.5) == ["pump"]
+    assert scheduler.due(now=11.0) == ["pump", "shutter"]
+    assert scheduler.due(now=1e9) == ["pump", "shutter"]
+    assert scheduler.next_deadline() == 10.5
+
+
+def test_failed_fields_are_not_marked():
+    scheduler = PollScheduler(
+        {"shutter": 2.0, "serial_number": None, "pump": 2.0}, retry_interval=0.5
+    )
+    error = ValueError("bad reply")
+    snapshot = LaserSnapshot(
+        {"pump": True}, {"shutter": error, "serial_number": error}, t=0.0
+    )
+    poll(scheduler, snapshot, now=10.0)
+    # a field polled once is read again after the retry interval, others after
+    # their interval
+    assert scheduler.due(now=10.5) == ["serial_number"]
+    assert set(scheduler.due(now=12.0)) == {"pump", "shutter", "serial_number"}
+
+    poll(scheduler, LaserSnapshot({"serial_number": "184"}, t=0.0), now=12.0)
+    assert "serial_number" not in scheduler.due(now=1e9)
+
+
+def test_refresh():
+    scheduler = PollScheduler({"shutter": 1.0, "serial_number": None})
+    scheduler.mark(["shutter", "serial_number"], now=10.0)
+    scheduler.refresh(["shutter", "unknown"])
+    assert scheduler.due(now=10.0) == ["shutter"]
+    scheduler.refresh()
+    assert scheduler.due(now=10.0) == ["shutter", "serial_number"]
+
+
+def test_set_interval():
+    scheduler = PollScheduler({"shutter": 1.0})
+    scheduler.mark(["shutter"], now=10.0)
+    scheduler.set_interval("shutter", None)
+    assert scheduler.due(now=10.0) == ["shutter"]
+    scheduler.mark(["shutter"], now=10.0)
+    assert scheduler.next_deadline() == math.inf
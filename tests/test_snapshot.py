@@ -0,0 +1,77 @@
+import pytest
+import pyvisa
+
+from big_sky_yag import LaserSnapshot
+from big_sky_yag.attributes import QSwitchMode, Status, Trigger
+from big_sky_yag.snapshot import FIELDS
+
+
+def test_read_all_fields(yag, emulator):
+    emulator.pump = True
+    emulator.shutter = True
+    snapshot = LaserSnapshot.read(yag)
+    assert snapshot.fields == tuple(FIELDS)
+    assert snapshot.errors == {}
+    assert snapshot.serial_number == "184"
+    assert snapshot.pump is True
+    assert snapshot.shutter is True
+    assert snapshot.flashlamp_voltage == 900
+    assert snapshot.flashlamp_frequency == 10.0
+    assert snapshot.flashlamp_trigger == Trigger.INTERNAL
+    assert snapshot.laser_status.flashlamp == Status.STOP
+    assert snapshot.qswitch_mode == QSwitchMode.AUTO
+    assert snapshot.qswitch_delay == 140
+    assert snapshot.qswitch_interlock.SHUTTER_CLOSED is False
+    assert snapshot.flashlamp_interlock.WATER_FLOW is False
+
+
+def test_read_matches_properties(yag):
+    snapshot = yag.snapshot()
+    assert snapshot.pump == yag.pump
+    assert snapshot.shutter == yag.shutter
+    assert snapshot.temperature_cooling_group == yag.temperature_cooling_group
+    assert snapshot.laser_status == yag.laser_status
+    assert snapshot.flashlamp_energy == yag.flashlamp.energy
+    assert snapshot.flashlamp_capacitance == yag.flashlamp.capacitance
+    assert snapshot.flashlamp_interlock == yag.flashlamp.interlock
+    assert snapshot.qswitch_status == yag.qswitch.status
+    assert snapshot.qswitch_pulses == yag.qswitch.pulses
+    assert snapshot.qswitch_interlock == yag.qswitch.interlock
+
+
+def test_read_subset(yag):
+    snapshot = LaserSnapshot.read(yag, ["qswitch_delay", "flashlamp_interlock"])
+    assert snapshot.fields == ("flashlamp_interlock", "qswitch_delay")
+    assert snapshot.qswitch_delay == 140
+    assert snapshot.flashlamp_voltage is None
+    assert snapshot.as_dict() == {
+        "flashlamp_interlock": snapshot.flashlamp_interlock,
+        "qswitch_delay": 140,
+    }
+
+
+def test_read_errors(yag, line):
+    line.answers = 1
+    snapshot = LaserSnapshot.read(yag, ["flashlamp_voltage", "flashlamp_interlock"])
+    assert snapshot.flashlamp_voltage == 900
+    # both replies of the interlock are lost
+    assert list(snapshot.errors) == ["flashlamp_interlock"]
+    assert isinstance(snapshot.errors["flashlamp_interlock"], pyvisa.errors.VisaIOError)
+    assert snapshot.flashlamp_interlock is None
+    assert snapshot.as_dict() == {"flashlamp_voltage": 900}
+
+
+def test_diff(yag, emulator):
+    previous = yag.snapshot(["pump", "shutter"])
+    emulator.shutter = True
+    snapshot = yag.snapshot(["pump", "shutter"])
+    assert snapshot.diff(previous) == {"shutter": True}
+    assert snapshot.diff(None) == {"pump": False, "shutter": True}
+
+
+def test_immutable(yag):
+    snapshot = yag.snapshot(["pump"])
+    with pytest.raises(AttributeError):
+        snapshot.pump = True
+    with pytest.raises(AttributeError):
+        del snapshot.pump
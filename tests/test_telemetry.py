@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+
+from big_sky_yag.interlock import FlashlampInterlock2
+from big_sky_yag.state_board import LAYOUT
+from big_sky_yag.telemetry import TelemetryArchive, TelemetryRecorder
+
+
+def test_state_board_slots_round_trip(yag, emulator):
+    emulator.pump = True
+    emulator.if2 = 1 << FlashlampInterlock2.WATER_TEMP
+    snapshot = yag.snapshot()
+    for slot in LAYOUT:
+        value = getattr(snapshot, slot.name)
+        assert slot.decode(slot.encode(value)) == value
+
+
+def test_archive_round_trip(yag, emulator, tmp_path):
+    recorder = TelemetryRecorder(archive=TelemetryArchive(str(tmp_path)))
+    snapshots = []
+    for voltage in (900, 950, 1000):
+        emulator.values["V"] = voltage
+        snapshots.append(yag.snapshot())
+        recorder.record(snapshots[-1])
+    recorder.close()
+
+    archive = TelemetryArchive(str(tmp_path))
+    records = archive.read("flashlamp_voltage")
+    assert records["value"].tolist() == [900, 950, 1000]
+    assert records["time"].tolist() == [snapshot.time for snapshot in snapshots]
+    for snapshot in snapshots:
+        for slot in LAYOUT:
+            (record,) = archive.read(slot.name, snapshot.time, snapshot.time + 1e-6)
+            assert archive.decode(slot.name, record) == getattr(snapshot, slot.name)
+    assert len(archive.read("flashlamp_voltage", start=snapshots[1].time)) == 2
+    assert recorder.dropped == 0
+
+
+def test_flush_in_background(yag, tmp_path):
+    archive = TelemetryArchive(str(tmp_path))
+    recorder = TelemetryRecorder(archive=archive, flush_interval=0.01)
+    try:
+        recorder.record(yag.snapshot(["flashlamp_voltage"]))
+        deadline = time.monotonic() + 2
+        while not len(archive.read("flashlamp_voltage")):
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert archive.read("flashlamp_voltage")["value"].tolist() == [900]
+    finally:
+        recorder.close()
+    assert len(archive.read("flashlamp_voltage")) == 1
+
+
+def test_records_kept_without_archive(yag):
+    recorder = TelemetryRecorder(capacity=2)
+    for _ in range(3):
+        recorder.record(yag.snapshot(["flashlamp_voltage"]))
+    assert recorder.latest("flashlamp_voltage")["value"].tolist() == [900, 900]
+    recorder.close()
+    assert np.array_equal(
+        recorder.latest("flashlamp_voltage", 1),
+        recorder.latest("flashlamp_voltage")[1:],
+    )
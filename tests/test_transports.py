@@ -0,0 +1,81 @@
+import time
+
+import pytest
+
+from big_sky_yag import BigSkyYag
+from big_sky_yag.emulator import EmulatorServer
+from big_sky_yag.transports import SocketTransport, open_instrument
+
+
+@pytest.fixture
+def server(emulator) -> EmulatorServer:
+    with EmulatorServer(emulator) as server:
+        yield server
+
+
+@pytest.fixture
+def tcp_yag(server) -> BigSkyYag:
+    yag = BigSkyYag(server.resource_name)
+    yield yag
+    yag.close()
+
+
+def test_open_tcp(server):
+    instrument = open_instrument(server.resource_name)
+    try:
+        assert isinstance(instrument, SocketTransport)
+        assert instrument.write(">V") == 4
+        assert instrument.read_bytes(17) == b"voltage   900 V\r\n"
+        assert instrument.bytes_in_buffer == 0
+    finally:
+        instrument.close()
+
+
+def test_bytes_in_buffer(server):
+    instrument = open_instrument(server.resource_name)
+    try:
+        instrument.write(">V")
+        instrument.write(">F")
+        deadline = time.monotonic() + 2
+        while instrument.bytes_in_buffer < 34:
+            assert time.monotonic() < deadline
+            time.sleep(0.01)
+        assert instrument.read_bytes(34).count(b"\r\n") == 2
+    finally:
+        instrument.close()
+
+
+def test_reads_and_writes(tcp_yag, emulator):
+    assert tcp_yag.flashlamp.voltage == 900
+    tcp_yag.flashlamp.voltage = 950
+    assert emulator.values["V"] == 950
+    assert tcp_yag.flashlamp.voltage == 950
+    replies = tcp_yag.query_many(["V", "F", "QSM"])
+    assert list(replies) == ["V", "F", "QSM"]
+    assert tcp_yag.qswitch.set("mode", "burst").name == "BURST"
+
+
+def test_timeout(tcp_yag, emulator):
+    tcp_yag.instrument.timeout = 50
+    assert tcp_yag.instrument.timeout == 50
+    emulator.turnaround = 0.2
+    start = time.monotonic()
+    with pytest.raises(TimeoutError):
+        tcp_yag.query("V")
+    assert time.monotonic() - start < 0.2
+    # the late reply is discarded
+    emulator.turnaround = 0.0
+    tcp_yag.instrument.timeout = 1000
+    assert tcp_yag.flashlamp.frequency == 10.0
+    assert tcp_yag.flashlamp.voltage == 900
+
+
+def test_connection_closed(server):
+    instrument = open_instrument(server.resource_name)
+    try:
+        server.close()
+        with pytest.raises((ConnectionError, TimeoutError)):
+            instrument.write(">V")
+            instrument.read_bytes(17)
+    finally:
+        instrument.close()
@@ -1,4 +1,5 @@
 from .NewWidgets import (NewBox, NewComboBox, NewLineEdit, NewSpinBox, NewDoubleSpinBox, 
                         NewPlot, NewScrollArea, FlexibleGridLayout)
 
-from .scientificspin import ScientificDoubleSpinBox
\ No newline at end of file
+from .scientificspin import ScientificDoubleSpinBox
+from .logviewer import LogViewer
\ No newline at end of file
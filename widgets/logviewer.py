@@ -0,0 +1,354 @@
+import os, glob, datetime
+from collections import OrderedDict
+import PyQt5
+import PyQt5.QtGui as QtGui
+import PyQt5.QtWidgets as qt
+import numpy as np
+
+# event log lines start with the time they were logged
+TIME_FORMAT = "%Y/%m/%d %H:%M:%S"
+TIME_LENGTH = 19
+
+def parse_time(line):
+    """Time at the start of a log line, None for continuation lines of a multi-line message."""
+
+    try:
+        return datetime.datetime.strptime(line[:TIME_LENGTH], TIME_FORMAT)
+    except ValueError:
+        return None
+
+def month_of(path):
+    """Month of a logging/log_<Mon><Year>.txt file, for sorting them."""
+
+    try:
+        return datetime.datetime.strptime(os.path.basename(path), "log_%b%Y.txt")
+    except ValueError:
+        return datetime.datetime.min
+
+
+class LogIndex:
+    """
+    Byte offsets of the lines of a log file, so any line can be read without reading the lines before it.
+    The index is built in one pass over the file and extended by `update` as lines are appended. Lines are
+    read a page at a time and the recently used pages are kept.
+    """
+
+    def __init__(self, path, chunk_size=1<<22, page_size=256, max_pages=64):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.file = open(path, "rb")
+        # first byte and end of every non-empty line
+        self.starts = np.zeros(0, dtype=np.int64)
+        self.ends = np.zeros(0, dtype=np.int64)
+        self.size = 0
+        self.pages = OrderedDict()
+        self.update()
+
+    def __len__(self):
+        return len(self.starts)
+
+    def close(self):
+        self.file.close()
+
+    def update(self):
+        """Index the lines written since the last update, and return the number of lines indexed before
+        that are unchanged. The last line is indexed again because it may have been written partially, and
+        the whole file if it was truncated."""
+
+        size = os.fstat(self.file.fileno()).st_size
+        if size < self.size:
+            self.starts = self.ends = np.zeros(0, dtype=np.int64)
+            self.size = 0
+            self.pages.clear()
+        if size == self.size:
+            return len(self)
+
+        kept = len(self)
+        line_start = self.size
+        if kept and self.ends[-1] == self.size:
+            kept -= 1
+            line_start = int(self.starts[-1])
+
+        starts, ends = [self.starts[:kept]], [self.ends[:kept]]
+        position = line_start
+        self.file.seek(position)
+        while position < size:
+            chunk = self.file.read(min(self.chunk_size, size - position))
+            if not chunk:
+                break
+            newlines = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == ord("\n")) + position
+            if len(newlines):
+                starts.append(np.concatenate(([line_start], newlines[:-1] + 1)))
+                ends.append(newlines)
+                line_start = int(newlines[-1]) + 1
+            position += len(chunk)
+        if line_start < position:
+            starts.append(np.array([line_start]))
+            ends.append(np.array([position]))
+
+        starts, ends = np.concatenate(starts), np.concatenate(ends)
+        # skip empty lines
+        non_empty = ends > starts
+        self.starts, self.ends = starts[non_empty], ends[non_empty]
+        self.size = position
+
+        for page in [page for page in self.pages if (page + 1) * self.page_size > kept]:
+            del self.pages[page]
+        return kept
+
+    def line(self, i):
+        """Text of line `i`."""
+
+        page, offset = divmod(i, self.page_size)
+        if page in self.pages:
+            self.pages.move_to_end(page)
+        else:
+            first, last = page * self.page_size, min((page + 1) * self.page_size, len(self))
+            base = int(self.starts[first])
+            self.file.seek(base)
+            data = self.file.read(int(self.ends[last-1]) - base)
+            self.pages[page] = [data[start-base:end-base].decode("utf-8", "replace").rstrip("\r")
+                                for start, end in zip(self.starts[first:last].tolist(), self.ends[first:last].tolist())]
+            if len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+        return self.pages[page][offset]
+
+    def time(self, i):
+        """Time line `i` was logged, continuation lines take the time of their message. None if no line up to
+        `i` has a time."""
+
+        for j in range(i, -1, -1):
+            t = parse_time(self.line(j))
+            if t is not None:
+                return t
+        return None
+
+    def find_time(self, t):
+        """Index of the first line logged at or after `t`, by bisection over the line times."""
+
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            line_time = self.time(mid)
+            if line_time is None or line_time < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def search(self, text, first=0):
+        """Indices of the lines from `first` on that contain `text`, ignoring ASCII case. The file is scanned
+        in chunks of whole lines."""
+
+        needle = text.lower().encode("utf-8")
+        matches = [np.zeros(0, dtype=np.int64)]
+        line = first
+        while line < len(self):
+            base = int(self.starts[line])
+            last = max(int(np.searchsorted(self.starts, base + self.chunk_size)), line + 1)
+            self.file.seek(base)
+            data = self.file.read(int(self.ends[last-1]) - base).lower()
+
+            offsets = []
+            position = data.find(needle)
+            while position != -1:
+                offsets.append(position)
+                # one match per line is enough
+                newline = data.find(b"\n", position)
+                if newline == -1:
+                    break
+                position = data.find(needle, newline + 1)
+            if offsets:
+                matches.append(np.searchsorted(self.starts, np.array(offsets) + base, side="right") - 1)
+            line = last
+        return np.concatenate(matches)
+
+
+class LogModel(PyQt5.QtCore.QAbstractListModel):
+    """
+    Lines of a log file, or only the lines matching a filter. A view asks only for the rows it shows, so
+    those are the only lines read from disk.
+    """
+
+    def __init__(self, log):
+        super().__init__()
+        self.log = log
+        self.filter = ""
+        # line index of each row when filtered
+        self.rows = None
+        self.count = len(log)
+
+    def rowCount(self, parent=PyQt5.QtCore.QModelIndex()):
+        return 0 if parent.isValid() else self.count
+
+    def data(self, index, role=PyQt5.QtCore.Qt.DisplayRole):
+        if role == PyQt5.QtCore.Qt.DisplayRole and index.isValid():
+            return self.log.line(self.line_of_row(index.row()))
+        return None
+
+    def line_of_row(self, row):
+        return row if self.rows is None else int(self.rows[row])
+
+    def row_of_line(self, line):
+        """Row of `line`, or of the first matching line after it when filtered."""
+
+        return line if self.rows is None else int(np.searchsorted(self.rows, line))
+
+    def set_filter(self, text):
+        self.beginResetModel()
+        self.filter = text
+        self.rows = self.log.search(text) if text else None
+        self.count = len(self.log) if self.rows is None else len(self.rows)
+        self.endResetModel()
+
+    def refresh(self):
+        """Show lines appended to the file since the last refresh."""
+
+        kept = self.log.update()
+        if self.rows is None:
+            changed, count = kept, len(self.log)
+        else:
+            # rows of lines indexed again are replaced
+            changed = int(np.searchsorted(self.rows, kept))
+            rows = np.concatenate((self.rows[:changed], self.log.search(self.filter, kept)))
+            count = len(rows)
+
+        if count < self.count:
+            # the file was truncated, or an indexed again line doesn't match any more
+            self.beginResetModel()
+            if self.rows is not None:
+                self.rows = rows
+            self.count = count
+            self.endResetModel()
+            return
+
+        if self.rows is not None:
+            self.rows = rows
+        if changed < self.count:
+            self.dataChanged.emit(self.index(changed), self.index(self.count - 1))
+        if count > self.count:
+            self.beginInsertRows(PyQt5.QtCore.QModelIndex(), self.count, count - 1)
+            self.count = count
+            self.endInsertRows()
+
+
+class LogViewer(qt.QWidget):
+    """
+    Window browsing the monthly event log files, one month at a time. Lines are paged from disk as they are
+    scrolled to, so the size of a file doesn't matter. Lines can be filtered by a substring, and the view
+    jumps to the first line logged after a given time.
+    """
+
+    def __init__(self, directory="logging", refresh_ms=1000):
+        super().__init__()
+        self.directory = directory
+        self.model = None
+        self.setWindowTitle("Event log files")
+        self.resize(900, 600)
+
+        frame = qt.QGridLayout()
+        self.setLayout(frame)
+
+        self.file_cb = qt.QComboBox()
+        self.file_cb.setToolTip("Month of the log file")
+        frame.addWidget(self.file_cb, 0, 0)
+
+        self.filter_le = qt.QLineEdit()
+        self.filter_le.setPlaceholderText("Filter, press Enter")
+        self.filter_le.returnPressed.connect(self.apply_filter)
+        frame.addWidget(self.filter_le, 0, 1)
+
+        self.time_dte = qt.QDateTimeEdit(PyQt5.QtCore.QDateTime.currentDateTime())
+        self.time_dte.setDisplayFormat("yyyy/MM/dd HH:mm:ss")
+        self.time_dte.setCalendarPopup(True)
+        frame.addWidget(self.time_dte, 0, 2)
+
+        self.goto_pb = qt.QPushButton("Go to time")
+        self.goto_pb.clicked[bool].connect(lambda val: self.goto_time())
+        frame.addWidget(self.goto_pb, 0, 3)
+
+        self.follow_chb = qt.QCheckBox("Follow")
+        self.follow_chb.setToolTip("Scroll to new lines as they are logged")
+        self.follow_chb.setChecked(True)
+        frame.addWidget(self.follow_chb, 0, 4)
+
+        self.view = qt.QListView()
+        # rows of the same height let the view skip measuring rows it doesn't show
+        self.view.setUniformItemSizes(True)
+        self.view.setFont(QtGui.QFontDatabase.systemFont(QtGui.QFontDatabase.FixedFont))
+        frame.addWidget(self.view, 1, 0, 1, 5)
+
+        self.status_la = qt.QLabel()
+        frame.addWidget(self.status_la, 2, 0, 1, 5)
+
+        frame.setColumnStretch(1, 1)
+
+        self.file_cb.currentIndexChanged[int].connect(lambda i: self.open_file(self.file_cb.itemData(i)))
+        files = sorted(glob.glob(os.path.join(directory, "log_*.txt")), key=month_of, reverse=True)
+        for path in files:
+            self.file_cb.addItem(os.path.basename(path), path)
+
+        self.timer = PyQt5.QtCore.QTimer()
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(refresh_ms)
+
+    def open_file(self, path):
+        if self.model is not None:
+            self.model.log.close()
+            self.model = None
+        if path is None:
+            return
+        try:
+            log = LogIndex(path)
+        except OSError as err:
+            self.status_la.setText(f"Can't open {path}.\n{err}")
+            return
+
+        self.model = LogModel(log)
+        self.view.setModel(self.model)
+        if self.filter_le.text():
+            self.model.set_filter(self.filter_le.text())
+        self.update_status()
+        self.view.scrollToBottom()
+
+    def apply_filter(self):
+        if self.model is not None:
+            self.model.set_filter(self.filter_le.text())
+            self.update_status()
+            self.view.scrollToBottom()
+
+    def goto_time(self):
+        if self.model is None:
+            return
+        line = self.model.log.find_time(self.time_dte.dateTime().toPyDateTime())
+        row = min(self.model.row_of_line(line), self.model.count - 1)
+        if row >= 0:
+            self.follow_chb.setChecked(False)
+            index = self.model.index(row)
+            self.view.setCurrentIndex(index)
+            self.view.scrollTo(index, qt.QAbstractItemView.PositionAtTop)
+
+    def refresh(self):
+        if self.model is None:
+            return
+        count = self.model.count
+        self.model.refresh()
+        if self.model.count != count:
+            self.update_status()
+            if self.follow_chb.isChecked():
+                self.view.scrollToBottom()
+
+    def update_status(self):
+        if self.model.rows is None:
+            self.status_la.setText(f"{len(self.model.log)} lines")
+        else:
+            self.status_la.setText(f"{self.model.count} of {len(self.model.log)} lines match")
+
+    def closeEvent(self, event):
+        self.timer.stop()
+        if self.model is not None:
+            self.model.log.close()
+            self.model = None
+        super().closeEvent(event)